@@ -12,12 +12,13 @@ each other's money. Only the risk manager can manage and view all accounts.
 """
 
 import os
-import json
 import time
+import orjson
 import logging
 import uuid
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from redis.exceptions import NoScriptError
 
 # Redis client for persistent storage
 from app.redis_client import redis_client
@@ -26,11 +27,90 @@ from app.redis_client import redis_client
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("oes.accounts")
 
+# Fast JSON codec for account, position and transaction records (orjson
+# returns bytes, which redis-py stores as-is)
+_dumps = orjson.dumps
+_loads = orjson.loads
+
 # Redis keys for account data
 ACCOUNTS_KEY = "oes:accounts"
 ACCOUNT_TRANSACTIONS_KEY_PREFIX = "oes:accounts:transactions:"
 ACCOUNT_POSITIONS_KEY_PREFIX = "oes:accounts:positions:"
 
+# Settles one trade server-side: moves both balances, records both
+# transactions and updates both positions, mirroring update_after_trade.
+# KEYS: accounts hash, buyer/seller positions hashes, buyer/seller transaction lists
+# ARGV: buyer id, seller id, symbol, quantity, price, timestamp, ISO time,
+#       buyer/seller transaction ids, buyer/seller descriptions
+# Returns {buyer settled, seller settled} as 1/0.
+SETTLE_TRADE_SCRIPT = """
+local accounts_key = KEYS[1]
+local symbol = ARGV[3]
+local quantity = tonumber(ARGV[4])
+local price = tonumber(ARGV[5])
+local now_ts = tonumber(ARGV[6])
+local now_iso = ARGV[7]
+local trade_value = quantity * price
+
+-- Adjust one side's balance, record the transaction and update its position
+local function settle(account_id, amount, quantity_change, positions_key, transactions_key, txn_id, description)
+    local account_json = redis.call("HGET", accounts_key, account_id)
+    if not account_json then
+        return 0
+    end
+    
+    local account = cjson.decode(account_json)
+    account.balance = account.balance + amount
+    account.updated_at = now_iso
+    redis.call("HSET", accounts_key, account_id, cjson.encode(account))
+    
+    redis.call("LPUSH", transactions_key, cjson.encode({
+        id = txn_id,
+        account_id = account_id,
+        type = "trade",
+        amount = amount,
+        balance_after = account.balance,
+        description = description,
+        timestamp = now_ts,
+        created_at = now_iso
+    }))
+    
+    local position
+    local position_json = redis.call("HGET", positions_key, symbol)
+    if position_json then
+        position = cjson.decode(position_json)
+        local old_quantity = position.quantity
+        local new_quantity = old_quantity + quantity_change
+        
+        -- Buys move the average price
+        if quantity_change > 0 then
+            if new_quantity > 0 then
+                position.avg_price = (old_quantity * position.avg_price + quantity_change * price) / new_quantity
+            else
+                position.avg_price = 0
+            end
+        end
+        
+        position.quantity = new_quantity
+        position.last_updated = now_ts
+    else
+        position = {
+            symbol = symbol,
+            quantity = quantity_change,
+            avg_price = price,
+            account_id = account_id,
+            last_updated = now_ts
+        }
+    end
+    redis.call("HSET", positions_key, symbol, cjson.encode(position))
+    return 1
+end
+
+local buyer_settled = settle(ARGV[1], -trade_value, quantity, KEYS[2], KEYS[4], ARGV[8], ARGV[10])
+local seller_settled = settle(ARGV[2], trade_value, -quantity, KEYS[3], KEYS[5], ARGV[9], ARGV[11])
+return {buyer_settled, seller_settled}
+"""
+
 class TradingAccount:
     """Trading account model representing a single trader's account."""
     
@@ -90,6 +170,9 @@ class AccountManager:
         """Initialize the account manager."""
         self.redis = redis_client
         
+        # Load the trade settlement script once so settling only sends the SHA1
+        self.settle_trade_sha = self.redis.script_load(SETTLE_TRADE_SCRIPT)
+        
         # Seed sample accounts if none exist
         if not self.get_all_accounts():
             self._seed_sample_accounts()
@@ -137,7 +220,7 @@ class AccountManager:
         if not account_json:
             return None
         
-        account_data = json.loads(account_json)
+        account_data = _loads(account_json)
         return TradingAccount.from_dict(account_data)
     
     def get_all_accounts(self) -> List[TradingAccount]:
@@ -146,7 +229,7 @@ class AccountManager:
         account_json_dict = self.redis.hgetall(ACCOUNTS_KEY)
         
         for account_json in account_json_dict.values():
-            account_data = json.loads(account_json)
+            account_data = _loads(account_json)
             accounts.append(TradingAccount.from_dict(account_data))
         
         return accounts
@@ -280,6 +363,69 @@ class AccountManager:
         
         return (buyer_balance_success, seller_balance_success)
     
+    def settle_trades(self, trades: List[Dict[str, Any]]) -> List[Tuple[bool, bool]]:
+        """
+        Apply update_after_trade for a batch of trades in one round trip.
+        
+        Each trade is settled atomically by SETTLE_TRADE_SCRIPT and all the
+        script calls are sent on a single pipeline.
+        
+        Args:
+            trades: Trades with symbol, buy/sell account ids, quantity and price
+            
+        Returns:
+            (buyer_success, seller_success) for every trade
+        """
+        timestamp = time.time()
+        now_iso = datetime.fromtimestamp(timestamp).isoformat()
+        
+        calls = []
+        for trade in trades:
+            symbol = trade['symbol']
+            buy_account_id = trade['buy_account_id']
+            sell_account_id = trade['sell_account_id']
+            quantity = float(trade.get('buy_quantity', trade.get('quantity', 0)))
+            price = float(trade['price'])
+            
+            keys = (
+                ACCOUNTS_KEY,
+                f"{ACCOUNT_POSITIONS_KEY_PREFIX}{buy_account_id}",
+                f"{ACCOUNT_POSITIONS_KEY_PREFIX}{sell_account_id}",
+                f"{ACCOUNT_TRANSACTIONS_KEY_PREFIX}{buy_account_id}",
+                f"{ACCOUNT_TRANSACTIONS_KEY_PREFIX}{sell_account_id}",
+            )
+            args = (
+                buy_account_id, sell_account_id, symbol, quantity, price,
+                timestamp, now_iso, f"txn-{uuid.uuid4()}", f"txn-{uuid.uuid4()}",
+                f"Buy {quantity} {symbol} @ ${price}", f"Sell {quantity} {symbol} @ ${price}",
+            )
+            calls.append(keys + args)
+        
+        results = self._run_settle_calls(calls)
+        
+        # Retry only the calls that missed the script cache (e.g. Redis restart)
+        retry = [index for index, result in enumerate(results) if isinstance(result, NoScriptError)]
+        if retry:
+            self.settle_trade_sha = self.redis.script_load(SETTLE_TRADE_SCRIPT)
+            for index, result in zip(retry, self._run_settle_calls([calls[i] for i in retry])):
+                results[index] = result
+        
+        settled = []
+        for trade, result in zip(trades, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error settling trade {trade.get('trade_id')}: {result}")
+                settled.append((False, False))
+            else:
+                settled.append((bool(result[0]), bool(result[1])))
+        return settled
+    
+    def _run_settle_calls(self, calls: List[Tuple]) -> List[Any]:
+        """Send settlement script calls on one pipeline, returning errors in place of results."""
+        pipe = self.redis.pipeline(transaction=False)
+        for call in calls:
+            pipe.evalsha(self.settle_trade_sha, 5, *call)
+        return pipe.execute(raise_on_error=False)
+    
     def record_transaction(self, account_id: str, transaction_type: str, 
                           amount: float, description: str = "", balance_after: Optional[float] = None) -> Dict[str, Any]:
         """
@@ -315,7 +461,7 @@ class AccountManager:
         
         # Store in Redis
         transactions_key = f"{ACCOUNT_TRANSACTIONS_KEY_PREFIX}{account_id}"
-        self.redis.lpush(transactions_key, json.dumps(transaction))
+        self.redis.lpush(transactions_key, _dumps(transaction))
         
         return transaction
     
@@ -326,7 +472,7 @@ class AccountManager:
         
         transactions = []
         for txn_json in transaction_jsons:
-            transactions.append(json.loads(txn_json))
+            transactions.append(_loads(txn_json))
         
         return transactions
     
@@ -385,7 +531,7 @@ class AccountManager:
         position_json = self.redis.hget(positions_key, symbol)
         
         if position_json:
-            position = json.loads(position_json)
+            position = _loads(position_json)
             old_quantity = position['quantity']
             avg_price = position['avg_price']
             
@@ -416,7 +562,7 @@ class AccountManager:
             }
         
         # Save position
-        self.redis.hset(positions_key, symbol, json.dumps(position))
+        self.redis.hset(positions_key, symbol, _dumps(position))
         return position
     
     def get_position(self, account_id: str, symbol: str) -> Optional[Dict[str, Any]]:
@@ -427,7 +573,7 @@ class AccountManager:
         if not position_json:
             return None
         
-        return json.loads(position_json)
+        return _loads(position_json)
     
     def get_all_positions(self, account_id: str) -> List[Dict[str, Any]]:
         """Get all positions for an account."""
@@ -436,13 +582,13 @@ class AccountManager:
         
         positions = []
         for position_json in position_json_dict.values():
-            positions.append(json.loads(position_json))
+            positions.append(_loads(position_json))
         
         return positions
     
     def _save_account(self, account: TradingAccount) -> bool:
         """Save account data to Redis."""
-        account_json = json.dumps(account.to_dict())
+        account_json = _dumps(account.to_dict())
         return self.redis.hset(ACCOUNTS_KEY, account.account_id, account_json)
     
     def _seed_sample_accounts(self) -> None:
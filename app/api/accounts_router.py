@@ -9,15 +9,14 @@ from fastapi.responses import JSONResponse
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 import logging
-import uuid
 import time
 import json
 from datetime import datetime
 import asyncio
 
 from app.accounts import account_manager
-from app.matching_engine import matching_engine, ORDERS_KEY
-from app.redis_client import redis_client
+from app.matching_engine import matching_engine, new_order_id, format_created_at, ORDERS_KEY
+from app.redis_client import redis_client, SYMBOLS_KEY
 
 # Configure logging
 logger = logging.getLogger("oes.accounts")
@@ -268,7 +267,7 @@ async def create_order(account_id: str, order: OrderCreate) -> Dict[str, Any]:
             order_data["status"] = "open"
             
             # Store order directly in Redis
-            redis_client.set(f"oes:order:{order_id}", json.dumps(order_data))
+            redis_client.store_order(order_id, order_data)
             
             # Add to orders collection
             redis_client.sadd("oes:orders:all", order_id)
@@ -278,6 +277,14 @@ async def create_order(account_id: str, order: OrderCreate) -> Dict[str, Any]:
             
             # Add to symbol index
             redis_client.sadd(f"oes:symbol:{order_data['symbol']}:orders", order_id)
+            redis_client.sadd(SYMBOLS_KEY, order_data['symbol'])
+            
+            # Add to the matching book
+            redis_client.add_to_price_book(order_data)
+            
+            # Hand the order to its symbol's matcher
+            if order_data.get("order_type") != "market":
+                matching_engine.request_match(order_data['symbol'], order_id)
             
             logger.info(f"Order {order_id} stored directly in Redis as fallback")
             return order_data
@@ -384,9 +391,10 @@ async def create_order_direct(account_id: str, order: OrderCreate) -> Dict[str,
             logger.error(f"Account not found: {account_id}")
             raise HTTPException(status_code=404, detail="Account not found")
         
-        # Prepare order data
+        # Prepare order data; the side is stored lowercase
         order_data = order.dict()
         order_data["account_id"] = account_id
+        order_data["type"] = order_data["type"].lower()
         
         # Handle market orders - we need to set price to 0 explicitly
         if order_data.get("order_type") == "market":
@@ -398,15 +406,16 @@ async def create_order_direct(account_id: str, order: OrderCreate) -> Dict[str,
             logger.error("Missing symbol in order data")
             raise HTTPException(status_code=400, detail="Symbol is required")
             
-        # Generate a unique order ID
-        order_id = f"order-{uuid.uuid4()}"
+        # Generate a unique order ID (short, counter-based ids keep the
+        # order keys and index members small)
+        order_id = new_order_id()
         order_data["id"] = order_id
         order_data["order_id"] = order_id
         
         # Add timestamp
         timestamp = time.time()
         order_data["timestamp"] = timestamp
-        order_data["created_at"] = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        order_data["created_at"] = format_created_at(timestamp)
         
         # Use provided status or default to 'open'
         if 'status' not in order_data:
@@ -434,11 +443,8 @@ async def create_order_direct(account_id: str, order: OrderCreate) -> Dict[str,
             
         # Directly store the order in Redis
         try:
-            # Serialize the order to JSON
-            order_json = json.dumps(order_data)
-            
             # Store the order
-            redis_client.set(f"oes:order:{order_id}", order_json)
+            redis_client.store_order(order_id, order_data)
             
             # Add to orders collection
             redis_client.sadd("oes:orders:all", order_id)
@@ -448,24 +454,27 @@ async def create_order_direct(account_id: str, order: OrderCreate) -> Dict[str,
             
             # Add to symbol index
             redis_client.sadd(f"oes:symbol:{order_data['symbol']}:orders", order_id)
+            redis_client.sadd(SYMBOLS_KEY, order_data['symbol'])
+            
+            # Add to the matching book
+            redis_client.add_to_price_book(order_data)
             
             # Add to the matching engine's key for all orders
             redis_client.sadd(ORDERS_KEY, order_id)
             
+            # A failed write raises above, so the order is not read back
             logger.info(f"Order {order_id} successfully stored directly in Redis with status: {order_data['status']}")
             
-            # Verify the order was stored
-            stored_order = redis_client.get(f"oes:order:{order_id}")
-            if not stored_order:
-                logger.error(f"Failed to verify order {order_id} in Redis")
-                raise HTTPException(status_code=500, detail="Failed to store order in database")
-            else:
-                logger.info(f"Order {order_id} verified in Redis")
+            # Let the background matcher know there is new work
+            matching_engine.notify_new_order()
             
             # Now pass the order to the matching engine for processing
             if order_data.get("order_type") == "market":
                 # For market orders, we want to try to match immediately
                 asyncio.create_task(matching_engine.process_market_order(order_id))
+            else:
+                # Limit orders are matched by their symbol's matcher
+                matching_engine.request_match(order_data['symbol'], order_id)
                 
             return order_data
             
@@ -489,14 +498,9 @@ async def debug_all_orders():
         # Get all orders directly from Redis
         all_orders = []
         for order_id in all_order_ids:
-            order_key = f"oes:order:{order_id}"
-            order_json = matching_engine.redis.get(order_key)
-            if order_json:
-                try:
-                    order = json.loads(order_json)
-                    all_orders.append(order)
-                except Exception as e:
-                    logger.error(f"Error parsing order JSON for {order_id}: {e}")
+            order = matching_engine.redis.load_order(order_id)
+            if order:
+                all_orders.append(order)
         
         # Get orders using the matching engine method
         engine_orders = matching_engine.get_all_orders()
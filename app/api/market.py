@@ -21,9 +21,10 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Cache for stock market data to prevent excessive API calls
+# Cache for stock market data to prevent excessive API calls. Ages are
+# measured on the monotonic clock; -inf means never fetched.
 STOCK_MARKET_CACHE = {
-    "last_updated": 0,
+    "last_updated": float("-inf"),
     "cache_duration": 3600,  # 1 hour cache
     "data": {}
 }
@@ -50,7 +51,7 @@ async def fetch_stock_data():
     Fetch stock data from a free API for the top 100 NYSE companies.
     Uses Alpha Vantage API (limited to 5 API calls per minute on free tier).
     """
-    current_time = time.time()
+    current_time = time.monotonic()
     
     # Return cached data if it's still fresh
     if (current_time - STOCK_MARKET_CACHE["last_updated"] < STOCK_MARKET_CACHE["cache_duration"] and
@@ -69,22 +69,17 @@ async def get_internal_orderbook(
         
         logger.info(f"Fetching internal orderbook for trader {trader_id}, asset {asset_type} with depth={depth}")
         
-        # Get all internal orders
+        # Get this trader's internal orders; the trader filter runs in the
+        # book script, so other traders' orders never leave Redis and none
+        # of the trader's orders are lost behind a fixed over-fetch
         book = order_book.get_order_book(
-            depth=100,  # Get more orders initially to filter
+            depth=depth,
             include_internal=True,  # Include internal orders only
             asset_type=asset_type.lower(),
-            symbol=symbol
+            symbol=symbol,
+            trader_id=trader_id
         )
         
-        # Filter to only include orders from this trader
-        book['bids'] = [order for order in book.get('bids', []) if order.get('trader_id') == trader_id]
-        book['asks'] = [order for order in book.get('asks', []) if order.get('trader_id') == trader_id]
-        
-        # Respect the depth parameter after filtering
-        book['bids'] = book['bids'][:depth]
-        book['asks'] = book['asks'][:depth]
-        
         logger.info(f"Found {len(book.get('bids', []))} trader bids and {len(book.get('asks', []))} trader asks")
         return book
     except HTTPException:
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
-import json
+import orjson
 import logging
+from collections import OrderedDict
 
 from app.redis_client import redis_client
 from app.matching_engine import matching_engine
@@ -12,11 +13,56 @@ from app.schemas import OrderResponse
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Fast JSON decoder for stored trades
+_loads = orjson.loads
+
+# Most decoded trades kept in memory. Trades never change once written, so
+# cached records are always current and only unseen trades hit Redis.
+TRADE_CACHE_SIZE = 10000
+_trade_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
 orders_router = APIRouter(
     prefix="/api/orders",
     tags=["orders"],
 )
 
+def load_trades(trade_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Get trade records, reading only the ones not cached yet (in one MGET).
+    
+    Args:
+        trade_ids: IDs of the trades to get
+        
+    Returns:
+        A copy of each trade (callers may add fields), or None for trades
+        that are missing or cannot be parsed
+    """
+    missing = [trade_id for trade_id in trade_ids if trade_id not in _trade_cache]
+    if missing:
+        trade_jsons = redis_client.mget([f"oes:trade:{trade_id}" for trade_id in missing])
+        for trade_id, trade_json in zip(missing, trade_jsons):
+            if not trade_json:
+                continue
+            try:
+                _trade_cache[trade_id] = _loads(trade_json)
+            except Exception as e:
+                logger.error(f"Error parsing trade JSON: {e}")
+    
+    trades = []
+    for trade_id in trade_ids:
+        trade = _trade_cache.get(trade_id)
+        if trade is None:
+            trades.append(None)
+            continue
+        _trade_cache.move_to_end(trade_id)
+        trades.append(dict(trade))
+    
+    # Drop the least recently used trades
+    while len(_trade_cache) > TRADE_CACHE_SIZE:
+        _trade_cache.popitem(last=False)
+    
+    return trades
+
 # Basic Order model
 class Order(BaseModel):
     id: str
@@ -80,12 +126,7 @@ async def get_order_by_id(order_id: str):
         # If not found in matching engine, try direct Redis lookup
         if not order:
             # Try direct Redis lookup for more reliability
-            order_json = redis_client.get(f"oes:order:{order_id}")
-            if order_json:
-                try:
-                    order = json.loads(order_json)
-                except Exception as e:
-                    logger.error(f"Error parsing order JSON from Redis: {str(e)}", exc_info=True)
+            order = redis_client.load_order(order_id)
         
         if not order:
             logger.warning(f"Order not found: {order_id}")
@@ -123,14 +164,9 @@ async def get_recent_trades():
         
         trades = []
         # Get the 20 most recent trades
-        for trade_id in list(trade_ids)[:20]:
-            trade_key = f"oes:trade:{trade_id}"
-            trade_json = redis_client.get(trade_key)
-            
-            if trade_json:
+        for trade in load_trades(list(trade_ids)[:20]):
+            if trade:
                 try:
-                    trade = json.loads(trade_json)
-                    
                     # Calculate total value
                     price = float(trade.get('price', 0))
                     quantity = float(trade.get('quantity', 0))
@@ -161,7 +197,7 @@ async def get_recent_trades():
                     
                     trades.append(trade)
                 except Exception as e:
-                    logger.error(f"Error parsing trade JSON: {e}")
+                    logger.error(f"Error processing trade: {e}")
         
         # Sort by timestamp (newest first)
         trades.sort(key=lambda x: float(x.get('timestamp', 0)), reverse=True)
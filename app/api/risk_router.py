@@ -1,7 +1,6 @@
 from fastapi import APIRouter, HTTPException, status, Request, Query
 from typing import List, Dict, Any, Optional
 from fastapi.responses import HTMLResponse
-import json
 import logging
 import time
 from datetime import datetime
@@ -65,11 +64,9 @@ async def get_orders(asset_type: Optional[str] = None):
             
             # Get order data for each ID
             for order_id in order_ids:
-                order_key = f"oes:order:{order_id}"
-                order_json = redis_client.get(order_key)
-                if order_json:
+                order = redis_client.load_order(order_id)
+                if order:
                     try:
-                        order = json.loads(order_json)
                         # Skip orders that aren't active
                         if order.get("status") not in ["open", "partially_filled"]:
                             continue
@@ -87,7 +84,7 @@ async def get_orders(asset_type: Optional[str] = None):
                         order["time_display"] = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
                         
                         orders.append(order)
-                    except json.JSONDecodeError:
+                    except (TypeError, ValueError):
                         continue
         
         # Filter by asset type if provided
@@ -0,0 +1,74 @@
+"""
+Book Side
+
+Price-level structure for one side of an order book.
+
+Orders are grouped by price level (prices quantized to integer ticks); each
+level is a FIFO deque in time priority, and the active levels are kept in a
+sorted list so the best level is found without re-sorting the whole side.
+"""
+
+import bisect
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List
+
+# Price quantization: one tick is a cent
+PRICE_TICKS_PER_UNIT = 100
+
+def price_to_ticks(price: Any) -> int:
+    """Quantize a price to integer ticks."""
+    return int(round(float(price) * PRICE_TICKS_PER_UNIT))
+
+class BookSide:
+    """
+    One side (bids or asks) of an order book.
+
+    levels maps a price in ticks to the orders resting at that price in time
+    priority; sorted_prices holds the active price levels in ascending order.
+    """
+
+    def __init__(self, is_buy: bool):
+        """
+        Initialize an empty book side.
+
+        Args:
+            is_buy: True for bids (best price is highest), False for asks
+        """
+        self.is_buy = is_buy
+        self.levels: Dict[int, Deque[Dict[str, Any]]] = {}
+        self.sorted_prices: List[int] = []
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self.levels.values())
+
+    def add(self, order: Dict[str, Any]) -> None:
+        """
+        Add an order at its price level, keeping time priority within the level.
+
+        Args:
+            order: Order with price and timestamp fields
+        """
+        ticks = price_to_ticks(order['price'])
+        level = self.levels.get(ticks)
+
+        if level is None:
+            level = deque()
+            self.levels[ticks] = level
+            bisect.insort(self.sorted_prices, ticks)
+
+        # Orders usually arrive in time order, so this scan rarely moves
+        timestamp = float(order['timestamp'])
+        index = len(level)
+        while index > 0 and float(level[index - 1]['timestamp']) > timestamp:
+            index -= 1
+        level.insert(index, order)
+
+    def best_price(self) -> int:
+        """Get the best price level in ticks (raises IndexError when empty)."""
+        return self.sorted_prices[-1] if self.is_buy else self.sorted_prices[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate orders in price-time priority (best price first)."""
+        prices = reversed(self.sorted_prices) if self.is_buy else self.sorted_prices
+        for ticks in prices:
+            yield from self.levels[ticks]
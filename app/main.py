@@ -17,8 +17,10 @@ The application is built with FastAPI and features:
 import os
 import json
 import time
+import orjson
 import asyncio
-from typing import Dict, List, Any, Optional
+from collections import deque
+from typing import Dict, List, Any, Optional, Callable, Awaitable
 import logging
 
 # FastAPI and web-related imports
@@ -46,13 +48,16 @@ from app.order_book import order_book, seed_historical_data
 from app.websocket import connection_manager
 from app.api import orders_router, accounts_router, risk_router
 from app.redis_client import redis_client
-from app.matching_engine import matching_engine
+from app.matching_engine import matching_engine, MATCH_SHARDS
 from app.accounts import account_manager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("oes")
 
+# Fast JSON decoder for Redis notifications and WebSocket messages
+_loads = orjson.loads
+
 # Create FastAPI application
 app = FastAPI(
     title="Order Entry System (OES)",
@@ -73,6 +78,16 @@ app.include_router(risk_router)
 # Configure templates
 templates = Jinja2Templates(directory="app/templates")
 
+# Static page templates; they take no per-request data so they are rendered
+# once and served from PAGE_CACHE
+PAGE_TEMPLATES = [
+    "pages/home.html",
+    "pages/stocks.html",
+    "pages/risk-manager.html",
+    "pages/accounts.html",
+]
+PAGE_CACHE: Dict[str, bytes] = {}
+
 # Background task for matching orders
 matching_task = None
 
@@ -82,6 +97,49 @@ broadcast_task = None
 # Background task for latency measurements
 latency_task = None
 
+# Background task that drains queued WebSocket broadcasts
+broadcast_drainer_task = None
+
+# Background task that sweeps filled orders out of the indices
+cleanup_task = None
+
+# Trade notification de-duplication window (seconds) and maximum tracked IDs
+SEEN_TRADE_TTL = 30
+SEEN_TRADE_MAX = 1000
+
+# Interval (seconds) of the fallback pass over every account book. New
+# account orders are matched by their symbol's matcher; this pass only
+# catches what those missed (e.g. a matcher that errored) and runs when no
+# order has arrived for a whole interval
+MATCHING_IDLE_TIMEOUT = 1.0
+
+# Window (seconds) in which back-to-back order arrivals are matched without yielding
+MATCHING_BURST_WINDOW = 0.005
+
+# Raw heartbeat frames answered without JSON parsing (browser and Python encodings)
+WS_PING_FRAMES = frozenset({'{"type":"ping"}', '{"type": "ping"}'})
+
+# Pre-encoded pong reply, refreshed at most once per interval (seconds)
+PONG_REFRESH_INTERVAL = 1.0
+pong_payload = ""
+pong_payload_time = 0.0
+
+def get_cached_page(name: str) -> bytes:
+    """
+    Get a rendered page template, rendering and caching it on first use.
+    
+    Args:
+        name: Template path relative to app/templates
+        
+    Returns:
+        The rendered HTML as UTF-8 bytes
+    """
+    page = PAGE_CACHE.get(name)
+    if page is None:
+        page = templates.get_template(name).render({"request": None}).encode("utf-8")
+        PAGE_CACHE[name] = page
+    return page
+
 def seed_internal_book():
     """
     Seed the internal order book with some initial data.
@@ -108,6 +166,13 @@ async def startup_event():
             logger.info("All orders cleared successfully")
         else:
             logger.info("Skipping order clearing due to --no-clear flag")
+            
+            # Register the symbols of orders kept from an earlier run
+            redis_client.rebuild_symbol_registry()
+        
+        # Pre-render the static pages
+        for name in PAGE_TEMPLATES:
+            get_cached_page(name)
         
         # Seed historical data
         if not seed_historical_data():
@@ -117,14 +182,25 @@ async def startup_event():
         if not seed_internal_book():
             logger.warning("Failed to seed internal book")
         
+        # Start the single writer that sends all queued broadcasts
+        global broadcast_drainer_task
+        broadcast_drainer_task = asyncio.create_task(connection_manager.run_broadcast_drainer())
+        
         # Start the order matching background task
         global matching_task
         matching_task = asyncio.create_task(periodic_order_matching())
         logger.info("Started primary order matching task")
         
-        # Start the automatic order matching service with very short interval
-        logger.info("Starting automatic order matching service")
-        auto_matching_task = asyncio.create_task(matching_engine.start_auto_matching(interval_seconds=0.05))
+        # Sweep filled/cancelled orders out of the indices off the hot path
+        global cleanup_task
+        cleanup_task = asyncio.create_task(matching_engine.run_periodic_cleanup())
+        
+        # Account orders are matched by one matcher per symbol, started on
+        # the symbol's first order, unless sharded worker processes own them
+        if MATCH_SHARDS > 0:
+            logger.info(f"Matching is sharded across {MATCH_SHARDS} worker processes")
+        else:
+            logger.info("Account orders are matched by per-symbol matchers")
         
         # Start the order book broadcast task
         global broadcast_task
@@ -168,6 +244,23 @@ async def shutdown_event():
                 await latency_task
             except asyncio.CancelledError:
                 pass
+            
+        if broadcast_drainer_task:
+            broadcast_drainer_task.cancel()
+            try:
+                await broadcast_drainer_task
+            except asyncio.CancelledError:
+                pass
+            
+        if cleanup_task:
+            cleanup_task.cancel()
+            try:
+                await cleanup_task
+            except asyncio.CancelledError:
+                pass
+            
+        # Stop the per-symbol matchers
+        await matching_engine.stop_matchers()
 
         # Close all WebSocket connections
         for connection in connection_manager.active_connections:
@@ -183,53 +276,92 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error during shutdown: {str(e)}")
 
-async def periodic_order_matching():
+async def run_matching_pass(fallback: bool = False) -> None:
+    """
+    Run one matching pass and publish the results.
+    
+    Args:
+        fallback: Also sweep every account book; the per-symbol matchers
+            normally match those as orders arrive
+    """
+    # Clear before matching so orders arriving mid-pass trigger another pass
+    matching_engine.new_order_event.clear()
+    
+    # One clock read per tick, shared by every broadcast below
+    now = time.time()
+    
+    # Sweep the account books only as a fallback (the match workers own the
+    # symbols when matching is sharded)
+    trades = await matching_engine.match_all_symbols() if fallback and MATCH_SHARDS == 0 else []
+    
+    # Process legacy order book matches
+    legacy_trades = await order_book.match_orders()
+    
+    # Combine trades from both systems
+    all_trades = trades + legacy_trades
+    
+    if all_trades:
+        logger.info(f"Successfully matched {len(all_trades)} trades")
+    
+    # Symbols that traded, in first-trade order; each book is read and
+    # broadcast once however many trades it had
+    traded_symbols = {}
+    
+    # If trades were executed, broadcast them and update order books
+    for trade in all_trades:
+        # Broadcast trade
+        connection_manager.publish(
+            {"type": "trade", "data": trade},
+            channel="trades"
+        )
+    
+        # Also broadcast to symbol-specific channel
+        if "symbol" in trade:
+            symbol_channel = f"trades:{trade['symbol']}"
+            connection_manager.publish(
+                {"type": "trade", "data": trade},
+                channel=symbol_channel
+            )
+            traded_symbols[trade['symbol']] = True
+    
+    # Get and broadcast the updated order book for each traded symbol
+    for symbol in traded_symbols:
+        book = await get_order_book(symbol, depth=15)
+        connection_manager.publish(
+            {
+                "type": "orderbook",
+                "symbol": symbol,
+                "data": book,
+                "timestamp": now
+            },
+            channel=f"orderbook:{symbol}"
+        )
+
+async def periodic_order_matching() -> None:
     """Background task to periodically match orders."""
     logger.info("Starting aggressive order matching task")
+    
+    # The first pass also sweeps the account books for leftovers
+    fallback = True
     while True:
         try:
-            # Match orders using the enhanced matching engine
-            trades = await matching_engine.match_all_symbols()
+            # Keep matching while orders keep arriving, for at most one burst window
+            deadline = time.monotonic() + MATCHING_BURST_WINDOW
+            await run_matching_pass(fallback)
+            while matching_engine.has_pending() and time.monotonic() < deadline:
+                await run_matching_pass()
             
-            # Process legacy order book matches
-            legacy_trades = await order_book.match_orders()
-            
-            # Combine trades from both systems
-            all_trades = trades + legacy_trades
-            
-            if all_trades:
-                logger.info(f"Successfully matched {len(all_trades)} trades")
-            
-            # If trades were executed, broadcast them and update order books
-            for trade in all_trades:
-                # Broadcast trade
-                await connection_manager.broadcast(
-                    {"type": "trade", "data": trade},
-                    channel="trades"
+            # Sleep until a new order arrives; the timeout runs the fallback
+            # sweep and keeps time-triggered orders (e.g. GTD expiry) moving
+            # even when nothing is submitted
+            try:
+                await asyncio.wait_for(
+                    matching_engine.new_order_event.wait(),
+                    timeout=MATCHING_IDLE_TIMEOUT
                 )
-                
-                # Also broadcast to symbol-specific channel
-                if "symbol" in trade:
-                    symbol_channel = f"trades:{trade['symbol']}"
-                    await connection_manager.broadcast(
-                        {"type": "trade", "data": trade},
-                        channel=symbol_channel
-                    )
-                    
-                    # Get and broadcast updated order book for this symbol
-                    book = await get_order_book(trade['symbol'], depth=15)
-                    await connection_manager.broadcast(
-                        {
-                            "type": "orderbook",
-                            "symbol": trade['symbol'],
-                            "data": book,
-                            "timestamp": time.time()
-                        },
-                        channel=f"orderbook:{trade['symbol']}"
-                    )
-            
-            # Very short delay to prevent CPU hogging but allow for very frequent matching
-            await asyncio.sleep(0.001)  # 1ms delay between matching attempts
+                fallback = False
+            except asyncio.TimeoutError:
+                fallback = True
             
         except asyncio.CancelledError:
             # Task is being cancelled
@@ -243,6 +375,9 @@ async def periodic_order_book_broadcast():
     """Background task to periodically broadcast the order book."""
     while True:
         try:
+            # One clock read per tick, shared by every symbol broadcast
+            now = time.time()
+            
             # Get current order books for all active symbols
             active_symbols = set()
             for connection in connection_manager.active_connections:
@@ -254,12 +389,12 @@ async def periodic_order_book_broadcast():
                 book = await get_order_book(symbol, depth=15)
                 
                 # Broadcast to symbol-specific channel
-                await connection_manager.broadcast(
+                connection_manager.publish(
                     {
                         "type": "orderbook",
                         "symbol": symbol,
                         "data": book,
-                        "timestamp": time.time()
+                        "timestamp": now
                     },
                     channel=f"orderbook:{symbol}"
                 )
@@ -273,14 +408,20 @@ async def periodic_order_book_broadcast():
             print(f"Error in order book broadcast: {e}")
             await asyncio.sleep(1)
 
+def measure_redis_latency() -> float:
+    """Ping Redis and return the round-trip time in milliseconds."""
+    start_ns = time.perf_counter_ns()
+    redis_client.ping()
+    return (time.perf_counter_ns() - start_ns) / 1e6
+
 async def periodic_latency_broadcast():
     """Background task to periodically measure and broadcast system latency."""
     while True:
         try:
-            # Measure Redis latency
-            start_time = time.time()
-            redis_client.ping()
-            redis_latency = (time.time() - start_time) * 1000  # ms
+            # Measure Redis latency in a worker thread so the blocking ping
+            # neither stalls the event loop nor picks up scheduling delay
+            loop = asyncio.get_running_loop()
+            redis_latency = await loop.run_in_executor(None, measure_redis_latency)
             
             # Create latency data
             latency_data = {
@@ -289,7 +430,7 @@ async def periodic_latency_broadcast():
             }
             
             # Broadcast to all clients
-            await connection_manager.broadcast(
+            connection_manager.publish(
                 {"type": "latency", "data": latency_data},
                 channel="system"
             )
@@ -303,7 +444,7 @@ async def periodic_latency_broadcast():
             print(f"Error in latency measurement: {e}")
             await asyncio.sleep(5)
 
-async def listen_for_notifications():
+async def listen_for_notifications() -> None:
     """
     Listen for notifications published to Redis and broadcast them to connected clients.
     This enables real-time trade notifications and order updates.
@@ -317,11 +458,22 @@ async def listen_for_notifications():
         
         logger.info("Listening for notifications on Redis PubSub channel")
         
-        # Track seen trade IDs to prevent duplicate notifications
-        seen_trade_ids = {}
+        # Track seen trade IDs to prevent duplicate notifications.
+        # The deque keeps (trade_id, first_seen) in arrival order so expired
+        # entries can be evicted from the front; the set answers membership.
+        seen_trade_queue = deque()
+        seen_trade_ids = set()
         
         # Listen for messages and broadcast them
         while True:
+            # One clock read per iteration
+            now = time.time()
+            
+            # Evict trade IDs that are older than the dedup window
+            expire_before = now - SEEN_TRADE_TTL
+            while seen_trade_queue and seen_trade_queue[0][1] < expire_before:
+                seen_trade_ids.discard(seen_trade_queue.popleft()[0])
+            
             # Use get_message with a timeout instead of await
             message = pubsub.get_message(ignore_subscribe_messages=True, timeout=0.01)
             if message:
@@ -332,48 +484,39 @@ async def listen_for_notifications():
                         data = data.decode('utf-8')
                         
                     # Parse the JSON data
-                    notification = json.loads(data)
+                    notification = _loads(data)
                     
                     # Add 'notification' type if not present
                     if 'type' not in notification:
                         notification['type'] = 'notification'
                     
                     # Broadcast to all connected clients
-                    await connection_manager.broadcast(notification)
+                    connection_manager.publish(notification)
                     
                     # If it's a trade notification, also broadcast on the trades channel
                     if notification.get('type') == 'trade_executed':
-                        await connection_manager.broadcast(notification, channel='trades')
+                        connection_manager.publish(notification, channel='trades')
                         
                         # Only send toast notification if we haven't seen this trade ID recently
                         trade_id = notification.get('trade_id')
-                        current_time = time.time()
                         
-                        if trade_id:
-                            # Check if we've seen this trade ID in the last 5 seconds
-                            if (trade_id not in seen_trade_ids or 
-                                current_time - seen_trade_ids[trade_id] > 5):
-                                
-                                # Record that we've seen this trade ID
-                                seen_trade_ids[trade_id] = current_time
-                                
-                                # Use the toast data from the trade notification
-                                if 'toast' in notification:
-                                    toast = {
-                                        'type': 'toast',
-                                        **notification['toast'],
-                                        'timestamp': current_time
-                                    }
-                                    await connection_manager.broadcast(toast)
-                                
-                                # Limit the size of seen_trade_ids by removing old entries
-                                if len(seen_trade_ids) > 1000:
-                                    # Remove entries older than 30 seconds
-                                    old_time = current_time - 30
-                                    seen_trade_ids = {
-                                        tid: ts for tid, ts in seen_trade_ids.items() 
-                                        if ts > old_time
-                                    }
+                        if trade_id and trade_id not in seen_trade_ids:
+                            # Record that we've seen this trade ID
+                            seen_trade_queue.append((trade_id, now))
+                            seen_trade_ids.add(trade_id)
+                            
+                            # Keep the window bounded under bursts
+                            if len(seen_trade_queue) > SEEN_TRADE_MAX:
+                                seen_trade_ids.discard(seen_trade_queue.popleft()[0])
+                            
+                            # Use the toast data from the trade notification
+                            if 'toast' in notification:
+                                toast = {
+                                    'type': 'toast',
+                                    **notification['toast'],
+                                    'timestamp': now
+                                }
+                                connection_manager.publish(toast)
                     
                 except Exception as e:
                     logger.error(f"Error processing notification: {e}")
@@ -392,24 +535,24 @@ async def get_status():
     return {"status": "online", "timestamp": time.time()}
 
 @app.get("/")
-async def get_home(request: Request):
+async def get_home():
     """Render the home page."""
-    return templates.TemplateResponse("pages/home.html", {"request": request})
+    return HTMLResponse(content=get_cached_page("pages/home.html"))
 
 @app.get("/stocks", response_class=HTMLResponse)
-async def get_stocks(request: Request):
+async def get_stocks():
     """Render the stocks trading page."""
-    return templates.TemplateResponse("pages/stocks.html", {"request": request})
+    return HTMLResponse(content=get_cached_page("pages/stocks.html"))
 
 @app.get("/risk-manager", response_class=HTMLResponse)
-async def get_risk_manager(request: Request):
+async def get_risk_manager():
     """Render the risk manager page."""
-    return templates.TemplateResponse("pages/risk-manager.html", {"request": request})
+    return HTMLResponse(content=get_cached_page("pages/risk-manager.html"))
 
 @app.get("/accounts", response_class=HTMLResponse)
-async def get_accounts(request: Request):
+async def get_accounts():
     """Render the accounts management page."""
-    return templates.TemplateResponse("pages/accounts.html", {"request": request})
+    return HTMLResponse(content=get_cached_page("pages/accounts.html"))
 
 @app.get("/{path:path}.map")
 async def handle_sourcemap_requests(path: str):
@@ -486,60 +629,88 @@ async def get_internal_order_book(symbol: str, depth: int = 10, asset_type: str
     
     return internal_book
 
+async def _handle_subscribe(websocket: WebSocket, message: Dict[str, Any]) -> None:
+    """Subscribe the client to the requested channel."""
+    channel = message.get("channel", "")
+    
+    if channel:
+        # Set the subscription on the connection
+        if ":" in channel:
+            _, symbol = channel.split(":", 1)
+            websocket.subscribed_symbol = symbol
+            
+        # Add the connection to the channel
+        connection_manager.subscribe(websocket, channel)
+        
+        # Send confirmation
+        await websocket.send_json({
+            "type": "subscription",
+            "status": "success",
+            "channel": channel
+        })
+
+async def _handle_unsubscribe(websocket: WebSocket, message: Dict[str, Any]) -> None:
+    """Unsubscribe the client from the requested channel."""
+    channel = message.get("channel", "")
+    
+    if channel:
+        # Remove the connection from the channel
+        connection_manager.unsubscribe(websocket, channel)
+        
+        # Send confirmation
+        await websocket.send_json({
+            "type": "subscription",
+            "status": "unsubscribed",
+            "channel": channel
+        })
+
+def get_pong_payload() -> str:
+    """
+    Get the serialized pong reply, re-encoding it at most once per second.
+    
+    Returns:
+        JSON text of the pong message
+    """
+    global pong_payload, pong_payload_time
+    now = time.time()
+    if now - pong_payload_time >= PONG_REFRESH_INTERVAL:
+        pong_payload = json.dumps({"type": "pong", "timestamp": now})
+        pong_payload_time = now
+    return pong_payload
+
+async def _handle_ping(websocket: WebSocket, message: Dict[str, Any]) -> None:
+    """Answer a client heartbeat."""
+    await websocket.send_text(get_pong_payload())
+
+# Client message type -> handler, looked up once per frame instead of walking
+# an if/elif chain of string comparisons
+WS_MESSAGE_HANDLERS: Dict[str, Callable[[WebSocket, Dict[str, Any]], Awaitable[None]]] = {
+    "subscribe": _handle_subscribe,
+    "unsubscribe": _handle_unsubscribe,
+    "ping": _handle_ping,
+}
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket) -> None:
     """WebSocket endpoint for real-time updates."""
     await connection_manager.connect(websocket)
     try:
         while True:
             # Wait for messages from the client
-            data = await websocket.receive_text()
+            data: str = await websocket.receive_text()
+            
+            # Heartbeats are the most frequent client message, so answer them
+            # straight from the raw text without parsing
+            if data in WS_PING_FRAMES:
+                await websocket.send_text(get_pong_payload())
+                continue
             
             try:
-                message = json.loads(data)
-                message_type = message.get("type", "")
+                message: Dict[str, Any] = _loads(data)
+                handler = WS_MESSAGE_HANDLERS.get(message.get("type", ""))
                 
-                if message_type == "subscribe":
-                    # Client is subscribing to a channel
-                    channel = message.get("channel", "")
-                    
-                    if channel:
-                        # Set the subscription on the connection
-                        if ":" in channel:
-                            _, symbol = channel.split(":", 1)
-                            websocket.subscribed_symbol = symbol
-                            
-                        # Add the connection to the channel
-                        connection_manager.subscribe(websocket, channel)
-                        
-                        # Send confirmation
-                        await websocket.send_json({
-                            "type": "subscription",
-                            "status": "success",
-                            "channel": channel
-                        })
-                        
-                elif message_type == "unsubscribe":
-                    # Client is unsubscribing from a channel
-                    channel = message.get("channel", "")
-                    
-                    if channel:
-                        # Remove the connection from the channel
-                        connection_manager.unsubscribe(websocket, channel)
-                        
-                        # Send confirmation
-                        await websocket.send_json({
-                            "type": "subscription",
-                            "status": "unsubscribed",
-                            "channel": channel
-                        })
-                        
-                elif message_type == "ping":
-                    # Client is sending a ping
-                    await websocket.send_json({
-                        "type": "pong",
-                        "timestamp": time.time()
-                    })
+                if handler is not None:
+                    await handler(websocket, message)
                     
             except json.JSONDecodeError:
                 # Could not parse the message as JSON
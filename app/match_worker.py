@@ -0,0 +1,113 @@
+"""
+Match Worker
+
+Standalone matching process for one shard of the symbol space.
+
+With OES_MATCH_SHARDS=N the web process only queues match events; each symbol
+is owned by shard crc32(symbol) % N, and that shard's worker is the single
+process matching it. Workers consume their oes:match_events:shard:{k} stream
+in batches and match one symbol at a time, so matching for different shards
+runs in parallel on separate interpreters instead of sharing one GIL.
+
+Usage:
+    OES_MATCH_SHARDS=4 python -m app.match_worker --shard 0
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import argparse
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Add the parent directory to sys.path to make the app module importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.redis_client import redis_client
+from app.matching_engine import (
+    matching_engine,
+    MATCH_SHARDS,
+    MATCH_SHARD_EVENTS_KEY,
+    MATCH_EVENT_BATCH,
+    match_shard,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                   format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("oes.match_worker")
+
+# How long (milliseconds) XREAD waits for new events before looping
+WORKER_BLOCK_MS = 1000
+
+async def run_shard(shard: int) -> None:
+    """
+    Match every symbol owned by a shard until cancelled.
+    
+    Args:
+        shard: Shard number in [0, OES_MATCH_SHARDS)
+    """
+    stream_key = MATCH_SHARD_EVENTS_KEY.format(shard=shard)
+    logger.info(f"Match worker {shard}/{MATCH_SHARDS} consuming {stream_key}")
+    
+    # Events already in the stream are covered by one pass over every owned
+    # symbol, so reading resumes after them instead of replaying them (the
+    # tail is read first so nothing added during the pass is skipped)
+    last_id = redis_client.last_stream_id(stream_key)
+    owned = [symbol for symbol in redis_client.symbols() if match_shard(symbol) == shard]
+    for symbol in owned:
+        await matching_engine.match_orders(symbol)
+    logger.info(f"Match worker {shard} matched its {len(owned)} symbols at startup")
+    
+    while True:
+        try:
+            # This process does nothing but match, so blocking here is fine
+            response = redis_client.xread(
+                {stream_key: last_id},
+                count=MATCH_EVENT_BATCH,
+                block=WORKER_BLOCK_MS
+            )
+            if not response:
+                continue
+            
+            events = response[0][1]
+            last_id = events[-1][0]
+            
+            # One match pass per symbol in the batch, in arrival order
+            symbols = list(dict.fromkeys(fields['symbol'] for _, fields in events))
+            for symbol in symbols:
+                await matching_engine.match_orders(symbol)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"Error in match worker {shard}: {e}")
+            await asyncio.sleep(0.1)
+
+def main() -> None:
+    """Parse the shard number and run the worker."""
+    parser = argparse.ArgumentParser(description="OES sharded match worker")
+    parser.add_argument("--shard", type=int, required=True, help="Shard number to own")
+    args = parser.parse_args()
+    
+    if MATCH_SHARDS <= 0:
+        parser.error("OES_MATCH_SHARDS must be set to the number of match workers")
+    if not 0 <= args.shard < MATCH_SHARDS:
+        parser.error(f"--shard must be between 0 and {MATCH_SHARDS - 1}")
+    
+    # Run on uvloop like the web process (uvicorn's loop="auto"), falling
+    # back to the default loop where it is unavailable (e.g. Windows)
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
+    
+    try:
+        asyncio.run(run_shard(args.shard))
+    except KeyboardInterrupt:
+        logger.info(f"Match worker {args.shard} stopped")
+
+if __name__ == "__main__":
+    main()
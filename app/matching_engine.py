@@ -13,26 +13,126 @@ Key features:
 - Detailed trade tracking
 """
 
+import os
 import time
-import json
+import zlib
+import orjson
 import logging
 import uuid
-from typing import Dict, List, Any, Optional, Tuple
+import itertools
+from typing import Dict, List, Any, Optional, Set, Tuple
 from datetime import datetime
 import asyncio
 
 # Application-specific imports
-from app.redis_client import redis_client
+from app.redis_client import (
+    redis_client, price_book_key, price_book_score, encode_order, SYMBOLS_KEY, ACTIVE_ORDERS_KEY,
+    ACTIVE_ORDER_STATUSES
+)
+from app.matching_kernel import plan_matches
+from app.book_side import BookSide
 from app.accounts import account_manager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("oes.matching")
 
+# Fast JSON encoder for trades and notifications (bytes are accepted by redis-py)
+_dumps = orjson.dumps
+
 # Redis keys
 ORDERS_KEY = "oes:orders"
 TRADES_KEY = "oes:trades"
 
+# How often (seconds) the background sweep removes filled/cancelled orders
+# left behind in the order indices
+CLEANUP_INTERVAL = 5.0
+
+# Fields an order must carry to be accepted
+REQUIRED_ORDER_FIELDS = frozenset(('symbol', 'price', 'quantity', 'type', 'account_id'))
+
+# Per-symbol stream of "order entered the book" events consumed by the
+# symbol's dedicated matcher
+MATCH_EVENTS_KEY = "oes:match_events:{symbol}"
+
+# Number of match worker processes (python -m app.match_worker) that own the
+# symbols between them. 0 keeps matching inside the web process.
+MATCH_SHARDS = int(os.environ.get("OES_MATCH_SHARDS", "0"))
+
+# Per-shard stream of match events consumed by that shard's worker
+MATCH_SHARD_EVENTS_KEY = "oes:match_events:shard:{shard}"
+
+# Approximate number of events kept in each match event stream
+MATCH_EVENTS_MAXLEN = 10000
+
+# Maximum number of events a matcher takes from its stream per match pass
+MATCH_EVENT_BATCH = 256
+
+# How long (seconds) an idle matcher waits before checking its stream for
+# events added by other workers; a matcher that then finds nothing exits
+MATCHER_IDLE_TIMEOUT = 5.0
+
+# Number of resting orders the market order script reads from the opposite
+# price book per ZRANGE while it walks the book
+MARKET_ORDER_BOOK_BATCH = 50
+
+# Generated order ids are this per-process random prefix plus a counter, so
+# only one uuid4 is drawn per process rather than one per order
+ORDER_ID_PREFIX = f"order-{uuid.uuid4().hex[:12]}"
+_order_sequence = itertools.count(1)
+
+# (epoch second, formatted created_at) of the last order time formatted;
+# orders in the same second reuse the string instead of calling strftime
+_created_at_cache: Tuple[int, str] = (-1, "")
+
+def new_order_id() -> str:
+    """Generate an order id that is unique across processes."""
+    return f"{ORDER_ID_PREFIX}-{next(_order_sequence)}"
+
+def format_created_at(timestamp: float) -> str:
+    """
+    Format an order's epoch timestamp as its created_at string.
+    
+    The format has one-second resolution, so the string is formatted once
+    per second and reused for every order in that second.
+    """
+    global _created_at_cache
+    second = int(timestamp)
+    cached_second, text = _created_at_cache
+    if second != cached_second:
+        text = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        _created_at_cache = (second, text)
+    return text
+
+def match_shard(symbol: str, shards: int = MATCH_SHARDS) -> int:
+    """
+    Get the worker shard that owns a symbol.
+    
+    Uses CRC32 rather than hash() so every process agrees on the owner.
+    """
+    return zlib.crc32(symbol.encode("utf-8")) % shards
+
+def match_event(symbol: str, order_id: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Get the stream key and fields of a match event for a symbol.
+    
+    Returns:
+        (stream key, entry fields) for XADD
+    """
+    if MATCH_SHARDS > 0:
+        shard_key = MATCH_SHARD_EVENTS_KEY.format(shard=match_shard(symbol))
+        return shard_key, {'oid': order_id, 'symbol': symbol}
+    return MATCH_EVENTS_KEY.format(symbol=symbol), {'oid': order_id}
+
+def _normalize_internal_match(order: Dict[str, Any]) -> None:
+    """
+    Set an order's internal_match flag to the string 'True' or 'False'.
+    
+    Falls back to the order's internal field, then to 'False'.
+    """
+    value = order.get('internal_match', order.get('internal', False))
+    order['internal_match'] = 'True' if value is True or value == 'True' else 'False'
+
 class MatchingEngine:
     """
     High-performance trading matching engine.
@@ -50,6 +150,44 @@ class MatchingEngine:
         self.redis = redis_client
         self.account_mgr = account_manager
         
+        # Set whenever an order enters or changes in a book so the background
+        # matcher can wait for work instead of polling. Created on first use,
+        # because on Python 3.8/3.9 an Event binds to the loop current when
+        # it is created, and the server runs on a loop started after import.
+        self._new_order_event: Optional[asyncio.Event] = None
+        
+        # One matcher task per symbol, woken by its event when an order for
+        # that symbol is queued on the symbol's match event stream. Idle
+        # matchers exit; the last stream id each one read is kept so the next
+        # matcher for the symbol resumes where it stopped.
+        self.symbol_matchers: Dict[str, asyncio.Task] = {}
+        self.symbol_events: Dict[str, asyncio.Event] = {}
+        self.symbol_stream_ids: Dict[str, str] = {}
+        
+        # Held for the length of every match pass on a symbol, so the symbol's
+        # matcher and the fallback sweep never match it concurrently
+        self.symbol_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Set when an order closes outside the matchers (which clean up after
+        # themselves), so the periodic sweep only runs when it has work; starts
+        # set so leftovers from a previous run are swept once
+        self._needs_cleanup = True
+        
+    @property
+    def new_order_event(self) -> asyncio.Event:
+        """Get the new-order event, creating it inside the running loop on first use."""
+        if self._new_order_event is None:
+            self._new_order_event = asyncio.Event()
+        return self._new_order_event
+    
+    def notify_new_order(self):
+        """Wake the background matcher because the books have changed."""
+        self.new_order_event.set()
+        
+    def has_pending(self) -> bool:
+        """Check whether the books changed since the matcher last started a pass."""
+        return self.new_order_event.is_set()
+        
     async def submit_order(self, order: Dict[str, Any]) -> Dict[str, Any]:
         """
         Submit an order to the matching engine.
@@ -60,17 +198,16 @@ class MatchingEngine:
         Returns:
             Updated order with status
         """
-        # Ensure order has required fields
-        required_fields = ['symbol', 'price', 'quantity', 'type', 'account_id']
-        for field in required_fields:
-            if field not in order:
-                order['status'] = 'rejected'
-                order['reject_reason'] = f"Missing required field: {field}"
-                return order
+        # Ensure order has required fields (one set difference)
+        missing = REQUIRED_ORDER_FIELDS.difference(order)
+        if missing:
+            order['status'] = 'rejected'
+            order['reject_reason'] = f"Missing required field: {', '.join(sorted(missing))}"
+            return order
         
         # Generate order ID if not provided
         if 'order_id' not in order:
-            order['order_id'] = f"order-{uuid.uuid4()}"
+            order['order_id'] = new_order_id()
             
         # Ensure ID fields are consistent
         if 'id' not in order:
@@ -83,9 +220,7 @@ class MatchingEngine:
             order['timestamp'] = time.time()
             
         if 'created_at' not in order:
-            order['created_at'] = datetime.fromtimestamp(
-                order['timestamp']
-            ).strftime("%Y-%m-%d %H:%M:%S")
+            order['created_at'] = format_created_at(order['timestamp'])
             
         # Default status is 'open'
         if 'status' not in order:
@@ -93,26 +228,27 @@ class MatchingEngine:
             
         # Initialize filled_quantity to 0
         if 'filled_quantity' not in order:
-            order['filled_quantity'] = '0'
+            order['filled_quantity'] = 0.0
         
         # Ensure internal_match field is properly set
-        if 'internal_match' not in order:
-            # Check if internal field exists and use that value
-            if 'internal' in order:
-                order['internal_match'] = str(order['internal'])
-            else:
-                # Default to 'False' if neither field exists
-                order['internal_match'] = 'False'
-        else:
-            # Ensure internal_match is a string for consistency
-            order['internal_match'] = str(order['internal_match'])
+        _normalize_internal_match(order)
             
+        # Store the side lowercase once so readers compare it directly
+        order['type'] = order['type'].lower()
+        
+        # Keep numeric fields as numbers from here on; they are only turned
+        # into strings at the Redis/JSON boundary
+        order['price'] = float(order['price'])
+        order['quantity'] = float(order['quantity'])
+        order['filled_quantity'] = float(order['filled_quantity'])
+        
         # Check if account can trade
         symbol = order['symbol']
-        price = float(order['price'])
-        quantity = float(order['quantity'])
-        order_type = order['type'].lower()  # buy or sell
+        price = order['price']
+        quantity = order['quantity']
+        order_type = order['type']  # buy or sell
         account_id = order['account_id']
+        order_id = order['order_id']
         
         can_trade, reason = self.account_mgr.can_trade(
             account_id=account_id,
@@ -127,63 +263,166 @@ class MatchingEngine:
             order['reject_reason'] = reason
             return order
         
-        # Store the order in Redis
-        order_json = json.dumps(order)
-        order_key = f"oes:order:{order['order_id']}"
-        self.redis.set(order_key, order_json)
+        # Store the order and its index entries in a single round trip
+        pipe = self.redis.pipeline(transaction=False)
+        self.redis.store_order(order_id, order, pipe=pipe)
         
         # Add to the all orders collection for quick retrieval
-        self.redis.sadd(ORDERS_KEY, order['order_id'])
+        pipe.sadd(ORDERS_KEY, order_id)
         
         # Add to account-specific order index
         account_orders_key = f"oes:account:{account_id}:orders"
-        self.redis.sadd(account_orders_key, order['order_id'])
+        pipe.sadd(account_orders_key, order_id)
         
         # Add to symbol-specific order index
         symbol_orders_key = f"oes:symbol:{symbol}:orders"
-        self.redis.sadd(symbol_orders_key, order['order_id'])
+        pipe.sadd(symbol_orders_key, order_id)
+        pipe.sadd(SYMBOLS_KEY, symbol)
         
-        # Try to match orders immediately
-        trades = await self.match_orders(symbol)
+        # Rest the order in the price-ordered book used for matching
+        self.redis.add_to_price_book(order, pipe=pipe)
         
-        # If order was matched completely, update its status
-        if trades:
-            for trade in trades:
-                if trade['buy_order_id'] == order['order_id'] and float(trade['buy_quantity']) == quantity:
-                    order['status'] = 'filled'
-                    self.update_order_status(order['order_id'], 'filled')
-                    
-                if trade['sell_order_id'] == order['order_id'] and float(trade['sell_quantity']) == quantity:
-                    order['status'] = 'filled'
-                    self.update_order_status(order['order_id'], 'filled')
+        # Queue a match event for the symbol's matcher
+        event_key, event_fields = match_event(symbol, order_id)
+        pipe.xadd(event_key, event_fields, maxlen=MATCH_EVENTS_MAXLEN, approximate=True)
+        
+        pipe.execute()
+        
+        # Let the background matcher know there is new work
+        self.notify_new_order()
+        
+        # Matching happens on the symbol's matcher; fills reach the client
+        # through the order update notifications
+        self.wake_matcher(symbol)
                     
         return order
     
+    def request_match(self, symbol: str, order_id: str) -> None:
+        """
+        Queue a match event for a symbol and wake its matcher.
+        
+        Args:
+            symbol: Trading symbol whose book changed
+            order_id: Order that caused the change
+        """
+        event_key, event_fields = match_event(symbol, order_id)
+        self.redis.xadd(event_key, event_fields, maxlen=MATCH_EVENTS_MAXLEN, approximate=True)
+        self.wake_matcher(symbol)
+    
+    def wake_matcher(self, symbol: str) -> None:
+        """Wake the matcher for a symbol, starting it on first use."""
+        # Sharded symbols are matched by their worker process
+        if MATCH_SHARDS > 0:
+            return
+        
+        event = self.symbol_events.get(symbol)
+        if event is None:
+            event = asyncio.Event()
+            self.symbol_events[symbol] = event
+        
+        task = self.symbol_matchers.get(symbol)
+        if task is None or task.done():
+            self.symbol_matchers[symbol] = asyncio.create_task(self._matcher_loop(symbol))
+        
+        event.set()
+    
+    async def _matcher_loop(self, symbol: str):
+        """
+        Dedicated matcher for one symbol.
+        
+        Drains the symbol's match event stream in batches and runs one match
+        pass per batch, so a burst of submissions costs a single pass. The
+        Redis calls run through offload so the event loop keeps serving, and
+        a matcher that times out with no events exits until the next
+        submission for its symbol starts a new one.
+        
+        Args:
+            symbol: Trading symbol to match
+        """
+        stream_key = MATCH_EVENTS_KEY.format(symbol=symbol)
+        wake = self.symbol_events[symbol]
+        
+        while True:
+            try:
+                # The symbol's first matcher in this process covers whatever
+                # is already queued with one pass and reads on from the tail,
+                # instead of replaying earlier runs' events (the tail is read
+                # first so nothing added during the pass is skipped)
+                if symbol not in self.symbol_stream_ids:
+                    self.symbol_stream_ids[symbol] = await self.redis.offload(self.redis.last_stream_id, stream_key)
+                    await self.match_orders(symbol)
+                
+                # Sleep until a local submission wakes us; the timeout picks
+                # up events queued by other workers
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=MATCHER_IDLE_TIMEOUT)
+                    woken = True
+                except asyncio.TimeoutError:
+                    woken = False
+                wake.clear()
+                
+                matched = False
+                while True:
+                    last_id = self.symbol_stream_ids[symbol]
+                    response = await self.redis.offload(
+                        self.redis.xread, {stream_key: last_id}, count=MATCH_EVENT_BATCH
+                    )
+                    if not response:
+                        break
+                    
+                    events = response[0][1]
+                    self.symbol_stream_ids[symbol] = events[-1][0]
+                    matched = True
+                    await self.match_orders(symbol)
+                    
+                    # A short batch means the stream is drained
+                    if len(events) < MATCH_EVENT_BATCH:
+                        break
+                
+                # Nothing arrived for a whole idle period: stop, unless a
+                # submission woke us while the stream was being read (there
+                # is no await between this check and the return)
+                if not woken and not matched and not wake.is_set():
+                    self.symbol_matchers.pop(symbol, None)
+                    return
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in matcher for {symbol}: {e}")
+                await asyncio.sleep(0.1)
+    
+    async def stop_matchers(self):
+        """Cancel every per-symbol matcher task."""
+        tasks = list(self.symbol_matchers.values())
+        self.symbol_matchers.clear()
+        
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
     def update_order_status(self, order_id: str, status: str) -> bool:
         """Update an order's status in Redis."""
         if not order_id:
             return False
             
-        order_key = f"oes:order:{order_id}"
-        order_json = self.redis.get(order_key)
-        
-        if not order_json:
-            return False
-            
-        order = json.loads(order_json)
-        order['status'] = status
-        
-        # Ensure both id fields exist for compatibility
-        if 'order_id' not in order and 'id' in order:
-            order['order_id'] = order['id']
-        if 'id' not in order and 'order_id' in order:
-            order['id'] = order['order_id']
+        # Only the changed fields are written, in a single HSET
+        fields = {'status': status}
         
         if status == 'filled' or status == 'cancelled':
-            order['closed_at'] = datetime.now().isoformat()
+            fields['closed_at'] = datetime.now().isoformat()
+            self._needs_cleanup = True
             
-        self.redis.set(order_key, json.dumps(order))
-        return True
+        # The existence check and the write happen in one script call, so a
+        # missing order is never written (and no other reader sees a partial
+        # hash appear)
+        return self.redis.update_order_status_lua(order_id, fields)
+    
+    def _symbol_lock(self, symbol: str) -> asyncio.Lock:
+        """Get the lock held while a symbol is being matched."""
+        lock = self.symbol_locks.get(symbol)
+        if lock is None:
+            lock = self.symbol_locks[symbol] = asyncio.Lock()
+        return lock
     
     async def match_orders(self, symbol: str) -> List[Dict[str, Any]]:
         """
@@ -198,281 +437,159 @@ class MatchingEngine:
         Returns:
             List of executed trades
         """
-        # Execute order matching using Lua script in Redis
-        try:
-            # First, clean up any filled orders that might still be in the lists
-            await self.force_cleanup_filled_orders()
-            
-            # Call the Lua script to match orders atomically
-            trades = self.redis.match_orders_lua(symbol)
+        # One pass at a time per symbol, shared with the fallback sweep
+        async with self._symbol_lock(symbol):
+            # Execute order matching using Lua script in Redis
+            try:
+                # Call the Lua script to match orders atomically
+                trades = await self.redis.offload(self.redis.match_orders_lua, symbol)
+                
+                if trades:
+                    logger.debug("Matched %d trades for %s using Lua script", len(trades), symbol)
+            except Exception as e:
+                logger.error(f"Error matching orders via Lua script: {e}")
+                # Fall back to Python implementation
+                logger.info(f"Falling back to Python matching implementation for {symbol}")
+                trades = await self._match_orders_python(symbol)
             
             if trades:
-                # Log the trades
-                logger.info(f"Successfully matched {len(trades)} trades for {symbol} using Lua script")
-                
-                # Forcefully clean DOM (Document Object Model) / order book immediately
-                filled_buy_order_ids = []
-                filled_sell_order_ids = []
-                affected_symbols = set([symbol])
-                affected_accounts = set()
-                
-                # Process each trade
-                for trade in trades:
-                    # Extract trade details
-                    buy_account_id = trade.get('buy_account_id')
-                    sell_account_id = trade.get('sell_account_id')
-                    trade_quantity = float(trade.get('buy_quantity', trade.get('quantity', 0)))
-                    trade_price = float(trade.get('price'))
-                    buy_order_id = trade.get('buy_order_id', trade.get('id', None))
-                    sell_order_id = trade.get('sell_order_id', trade.get('id', None))
-                    
-                    # Add to affected accounts
-                    if buy_account_id:
-                        affected_accounts.add(buy_account_id)
-                    if sell_account_id:
-                        affected_accounts.add(sell_account_id)
-                    
-                    # Track filled order IDs
-                    if buy_order_id:
-                        filled_buy_order_ids.append(buy_order_id)
-                    if sell_order_id:
-                        filled_sell_order_ids.append(sell_order_id)
-                    
-                    # Update account balances
-                    if buy_account_id and sell_account_id:
-                        self.account_mgr.update_after_trade(
-                            buy_account_id=buy_account_id,
-                            sell_account_id=sell_account_id,
-                            symbol=symbol,
-                            quantity=trade_quantity,
-                            price=trade_price
-                        )
-                    
-                    # Forcefully mark orders as filled and remove from all collections
-                    if buy_order_id:
-                        # Update order status in Redis
-                        buy_order = self.get_order(buy_order_id)
-                        if buy_order:
-                            buy_order['status'] = 'filled'
-                            buy_order['filled_quantity'] = buy_order['quantity']
-                            buy_order['closed_at'] = datetime.now().isoformat()
-                            order_key = f"oes:order:{buy_order_id}"
-                            self.redis.set(order_key, json.dumps(buy_order))
-                            
-                        # Immediately remove from all collections
-                        self.redis.srem(ORDERS_KEY, buy_order_id)
-                        self.redis.srem(f"oes:symbol:{symbol}:orders", buy_order_id)
-                        if buy_account_id:
-                            self.redis.srem(f"oes:account:{buy_account_id}:orders", buy_order_id)
-                        
-                        logger.info(f"Forcefully removed filled buy order {buy_order_id} from all collections")
-                    
-                    if sell_order_id:
-                        # Update order status in Redis
-                        sell_order = self.get_order(sell_order_id)
-                        if sell_order:
-                            sell_order['status'] = 'filled'
-                            sell_order['filled_quantity'] = sell_order['quantity']
-                            sell_order['closed_at'] = datetime.now().isoformat()
-                            order_key = f"oes:order:{sell_order_id}"
-                            self.redis.set(order_key, json.dumps(sell_order))
-                            
-                        # Immediately remove from all collections
-                        self.redis.srem(ORDERS_KEY, sell_order_id)
-                        self.redis.srem(f"oes:symbol:{symbol}:orders", sell_order_id)
-                        if sell_account_id:
-                            self.redis.srem(f"oes:account:{sell_account_id}:orders", sell_order_id)
-                            
-                        logger.info(f"Forcefully removed filled sell order {sell_order_id} from all collections")
-                    
-                    # Create a single notification for the trade
-                    trade_notification = {
-                        'type': 'trade_executed',
-                        'message': f"Order matched! {trade_quantity} {symbol} @ ${trade_price}",
-                        'trade_id': trade.get('id', trade.get('trade_id', str(uuid.uuid4()))),
-                        'timestamp': time.time(),
-                        'symbol': symbol,
-                        'price': trade_price,
-                        'quantity': trade_quantity,
-                        'buy_account_id': buy_account_id,
-                        'sell_account_id': sell_account_id,
-                        'toast': {  # Include toast data in the trade notification
-                            'title': 'Order Matched',
-                            'message': f"Order matched! {trade_quantity} {symbol} @ ${trade_price}",
-                            'variant': 'success',
-                            'duration': 5000
-                        }
-                    }
-                    
-                    # Publish to main notifications channel only
-                    await self.redis.publish_notification(trade_notification, channel="oes:notifications")
-                    
-                    # Store in account-specific channels without creating new notifications
-                    if buy_account_id:
-                        await self.redis.publish_notification(trade_notification, channel=f"oes:account:{buy_account_id}:notifications")
-                    if sell_account_id:
-                        await self.redis.publish_notification(trade_notification, channel=f"oes:account:{sell_account_id}:notifications")
-                
-                # Publish order book updates for affected symbols
-                for affected_symbol in affected_symbols:
-                    self.redis.publish("oes:orderbook_updates", json.dumps({
-                        "symbol": affected_symbol,
-                        "timestamp": time.time(),
-                        "type": "refresh"
-                    }))
-                
-                # Publish account updates for affected accounts
-                for account_id in affected_accounts:
-                    self.redis.publish(f"oes:account:{account_id}:updates", json.dumps({
-                        "type": "orders_updated",
-                        "timestamp": time.time()
-                    }))
-                
-                # Ensure order list is refreshed globally
-                self.redis.publish("oes:updates", json.dumps({
-                    "type": "orders_updated",
-                    "timestamp": time.time()
-                }))
+                # Either matcher has already written the order updates, removed
+                # filled orders from every index and published the trade
+                # notifications; only account balances remain, and they are
+                # settled in one round trip
+                await self.redis.offload(self.account_mgr.settle_trades, [
+                    trade for trade in trades
+                    if trade.get('buy_account_id') and trade.get('sell_account_id')
+                ])
             
             return trades
-        except Exception as e:
-            logger.error(f"Error matching orders via Lua script: {e}")
-            # Fall back to Python implementation
-            logger.info(f"Falling back to Python matching implementation for {symbol}")
-            return await self._match_orders_python(symbol)
     
     async def _match_orders_python(self, symbol: str) -> List[Dict[str, Any]]:
         """Match orders for a given symbol using Python implementation."""
-        logger.info(f"Using Python fallback to match orders for {symbol}")
+        logger.debug("Using Python fallback to match orders for %s", symbol)
         trades = []
         
         try:
-            # Get all orders for the symbol
-            buy_orders, sell_orders = await self._get_orders_for_symbol(symbol)
+            # Get the open orders for the symbol grouped by price level
+            buy_side, sell_side = await self._get_orders_for_symbol(symbol)
+            
+            # Nothing can trade unless the best bid reaches the best ask
+            if not buy_side.levels or not sell_side.levels:
+                return trades
+            if buy_side.best_price() < sell_side.best_price():
+                return trades
+            
+            # Walk both sides in price-time priority; no re-sort needed
+            buy_orders = list(buy_side)
+            sell_orders = list(sell_side)
             
-            # If either buy_orders or sell_orders is empty, return empty trades list
-            if not buy_orders or not sell_orders:
+            # Work out the matches in the (Numba-compiled when available) kernel
+            matches = plan_matches(buy_orders, sell_orders)
+            if not matches:
                 return trades
             
-            # Sort buy orders by price (desc) and time (asc)
-            buy_orders.sort(key=lambda x: (-float(x['price']), float(x['timestamp'])))
+            # Account channels without subscribers are not worth publishing to
+            account_channels = set()
+            for buy_index, sell_index, _, _ in matches:
+                account_channels.add(f"oes:account:{buy_orders[buy_index]['account_id']}:notifications")
+                account_channels.add(f"oes:account:{sell_orders[sell_index]['account_id']}:notifications")
+            listened_channels = self.redis.channels_with_subscribers(list(account_channels))
             
-            # Sort sell orders by price (asc) and time (asc)
-            sell_orders.sort(key=lambda x: (float(x['price']), float(x['timestamp'])))
+            # Everything in this pass closes and trades at the same moment
+            batch_ts = time.time()
+            batch_close_at = datetime.fromtimestamp(batch_ts).isoformat()
             
-            # Iterate through buy and sell orders to find matches
-            for buy_order in buy_orders:
-                # Skip if buy order is already filled
-                if buy_order['status'] == 'filled':
-                    continue
-                
+            # Apply the order updates in a single round trip
+            pipe = self.redis.pipeline(transaction=False)
+            
+            for buy_index, sell_index, match_quantity, trade_price in matches:
+                buy_order = buy_orders[buy_index]
+                sell_order = sell_orders[sell_index]
                 buy_account = buy_order['account_id']
-                buy_quantity = float(buy_order['quantity'])
-                buy_filled = float(buy_order['filled_quantity'])
-                buy_remaining = buy_quantity - buy_filled
+                sell_account = sell_order['account_id']
                 
-                for sell_order in sell_orders:
-                    # Skip if sell order is already filled
-                    if sell_order['status'] == 'filled':
-                        continue
-                    
-                    # Skip if sell order belongs to the same account (prevent self-trading)
-                    sell_account = sell_order['account_id']
-                    if buy_account == sell_account:
-                        continue
-                    
-                    sell_quantity = float(sell_order['quantity'])
-                    sell_filled = float(sell_order['filled_quantity'])
-                    sell_remaining = sell_quantity - sell_filled
-                    
-                    # Check if prices are compatible
-                    buy_price = float(buy_order['price'])
-                    sell_price = float(sell_order['price'])
-                    
-                    if buy_price < sell_price:
-                        break  # No more matches possible
-                    
-                    # Match orders
-                    match_quantity = min(buy_remaining, sell_remaining)
-                    trade_price = sell_price  # Use the earlier order's price
-                    
-                    if buy_order['timestamp'] < sell_order['timestamp']:
-                        trade_price = buy_price
-                    
-                    # Update filled quantities
-                    new_buy_filled = buy_filled + match_quantity
-                    new_sell_filled = sell_filled + match_quantity
-                    
-                    buy_status = 'filled' if new_buy_filled >= buy_quantity else 'partially_filled'
-                    sell_status = 'filled' if new_sell_filled >= sell_quantity else 'partially_filled'
-                    
-                    # Update orders in Redis
-                    await self.redis.update_order_field(buy_order['order_id'], 'filled_quantity', str(new_buy_filled))
-                    await self.redis.update_order_field(buy_order['order_id'], 'status', buy_status)
-                    await self.redis.update_order_field(sell_order['order_id'], 'filled_quantity', str(new_sell_filled))
-                    await self.redis.update_order_field(sell_order['order_id'], 'status', sell_status)
-                    
-                    # Create and record the trade
-                    trade = {
-                        'trade_id': str(uuid.uuid4()),
-                        'symbol': symbol,
-                        'buy_order_id': buy_order['order_id'],
-                        'sell_order_id': sell_order['order_id'],
-                        'buy_account_id': buy_account,
-                        'sell_account_id': sell_account,
-                        'price': str(trade_price),
-                        'quantity': str(match_quantity),
-                        'timestamp': str(time.time())
-                    }
-                    
-                    # Record the trade in Redis
-                    await self.redis.record_trade(trade)
-                    trades.append(trade)
+                # Update filled quantities
+                new_buy_filled = buy_order['filled_quantity'] + match_quantity
+                new_sell_filled = sell_order['filled_quantity'] + match_quantity
+                
+                buy_status = 'filled' if new_buy_filled >= buy_order['quantity'] else 'partially_filled'
+                sell_status = 'filled' if new_sell_filled >= sell_order['quantity'] else 'partially_filled'
+                
+                buy_order['status'] = buy_status
+                buy_order['filled_quantity'] = new_buy_filled
+                sell_order['status'] = sell_status
+                sell_order['filled_quantity'] = new_sell_filled
+                
+                # Update orders in Redis
+                for order in (buy_order, sell_order):
+                    fields = {'status': order['status'], 'filled_quantity': order['filled_quantity']}
+                    if order['status'] == 'filled':
+                        fields['closed_at'] = batch_close_at
+                    pipe.hset(f"oes:order:{order['order_id']}", mapping=encode_order(fields))
                     
-                    # Create a single notification for the trade
-                    trade_notification = {
-                        'type': 'trade_executed',
+                    # Remove filled orders from every order list and the price
+                    # book on the same pipeline, as the Lua matcher does
+                    if order['status'] == 'filled':
+                        pipe.srem(ORDERS_KEY, order['order_id'])
+                        pipe.srem(ACTIVE_ORDERS_KEY, order['order_id'])
+                        pipe.srem(f"oes:account:{order['account_id']}:orders", order['order_id'])
+                        pipe.srem(f"oes:symbol:{symbol}:orders", order['order_id'])
+                        pipe.zrem(price_book_key(symbol, order['type']), order['order_id'])
+                
+                # Create and record the trade
+                trade = {
+                    'trade_id': str(uuid.uuid4()),
+                    'symbol': symbol,
+                    'buy_order_id': buy_order['order_id'],
+                    'sell_order_id': sell_order['order_id'],
+                    'buy_account_id': buy_account,
+                    'sell_account_id': sell_account,
+                    'price': trade_price,
+                    'quantity': match_quantity,
+                    'timestamp': batch_ts,
+                    # Resulting order states, as the Lua matcher returns them
+                    'buy_status': buy_status,
+                    'sell_status': sell_status,
+                    'buy_filled_quantity': new_buy_filled,
+                    'sell_filled_quantity': new_sell_filled
+                }
+                
+                # Record the trade in Redis
+                await self.redis.record_trade(trade)
+                trades.append(trade)
+                
+                # Create a single notification for the trade
+                trade_notification = {
+                    'type': 'trade_executed',
+                    'message': f"Order matched! {match_quantity} {symbol} @ ${trade_price}",
+                    'trade_id': trade['trade_id'],
+                    'timestamp': batch_ts,
+                    'symbol': symbol,
+                    'price': trade_price,
+                    'quantity': match_quantity,
+                    'buy_account_id': buy_account,
+                    'sell_account_id': sell_account,
+                    'toast': {  # Include toast data in the trade notification
+                        'title': 'Order Matched',
                         'message': f"Order matched! {match_quantity} {symbol} @ ${trade_price}",
-                        'trade_id': trade['trade_id'],
-                        'timestamp': time.time(),
-                        'symbol': symbol,
-                        'price': trade_price,
-                        'quantity': match_quantity,
-                        'buy_account_id': buy_account,
-                        'sell_account_id': sell_account,
-                        'toast': {  # Include toast data in the trade notification
-                            'title': 'Order Matched',
-                            'message': f"Order matched! {match_quantity} {symbol} @ ${trade_price}",
-                            'variant': 'success',
-                            'duration': 5000
-                        }
+                        'variant': 'success',
+                        'duration': 5000
                     }
-                    
-                    # Publish to main notifications channel only
-                    await self.redis.publish_notification(trade_notification, channel="oes:notifications")
-                    
-                    # Store in account-specific channels without creating new notifications
-                    if buy_account:
-                        await self.redis.publish_notification(trade_notification, channel=f"oes:account:{buy_account}:notifications")
-                    if sell_account:
-                        await self.redis.publish_notification(trade_notification, channel=f"oes:account:{sell_account}:notifications")
-                    
-                    # Remove filled orders from the order lists
-                    if buy_status == 'filled':
-                        await self.redis.srem(f"oes:symbol:{symbol}:orders", buy_order['order_id'])
-                    
-                    if sell_status == 'filled':
-                        await self.redis.srem(f"oes:symbol:{symbol}:orders", sell_order['order_id'])
-                    
-                    # Update buy order for next iteration
-                    buy_filled = new_buy_filled
-                    buy_remaining = buy_quantity - buy_filled
-                    buy_order['status'] = buy_status
-                    buy_order['filled_quantity'] = str(new_buy_filled)
-                    
-                    # If buy order is filled, move to the next buy order
-                    if buy_status == 'filled':
-                        break
+                }
+                
+                # Serialize once; the publishes ride the same pipeline
+                notification_json = _dumps(trade_notification)
+                
+                # Publish to main notifications channel only
+                pipe.publish("oes:notifications", notification_json)
+                
+                # Store in account-specific channels without creating new notifications
+                for account in (buy_account, sell_account):
+                    account_channel = f"oes:account:{account}:notifications"
+                    if account and account_channel in listened_channels:
+                        pipe.publish(account_channel, notification_json)
+            
+            pipe.execute()
         
         except Exception as e:
             logger.error(f"Python matching error for {symbol}: {str(e)}")
@@ -499,13 +616,9 @@ class MatchingEngine:
             logger.info(f"No orders found for account {account_id}")
             return []
         
-        # Retrieve each order
-        for order_id in order_ids:
-            order_key = f"oes:order:{order_id}"
-            order_json = self.redis.get(order_key)
-            
-            if order_json:
-                order = json.loads(order_json)
+        # Retrieve all orders in a single round trip
+        for order in self.redis.load_orders(list(order_ids)):
+            if order:
                 orders.append(order)
         
         # Sort by timestamp (newest first)
@@ -527,36 +640,35 @@ class MatchingEngine:
             return None
             
         try:
-            order_key = f"oes:order:{order_id}"
-            order_json = self.redis.get(order_key)
-            if not order_json:
+            order_data = self.redis.load_order(order_id)
+            if not order_data:
                 return None
             
-            order_data = json.loads(order_json)
-            
-            # Ensure both id fields exist for compatibility
-            if 'order_id' not in order_data and 'id' in order_data:
-                order_data['order_id'] = order_data['id']
-            if 'id' not in order_data and 'order_id' in order_data:
-                order_data['id'] = order_data['order_id']
-            
-            # Ensure internal_match field is properly set
-            if 'internal_match' not in order_data:
-                # Check if internal field exists and use that value
-                if 'internal' in order_data:
-                    order_data['internal_match'] = str(order_data['internal'])
-                else:
-                    # Default to 'False' if neither field exists
-                    order_data['internal_match'] = 'False'
-            else:
-                # Ensure internal_match is a string for consistency
-                order_data['internal_match'] = str(order_data['internal_match'])
-                
-            return order_data
+            return self._normalize_order(order_data)
         except Exception as e:
             logger.error(f"Error getting order {order_id}: {str(e)}")
             return None
     
+    def _normalize_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in compatibility fields on a stored order.
+        
+        Args:
+            order_data: The order read from oes:order:{id}
+            
+        Returns:
+            The order data
+        """
+        # Ensure both id fields exist for compatibility
+        if 'order_id' not in order_data and 'id' in order_data:
+            order_data['order_id'] = order_data['id']
+        if 'id' not in order_data and 'order_id' in order_data:
+            order_data['id'] = order_data['order_id']
+        
+        # Ensure internal_match field is properly set
+        _normalize_internal_match(order_data)
+            
+        return order_data
+    
     def cancel_order(self, order_id: str, account_id: str) -> Tuple[bool, str]:
         """
         Cancel an open order.
@@ -568,26 +680,24 @@ class MatchingEngine:
         Returns:
             Tuple of (success, message)
         """
-        order = self.get_order(order_id)
+        # Check ownership and status, mark the order cancelled and take it out
+        # of the matching book in one atomic call, so a match pass cannot
+        # fill it in between
+        outcome, status = self.redis.cancel_order_lua(order_id, account_id, datetime.now().isoformat())
         
-        if not order:
+        if outcome == "missing":
             return False, "Order not found"
             
         # Verify the order belongs to the account
-        if order['account_id'] != account_id:
+        if outcome == "unauthorized":
             return False, "Not authorized to cancel this order"
             
         # Check if the order is already closed
-        if order['status'] != 'open':
-            return False, f"Order cannot be cancelled - status is {order['status']}"
-            
-        # Update the order status
-        order['status'] = 'cancelled'
-        order['cancelled_at'] = datetime.now().isoformat()
+        if outcome == "closed":
+            return False, f"Order cannot be cancelled - status is {status}"
         
-        # Save the updated order
-        order_key = f"oes:order:{order_id}"
-        self.redis.set(order_key, json.dumps(order))
+        # The sweep drops it from the order lists
+        self._needs_cleanup = True
         
         return True, "Order cancelled successfully"
     
@@ -630,76 +740,42 @@ class MatchingEngine:
                 logger.info(f"No changes detected for order {order_id}")
                 return order
             
-            # Update the allowed fields
+            # Only the edited fields are written; status and filled quantity
+            # belong to the matchers
+            fields = {}
             for field in ['price', 'quantity']:
                 if field in updated_data:
-                    order[field] = str(updated_data[field])  # Convert to string for consistency
+                    fields[field] = float(updated_data[field])
             
             # Add metadata about the edit
-            order['edited'] = True
-            order['last_edited_at'] = datetime.now().isoformat()
+            fields['edited'] = True
+            fields['last_edited_at'] = datetime.now().isoformat()
             
-            # First check if internal_match was passed in updated_data
+            # An internal_match passed in updated_data takes precedence
             if 'internal_match' in updated_data:
-                order['internal_match'] = str(updated_data['internal_match'])
-            # Then check if internal_match already exists in order
-            elif 'internal_match' not in order:
-                # Check if internal field exists and use that value
-                if 'internal' in order:
-                    order['internal_match'] = str(order['internal'])
-                else:
-                    # Default to 'False' if neither field exists (as a string)
-                    order['internal_match'] = 'False'
-            else:
-                # Ensure internal_match is a string for consistency
-                order['internal_match'] = str(order['internal_match'])
-                
-            # If price changed, we need to update the order book
-            if price_changed:
-                # First remove the order from the order book
-                symbol = order.get('symbol')
-                order_type = order.get('type', '').lower()
-                is_internal = order.get('internal_match') == 'True'
-                
-                # Determine the book key
-                if order_type == 'buy':
-                    book_key = INTERNAL_BUY_ORDERS_KEY if is_internal else BUY_ORDERS_KEY
-                else:
-                    book_key = INTERNAL_SELL_ORDERS_KEY if is_internal else SELL_ORDERS_KEY
-                
-                # Try to remove old order from the book
-                result = await self.redis.remove_order_from_book(order_id)
-                logger.info(f"Removed order {order_id} from book: {result}")
-            
-            # Save the updated order
-            order_key = f"oes:order:{order_id}"
-            logger.info(f"Saving updated order to Redis key: {order_key}")
-            self.redis.set(order_key, json.dumps(order))
+                order['internal_match'] = updated_data['internal_match']
+            _normalize_internal_match(order)
+            fields['internal_match'] = order['internal_match']
             
-            # Make sure the order is in the correct collections
+            order.update(fields)
             symbol = order.get('symbol')
             account_id = order.get('account_id')
             
-            # Add to global orders
-            self.redis.sadd(ORDERS_KEY, order_id)
-            
-            # Add to symbol orders
-            if symbol:
-                symbol_key = f"oes:symbol:{symbol}:orders"
-                self.redis.sadd(symbol_key, order_id)
-            
-            # Add to account orders
-            if account_id:
-                account_key = f"oes:account:{account_id}:orders"
-                self.redis.sadd(account_key, order_id)
+            # Check the order is still open, write the edit and re-score it in
+            # the matching book in one atomic call, so a fill landing after
+            # the read above is never overwritten
+            score = price_book_score(order) if price_changed else None
+            outcome, status, filled_quantity = await self.redis.offload(
+                self.redis.edit_order_lua, order_id, fields, score
+            )
+            if outcome != "edited":
+                logger.warning(f"Cannot edit order {order_id}: {outcome} (status '{status}')")
+                return None
+            order['status'] = status
+            order['filled_quantity'] = filled_quantity
             
-            # If price changed, add back to the order book
+            # Notify subscribers when the price moved
             if price_changed and symbol:
-                # Add it back to the book with the new price
-                await self.redis.add_order_to_book(order)
-                logger.info(f"Added order {order_id} back to the order book with updated price")
-                
-                # Notify subscribers of the update
                 await self.redis.publish_notification({
                     'type': 'order_updated',
                     'order_id': order_id,
@@ -709,13 +785,15 @@ class MatchingEngine:
                     'account_id': account_id
                 })
             
+            # Let the background matcher know the book changed
+            self.notify_new_order()
+            
             logger.info(f"Order {order_id} edited: price={original_price}->{order['price']}, quantity={original_quantity}->{order['quantity']}, internal_match={order['internal_match']}")
             
-            # Try to match orders after editing
+            # Hand the edited order to the symbol's matcher
             if symbol:
                 logger.info(f"Attempting to match orders for symbol {symbol}")
-                # This should be run as a separate task to prevent blocking
-                asyncio.create_task(self.match_orders(symbol))
+                self.request_match(symbol, order_id)
             
             return order
         except Exception as e:
@@ -733,89 +811,78 @@ class MatchingEngine:
         # We'll delegate to match_all_symbols for a more robust implementation
         return await self.match_all_symbols()
     
-    async def match_all_symbols(self) -> List[Dict[str, Any]]:
+    async def match_all_symbols(self, symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Match orders across all symbols.
         This is an alias for auto_match_orders for compatibility with existing code.
         
+        Args:
+            symbols: Only match these symbols (default: every registered symbol)
+        
         Returns:
             List of all executed trades
         """
         all_trades = []
         try:
-            # Get all unique symbols
-            symbol_pattern = "oes:symbol:*:orders"
-            symbol_keys = self.redis.keys(symbol_pattern)
-            
-            for symbol_key in symbol_keys:
-                # Extract symbol from key pattern
-                symbol = symbol_key.split(":")[2]
-                
-                try:
-                    # First attempt to use Lua script
-                    trades = self.redis.match_orders_lua(symbol)
-                    
-                    if trades:
-                        # Log the trades
-                        logger.info(f"Successfully matched {len(trades)} trades for {symbol} using Lua script")
-                        
-                        # Process each trade
-                        for trade in trades:
-                            # Extract trade details
-                            buy_account_id = trade['buy_account_id']
-                            sell_account_id = trade['sell_account_id']
-                            trade_quantity = float(trade.get('buy_quantity', trade.get('quantity', 0)))
-                            trade_price = float(trade['price'])
-                            buy_order_id = trade.get('buy_order_id', trade.get('id', None))
-                            sell_order_id = trade.get('sell_order_id', trade.get('id', None))
-                            
-                            # Update account balances
-                            self.account_mgr.update_after_trade(
-                                buy_account_id=buy_account_id,
-                                sell_account_id=sell_account_id,
-                                symbol=symbol,
-                                quantity=trade_quantity,
-                                price=trade_price
-                            )
-                            
-                            # Get order statuses to check if they're filled
-                            buy_order = self.get_order(buy_order_id) if buy_order_id else None
-                            sell_order = self.get_order(sell_order_id) if sell_order_id else None
-                            
-                            # If an order is filled, remove it from the orders collections
-                            if buy_order and buy_order.get('status') == 'filled':
-                                # Remove from global ORDERS_KEY
-                                self.redis.srem(ORDERS_KEY, buy_order_id)
-                                # Remove from account-specific orders list
-                                self.redis.srem(f"oes:account:{buy_account_id}:orders", buy_order_id)
-                                # Remove from symbol-specific orders list (already done in Lua script but double-check)
-                                self.redis.srem(f"oes:symbol:{symbol}:orders", buy_order_id)
-                                logger.info(f"Removed filled buy order {buy_order_id} from orders lists")
-                                
-                            if sell_order and sell_order.get('status') == 'filled':
-                                # Remove from global ORDERS_KEY
-                                self.redis.srem(ORDERS_KEY, sell_order_id)
-                                # Remove from account-specific orders list
-                                self.redis.srem(f"oes:account:{sell_account_id}:orders", sell_order_id)
-                                # Remove from symbol-specific orders list (already done in Lua script but double-check)
-                                self.redis.srem(f"oes:symbol:{symbol}:orders", sell_order_id)
-                                logger.info(f"Removed filled sell order {sell_order_id} from orders lists")
-                            
-                        all_trades.extend(trades)
-                except Exception as e:
-                    logger.error(f"Lua script failed for symbol {symbol}: {e}")
-                    
-                    # Fall back to Python implementation
-                    logger.info(f"Falling back to Python implementation for {symbol}")
-                    python_trades = await self._match_orders_python(symbol)
-                    all_trades.extend(python_trades)
-                    
-                    if python_trades:
-                        logger.info(f"Successfully matched {len(python_trades)} trades for {symbol} using Python fallback")
+            # Get all unique symbols from the registry (never KEYS) and only
+            # run the matcher where the top of the book crosses
+            if symbols is None:
+                symbols = list(await self.redis.offload(self.redis.symbols))
+            crossed = await self.redis.offload(self.redis.crossed_symbols, symbols)
+            
+            # Symbols are independent, so their matchers run concurrently
+            results = await asyncio.gather(*(self._match_symbol(symbol) for symbol in crossed))
+            for lua_trades, python_trades in results:
+                all_trades.extend(lua_trades)
+                all_trades.extend(python_trades)
+            
+            # Update account balances for every symbol's trades, from either
+            # matcher, in one round trip
+            if all_trades:
+                await self.redis.offload(self.account_mgr.settle_trades, all_trades)
         except Exception as e:
             logger.error(f"Error in match_all_symbols: {e}")
             
         return all_trades
+
+    async def _match_symbol(self, symbol: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Run one match pass for a symbol for match_all_symbols.
+        
+        Args:
+            symbol: Trading symbol to match
+            
+        Returns:
+            Tuple of (Lua trades, Python fallback trades); neither is settled
+            yet, match_all_symbols settles both
+        """
+        # One pass at a time per symbol, shared with the symbol's matcher
+        async with self._symbol_lock(symbol):
+            try:
+                # First attempt to use Lua script
+                trades = await self.redis.offload(self.redis.match_orders_lua, symbol)
+                
+                if trades:
+                    # The script returns the resulting order states and has
+                    # already removed filled orders from every order list
+                    filled_orders = sum(
+                        (trade.get('buy_status') == 'filled') + (trade.get('sell_status') == 'filled')
+                        for trade in trades
+                    )
+                    
+                    # One aggregate line per batch instead of one per order
+                    logger.debug("Matched %d trades for %s, %d orders filled", len(trades), symbol, filled_orders)
+                return trades, []
+            except Exception as e:
+                logger.error(f"Lua script failed for symbol {symbol}: {e}")
+                
+                # Fall back to Python implementation
+                logger.info(f"Falling back to Python implementation for {symbol}")
+                python_trades = await self._match_orders_python(symbol)
+                
+                if python_trades:
+                    logger.debug("Matched %d trades for %s using Python fallback", len(python_trades), symbol)
+                return [], python_trades
         
     async def force_cleanup_filled_orders(self):
         """
@@ -823,119 +890,11 @@ class MatchingEngine:
         This is an additional safeguard to ensure the UI stays in sync.
         """
         try:
-            cleaned_count = 0
-            
-            # First pass: Check all symbol pattern keys for filled orders
-            symbol_pattern = "oes:symbol:*:orders"
-            symbol_keys = self.redis.keys(symbol_pattern)
-            
-            for symbol_key in symbol_keys:
-                symbol = symbol_key.split(":")[2]
-                symbol_order_ids = self.redis.smembers(symbol_key)
-                
-                for order_id in symbol_order_ids:
-                    order_key = f"oes:order:{order_id}"
-                    order_json = self.redis.get(order_key)
-                    
-                    if not order_json:
-                        # Remove dangling reference
-                        self.redis.srem(symbol_key, order_id)
-                        logger.info(f"Removed dangling reference to missing order {order_id} from {symbol_key}")
-                        cleaned_count += 1
-                        continue
-                        
-                    try:
-                        order = json.loads(order_json)
-                        
-                        # If order is filled or cancelled, remove from symbol list
-                        if order.get('status') == 'filled' or order.get('status') == 'cancelled':
-                            self.redis.srem(symbol_key, order_id)
-                            logger.info(f"Removed filled/cancelled order {order_id} from symbol list {symbol_key}")
-                            cleaned_count += 1
-                            
-                            # Also remove from main orders list and account list
-                            self.redis.srem(ORDERS_KEY, order_id)
-                            
-                            account_id = order.get('account_id')
-                            if account_id:
-                                self.redis.srem(f"oes:account:{account_id}:orders", order_id)
-                    except Exception as e:
-                        logger.error(f"Error processing order {order_id} in symbol list: {e}")
-                        continue
-            
-            # Second pass: Check all account pattern keys for filled orders
-            account_pattern = "oes:account:*:orders"
-            account_keys = self.redis.keys(account_pattern)
-            
-            for account_key in account_keys:
-                account_id = account_key.split(":")[2]
-                account_order_ids = self.redis.smembers(account_key)
-                
-                for order_id in account_order_ids:
-                    order_key = f"oes:order:{order_id}"
-                    order_json = self.redis.get(order_key)
-                    
-                    if not order_json:
-                        # Remove dangling reference
-                        self.redis.srem(account_key, order_id)
-                        logger.info(f"Removed dangling reference to missing order {order_id} from {account_key}")
-                        cleaned_count += 1
-                        continue
-                        
-                    try:
-                        order = json.loads(order_json)
-                        
-                        # If order is filled or cancelled, remove from account list
-                        if order.get('status') == 'filled' or order.get('status') == 'cancelled':
-                            self.redis.srem(account_key, order_id)
-                            logger.info(f"Removed filled/cancelled order {order_id} from account list {account_key}")
-                            cleaned_count += 1
-                            
-                            # Also remove from main orders list and symbol list
-                            self.redis.srem(ORDERS_KEY, order_id)
-                            
-                            symbol = order.get('symbol')
-                            if symbol:
-                                self.redis.srem(f"oes:symbol:{symbol}:orders", order_id)
-                    except Exception as e:
-                        logger.error(f"Error processing order {order_id} in account list: {e}")
-                        continue
-            
-            # Third pass: Check the main orders list
-            all_order_ids = self.redis.smembers(ORDERS_KEY)
-            if all_order_ids:
-                for order_id in all_order_ids:
-                    order_key = f"oes:order:{order_id}"
-                    order_json = self.redis.get(order_key)
-                    
-                    if not order_json:
-                        # Clean up dangling references
-                        self.redis.srem(ORDERS_KEY, order_id)
-                        logger.info(f"Removed dangling reference to missing order {order_id} from main orders list")
-                        cleaned_count += 1
-                        continue
-                    
-                    try:
-                        order = json.loads(order_json)
-                        
-                        # Double-check if this order is filled or cancelled
-                        if order.get('status') == 'filled' or order.get('status') == 'cancelled':
-                            # Remove from main orders list
-                            self.redis.srem(ORDERS_KEY, order_id)
-                            logger.info(f"Removed filled/cancelled order {order_id} from main orders list")
-                            cleaned_count += 1
-                            
-                            # Also ensure it's removed from symbol and account collections
-                            symbol = order.get('symbol')
-                            if symbol:
-                                self.redis.srem(f"oes:symbol:{symbol}:orders", order_id)
-                            
-                            account_id = order.get('account_id')
-                            if account_id:
-                                self.redis.srem(f"oes:account:{account_id}:orders", order_id)
-                    except Exception as e:
-                        logger.error(f"Error processing order {order_id} in main list: {e}")
-                        continue
+            # The whole sweep normally runs server-side in one script call
+            cleaned_count = await self.redis.offload(self.redis.cleanup_orders_lua)
+            if cleaned_count is None:
+                # Fall back to sweeping from Python if the script failed
+                cleaned_count = await self.redis.offload(self._sweep_all_order_sets)
                     
             if cleaned_count > 0:
                 logger.info(f"Force-cleaned {cleaned_count} filled/cancelled/missing orders from all lists")
@@ -943,39 +902,107 @@ class MatchingEngine:
         except Exception as e:
             logger.error(f"Error in force_cleanup_filled_orders: {e}")
 
-    async def start_auto_matching(self, interval_seconds=0.05):
+    def _sweep_all_order_sets(self) -> int:
+        """
+        Sweep every order set from Python when the cleanup script is unavailable.
+        
+        Returns:
+            Number of entries cleaned
+        """
+        cleaned_count = 0
+        
+        # First pass: Check all symbol pattern keys for filled orders
+        for symbol in self.redis.symbols():
+            cleaned_count += self._sweep_order_set(f"oes:symbol:{symbol}:orders")
+        
+        # Second pass: Check all account pattern keys for filled orders
+        for account_key in self.redis.scan_iter("oes:account:*:orders"):
+            cleaned_count += self._sweep_order_set(account_key)
+        
+        # Third pass: Check the main orders list
+        cleaned_count += self._sweep_order_set(ORDERS_KEY)
+        
+        # Last pass: Drop anything the active-order index still holds
+        cleaned_count += self._sweep_order_set(ACTIVE_ORDERS_KEY)
+        return cleaned_count
+
+    def _sweep_order_set(self, set_key: str) -> int:
+        """
+        Remove filled, cancelled and missing orders referenced by one order set.
+        
+        The states of all referenced orders are read in one pipelined round
+        trip and every removal is flushed on a single pipeline. Closed orders
+        are also removed from the main, active, symbol and account lists and
+        from the price book.
+        
+        Args:
+            set_key: Order id set to sweep
+            
+        Returns:
+            Number of entries cleaned
+        """
+        order_ids = list(self.redis.smembers(set_key))
+        if not order_ids:
+            return 0
+        
+        # Only the fields needed to decide and route the removal are read
+        read_pipe = self.redis.pipeline(transaction=False)
+        for order_id in order_ids:
+            read_pipe.hmget(f"oes:order:{order_id}", 'status', 'symbol', 'account_id')
+        states = read_pipe.execute()
+        
+        pipe = self.redis.pipeline(transaction=False)
+        cleaned = 0
+        
+        for order_id, (status, symbol, account_id) in zip(order_ids, states):
+            if status is None and symbol is None and account_id is None:
+                # Remove dangling reference to a missing order
+                pipe.srem(set_key, order_id)
+                cleaned += 1
+                continue
+            
+            if status == 'filled' or status == 'cancelled':
+                pipe.srem(set_key, order_id)
+                pipe.srem(ORDERS_KEY, order_id)
+                pipe.srem(ACTIVE_ORDERS_KEY, order_id)
+                if symbol:
+                    pipe.srem(f"oes:symbol:{symbol}:orders", order_id)
+                    pipe.zrem(price_book_key(symbol, 'buy'), order_id)
+                    pipe.zrem(price_book_key(symbol, 'sell'), order_id)
+                if account_id:
+                    pipe.srem(f"oes:account:{account_id}:orders", order_id)
+                cleaned += 1
+        
+        if cleaned:
+            pipe.execute()
+        return cleaned
+
+    async def run_periodic_cleanup(self, interval_seconds=CLEANUP_INTERVAL):
         """
-        Start the automatic order matching process.
+        Periodically sweep filled/cancelled orders out of the order indices.
+        
+        Matching removes filled orders in-band, so this is only a safety net
+        and runs off the matching hot path. Ticks where no order was closed
+        outside the matchers are skipped.
         
         Args:
-            interval_seconds: How frequently to run the matching algorithm (default: 0.05s = 50ms)
+            interval_seconds: How often to run the sweep
         """
-        logger.info(f"Starting aggressive automatic order matching service (interval: {interval_seconds}s)")
+        logger.info(f"Starting filled order cleanup (interval: {interval_seconds}s)")
         
         while True:
             try:
-                # First, clean up any filled orders that might still be in the lists
-                await self.force_cleanup_filled_orders()
+                await asyncio.sleep(interval_seconds)
+                if not self._needs_cleanup:
+                    continue
                 
-                # Then try to match new orders
-                trades = await self.auto_match_orders()
-                if trades:
-                    logger.info(f"Auto-matched {len(trades)} trades across all symbols")
-                    
-                    # Force a more aggressive clean-up of filled orders
-                    symbol_pattern = "oes:symbol:*:orders"
-                    symbol_keys = self.redis.keys(symbol_pattern)
-                    
-                    for symbol_key in symbol_keys:
-                        symbol = symbol_key.split(":")[2]
-                        # Update the order book to refresh UI state
-                        self.get_order_book(symbol)
-                        
+                # Clear first so orders closed during the sweep trigger the next one
+                self._needs_cleanup = False
+                await self.force_cleanup_filled_orders()
+            except asyncio.CancelledError:
+                break
             except Exception as e:
-                logger.error(f"Error in auto-matching: {e}")
-                
-            # Very short wait before next matching cycle
-            await asyncio.sleep(interval_seconds)
+                logger.error(f"Error in periodic cleanup: {e}")
 
     def get_order_book(self, symbol: str, depth: int = 10) -> Dict[str, Any]:
         """
@@ -988,53 +1015,71 @@ class MatchingEngine:
         Returns:
             Order book with bids and asks
         """
-        # Get all orders for this symbol
-        symbol_orders_key = f"oes:symbol:{symbol}:orders"
-        order_ids = self.redis.smembers(symbol_orders_key)
-        
-        # Retrieve and categorize orders
-        bids = []
-        asks = []
-        cleaned_orders = 0
+        return self.get_order_books([symbol], depth)[symbol]
+    
+    def get_order_books(self, symbols: List[str], depth: int = 10) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the current order books for several symbols in two round trips.
         
-        for order_id in order_ids:
-            order_key = f"oes:order:{order_id}"
-            order_json = self.redis.get(order_key)
-            
-            if not order_json:
-                # Clean up references to missing orders
-                self.redis.srem(symbol_orders_key, order_id)
-                self.redis.srem(ORDERS_KEY, order_id)
-                cleaned_orders += 1
-                continue
-                
-            order = json.loads(order_json)
+        Args:
+            symbols: Trading symbols
+            depth: Maximum number of price levels to return per side
             
-            # Include all orders regardless of status
-            if order['type'].lower() == 'buy':
-                bids.append(order)
-            else:
-                asks.append(order)
+        Returns:
+            Order book with bids and asks, keyed by symbol
+        """
+        # The price books are already sorted best price first (bid scores are
+        # negated prices), so only the top of each side is read, for every
+        # symbol on one pipeline
+        pipe = self.redis.pipeline(transaction=False)
+        for symbol in symbols:
+            pipe.zrange(price_book_key(symbol, 'buy'), 0, depth - 1)
+            pipe.zrange(price_book_key(symbol, 'sell'), 0, depth - 1)
+        id_lists = pipe.execute()
         
-        # Sort bids by price (highest first)
-        bids.sort(key=lambda x: float(x['price']), reverse=True)
+        # Retrieve every order of every symbol in one round trip
+        all_ids = [order_id for ids in id_lists for order_id in ids]
+        orders = dict(zip(all_ids, self.redis.load_orders(all_ids)))
         
-        # Sort asks by price (lowest first)
-        asks.sort(key=lambda x: float(x['price']))
+        now = time.time()
+        books = {}
+        cleanup = None
         
-        # Limit to specified depth
-        bids = bids[:depth]
-        asks = asks[:depth]
+        for index, symbol in enumerate(symbols):
+            bids = []
+            asks = []
+            missing_ids = []
+            
+            for order_id in id_lists[2 * index] + id_lists[2 * index + 1]:
+                order = orders[order_id]
+                if not order:
+                    missing_ids.append(order_id)
+                elif order['type'] == 'buy':
+                    bids.append(order)
+                else:
+                    asks.append(order)
+            
+            # Queue clean-up of references to missing orders
+            if missing_ids:
+                if cleanup is None:
+                    cleanup = self.redis.pipeline(transaction=False)
+                cleanup.zrem(price_book_key(symbol, 'buy'), *missing_ids)
+                cleanup.zrem(price_book_key(symbol, 'sell'), *missing_ids)
+                cleanup.srem(f"oes:symbol:{symbol}:orders", *missing_ids)
+                cleanup.srem(ORDERS_KEY, *missing_ids)
+                logger.info(f"Cleaned up {len(missing_ids)} missing orders from symbol {symbol} order book")
+            
+            books[symbol] = {
+                'bids': bids,
+                'asks': asks,
+                'symbol': symbol,
+                'timestamp': now
+            }
         
-        if cleaned_orders > 0:
-            logger.info(f"Cleaned up {cleaned_orders} missing orders from symbol {symbol} order book")
+        if cleanup is not None:
+            cleanup.execute()
             
-        return {
-            'bids': bids,
-            'asks': asks,
-            'symbol': symbol,
-            'timestamp': time.time()
-        }
+        return books
         
     def get_all_orders(self) -> List[Dict[str, Any]]:
         """
@@ -1055,23 +1100,17 @@ class MatchingEngine:
             
             # Retrieve each order
             for order_id in all_order_ids:
-                order_key = f"oes:order:{order_id}"
-                order_json = self.redis.get(order_key)
+                order = self.redis.load_order(order_id)
                 
-                if not order_json:
+                if not order:
                     # Order reference exists but actual order doesn't - clean up
                     logger.warning(f"Found reference to order {order_id} in ORDERS_KEY but order doesn't exist, removing reference")
                     self.redis.srem(ORDERS_KEY, order_id)
                     removed_count += 1
                     continue
                     
-                try:
-                    order = json.loads(order_json)
-                    # Include all orders in the results regardless of status
-                    all_orders.append(order)
-                except Exception as e:
-                    logger.error(f"Error parsing order JSON for {order_id}: {e}")
-                    continue
+                # Include all orders in the results regardless of status
+                all_orders.append(order)
                 
             # Sort by timestamp (newest first)
             all_orders.sort(key=lambda x: float(x.get('timestamp', 0)), reverse=True)
@@ -1093,65 +1132,66 @@ class MatchingEngine:
             List of all active orders
         """
         try:
-            # Get all orders
-            all_orders = self.get_all_orders()
+            # Only orders in the active index are read, not every order ever placed
+            order_ids = list(self.redis.active_order_ids())
+            if not order_ids:
+                return []
             
-            # Filter to only open or partially filled orders
-            active_orders = [order for order in all_orders if order.get('status') == 'open' or order.get('status') == 'partially_filled']
+            # One round trip for all active orders; the status check skips any
+            # entry the periodic cleanup has not swept yet
+            active_orders = [
+                order for order in self.redis.load_orders(order_ids)
+                if order and order.get('status') in ACTIVE_ORDER_STATUSES
+            ]
             
-            # Debug info
-            logger.info(f"Retrieved {len(active_orders)} active orders out of {len(all_orders)} total orders")
-            if len(all_orders) > len(active_orders):
-                logger.info(f"Filtered out {len(all_orders) - len(active_orders)} non-active orders with statuses: {set(order.get('status') for order in all_orders if order.get('status') != 'open' and order.get('status') != 'partially_filled')}")
+            # Sort by timestamp (newest first)
+            active_orders.sort(key=lambda x: float(x.get('timestamp', 0)), reverse=True)
             
+            logger.debug("Retrieved %d active orders", len(active_orders))
             return active_orders
         except Exception as e:
             logger.error(f"Error getting active orders: {e}")
             return []
 
-    async def _get_orders_for_symbol(self, symbol: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    async def _get_orders_for_symbol(self, symbol: str) -> Tuple[BookSide, BookSide]:
         """
-        Get all buy and sell orders for a given symbol.
+        Get the open buy and sell orders for a given symbol.
+        
+        Orders are read from the price books and grouped into price levels,
+        each level kept in time priority.
         
         Args:
             symbol: The trading symbol
             
         Returns:
-            Tuple of (buy_orders, sell_orders)
+            Tuple of (buy_side, sell_side)
         """
-        buy_orders = []
-        sell_orders = []
+        buy_side = BookSide(is_buy=True)
+        sell_side = BookSide(is_buy=False)
         
         try:
-            # Get all orders for this symbol
-            symbol_orders_key = f"oes:symbol:{symbol}:orders"
-            order_ids = self.redis.smembers(symbol_orders_key)
-            
-            for order_id in order_ids:
-                order_key = f"oes:order:{order_id}"
-                order_json = self.redis.get(order_key)
-                
-                if not order_json:
-                    continue
+            for side, book_side in (('buy', buy_side), ('sell', sell_side)):
+                order_ids = await self.redis.offload(self.redis.zrange, price_book_key(symbol, side), 0, -1)
                 
-                order = json.loads(order_json)
-                
-                # Make sure required fields exist
-                if 'filled_quantity' not in order:
-                    order['filled_quantity'] = '0'
-                
-                # Add order to appropriate list based on type (include all orders regardless of status)
-                if order['type'].lower() == 'buy':
-                    buy_orders.append(order)
-                elif order['type'].lower() == 'sell':
-                    sell_orders.append(order)
+                # One round trip for the whole side
+                for order in await self.redis.offload(self.redis.load_orders, order_ids):
+                    # Only open orders can trade
+                    if not order or order.get('status') not in ('open', 'partially_filled'):
+                        continue
+                    
+                    # Make sure required fields exist
+                    if 'filled_quantity' not in order:
+                        order['filled_quantity'] = 0.0
+                    
+                    book_side.add(order)
             
-            logger.info(f"Retrieved {len(buy_orders)} buy orders and {len(sell_orders)} sell orders for {symbol}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Retrieved {len(buy_side)} buy orders and {len(sell_side)} sell orders for {symbol}")
             
         except Exception as e:
             logger.error(f"Error getting orders for symbol {symbol}: {e}")
         
-        return buy_orders, sell_orders
+        return buy_side, sell_side
 
     async def process_market_order(self, order_id: str) -> Dict[str, Any]:
         """
@@ -1164,15 +1204,13 @@ class MatchingEngine:
             The processed order data
         """
         try:
-            # Get the order details
-            order_key = f"oes:order:{order_id}"
-            order_json = self.redis.get(order_key)
+            # Get the order details (the Redis calls below run through
+            # offload so the event loop keeps serving)
+            order = await self.redis.offload(self.redis.load_order, order_id)
             
-            if not order_json:
+            if not order:
                 logger.error(f"Market order {order_id} not found")
                 return None
-                
-            order = json.loads(order_json)
             
             # Make sure it's a market order
             if order.get('order_type') != 'market':
@@ -1181,7 +1219,7 @@ class MatchingEngine:
                 
             # Get the symbol and order side
             symbol = order.get('symbol')
-            is_buy = order.get('type', '').lower() == 'buy'
+            is_buy = order.get('type') == 'buy'
             quantity = float(order.get('quantity', 0))
             account_id = order.get('account_id')
             
@@ -1191,117 +1229,27 @@ class MatchingEngine:
                 
             logger.info(f"Processing market order {order_id} for {symbol}: {'BUY' if is_buy else 'SELL'} {quantity}")
             
-            # Find matching orders on the opposite side
-            opposite_side = 'sell' if is_buy else 'buy'
-            
-            # Get all orders for this symbol
-            all_orders = self.get_all_orders_for_symbol(symbol)
-            
-            # Filter to get only active orders on the opposite side
-            matching_orders = [
-                o for o in all_orders 
-                if o.get('type', '').lower() == opposite_side and 
-                o.get('status', '') == 'open' and
-                o.get('account_id') != account_id  # Don't match with own orders
-            ]
-            
-            # For a buy market order, sort by price (ascending)
-            # For a sell market order, sort by price (descending)
-            if is_buy:
-                matching_orders.sort(key=lambda o: float(o.get('price', 0)))
-            else:
-                matching_orders.sort(key=lambda o: float(o.get('price', 0)), reverse=True)
-                
-            if not matching_orders:
-                logger.warning(f"No matching orders found for market order {order_id}")
-                # Update order status to indicate no matches
-                order['status'] = 'pending'
-                self.redis.set(order_key, json.dumps(order))
-                return order
-                
-            # Execute the market order against the best available price(s)
-            remaining_quantity = quantity
-            trades = []
+            # Walk the opposite side of the book best price first (lowest ask
+            # for a buy, highest bid for a sell) and write every fill in a
+            # single script call
+            order['order_id'] = order_id
+            order['quantity'] = quantity
+            result = await self.redis.offload(self.redis.execute_market_order_lua, order, MARKET_ORDER_BOOK_BATCH)
+            trades = result['trades']
             
-            for match_order in matching_orders:
-                if remaining_quantity <= 0:
-                    break
-                    
-                match_order_id = match_order.get('id')
-                match_price = float(match_order.get('price', 0))
-                match_quantity = float(match_order.get('quantity', 0))
-                match_filled = float(match_order.get('filled_quantity', 0))
-                match_available = match_quantity - match_filled
-                
-                if match_available <= 0:
-                    continue
-                    
-                # Determine the quantity to match
-                match_quantity = min(remaining_quantity, match_available)
-                
-                # Create a trade
-                trade = {
-                    'id': f"T-{uuid.uuid4()}",
-                    'buy_order_id': order_id if is_buy else match_order_id,
-                    'sell_order_id': match_order_id if is_buy else order_id,
-                    'buy_account_id': account_id if is_buy else match_order.get('account_id'),
-                    'sell_account_id': match_order.get('account_id') if is_buy else account_id,
-                    'symbol': symbol,
-                    'price': match_price,
-                    'quantity': match_quantity,
-                    'timestamp': time.time()
-                }
-                
-                # Record the trade
-                self.redis.set(f"oes:trade:{trade['id']}", json.dumps(trade))
-                self.redis.sadd(TRADES_KEY, trade['id'])
-                
-                # Update the market order
-                order['filled_quantity'] = float(order.get('filled_quantity', 0)) + match_quantity
-                if float(order['filled_quantity']) >= quantity:
-                    order['status'] = 'filled'
-                else:
-                    order['status'] = 'partially_filled'
-                    
-                # Set the executed price for the market order
-                if 'execution_price' not in order:
-                    order['execution_price'] = match_price
-                else:
-                    # Calculate VWAP if multiple executions
-                    prev_exec_qty = float(order['filled_quantity']) - match_quantity
-                    prev_exec_price = float(order['execution_price'])
-                    new_exec_price = ((prev_exec_price * prev_exec_qty) + (match_price * match_quantity)) / float(order['filled_quantity'])
-                    order['execution_price'] = new_exec_price
-                
-                # Update the matched order
-                match_order['filled_quantity'] = float(match_order.get('filled_quantity', 0)) + match_quantity
-                if float(match_order['filled_quantity']) >= float(match_order['quantity']):
-                    match_order['status'] = 'filled'
-                else:
-                    match_order['status'] = 'partially_filled'
-                    
-                # Save updates to Redis
-                self.redis.set(order_key, json.dumps(order))
-                self.redis.set(f"oes:order:{match_order_id}", json.dumps(match_order))
-                
-                # Record in trades list
-                trades.append(trade)
-                
-                # Update remaining quantity
-                remaining_quantity -= match_quantity
+            order['status'] = result['status']
+            if trades:
+                # Filled resting orders stay in the order lists until the sweep
+                self._needs_cleanup = True
                 
-                logger.info(f"Market order {order_id} matched with {match_order_id} for {match_quantity} at ${match_price}")
+                order['filled_quantity'] = result['filled_quantity']
+                order['execution_price'] = result['execution_price']
                 
-                if remaining_quantity <= 0:
-                    break
-            
-            # If there are still remaining shares, update the order status
-            if remaining_quantity > 0 and float(order.get('filled_quantity', 0)) > 0:
-                order['status'] = 'partially_filled'
-                self.redis.set(order_key, json.dumps(order))
-            elif remaining_quantity > 0:
-                order['status'] = 'pending'  # No matches found
-                self.redis.set(order_key, json.dumps(order))
+                # Settle every fill in one round trip
+                await self.redis.offload(self.account_mgr.settle_trades, trades)
+                logger.info(f"Market order {order_id} filled {order['filled_quantity']} in {len(trades)} trades at avg ${order['execution_price']}")
+            else:
+                logger.warning(f"No matching orders found for market order {order_id}")
                 
             # Return the updated order
             return order
@@ -1326,13 +1274,9 @@ class MatchingEngine:
             
             orders = []
             for order_id in order_ids:
-                order_json = self.redis.get(f"oes:order:{order_id}")
-                if order_json:
-                    try:
-                        order = json.loads(order_json)
-                        orders.append(order)
-                    except:
-                        continue
+                order = self.redis.load_order(order_id)
+                if order:
+                    orders.append(order)
                         
             return orders
         except Exception as e:
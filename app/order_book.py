@@ -19,24 +19,174 @@ price-time priority matching.
 """
 
 # Standard library imports
-import uuid
 import time
-import json
+import orjson
 import asyncio
+import heapq
+import itertools
+import threading
 from typing import Dict, Any, List, Optional, Tuple, Literal
 from datetime import datetime
 import logging
 import random
 
 # Application-specific imports
-from .redis_client import redis_client, BUY_ORDERS_KEY, SELL_ORDERS_KEY, TRADES_KEY, INTERNAL_BUY_ORDERS_KEY, INTERNAL_SELL_ORDERS_KEY, INTERNAL_TRADES_KEY, DARK_POOL_ENABLED
+from .redis_client import redis_client, encode_order, decode_order, store_legacy_order, legacy_book_key, LEGACY_SYMBOLS_KEY, BUY_ORDERS_KEY, SELL_ORDERS_KEY, TRADES_KEY, INTERNAL_BUY_ORDERS_KEY, INTERNAL_SELL_ORDERS_KEY, INTERNAL_TRADES_KEY, DARK_POOL_ENABLED
 from app.risk_management import risk_manager
 from app.accounts import account_manager
-from app.matching_engine import matching_engine
+from app.matching_engine import matching_engine, new_order_id, format_created_at
 
 # Configure logging
 logger = logging.getLogger("oes.orderbook")
 
+# Fast JSON codec for trades and order history entries (orjson returns
+# bytes, which redis-py stores as-is)
+_dumps = orjson.dumps
+_loads = orjson.loads
+
+# Resting order books, by visibility
+EXTERNAL_BOOK_KEYS = (BUY_ORDERS_KEY, SELL_ORDERS_KEY)
+INTERNAL_BOOK_KEYS = (INTERNAL_BUY_ORDERS_KEY, INTERNAL_SELL_ORDERS_KEY)
+
+# (book key, price score sign) by (is buy, is internal). Bids are scored
+# with negated prices so every book sorts best price first. Each book key is
+# split per symbol with legacy_book_key().
+_BOOK_KEYS = {
+    (True, False): (BUY_ORDERS_KEY, -1.0),
+    (False, False): (SELL_ORDERS_KEY, 1.0),
+    (True, True): (INTERNAL_BUY_ORDERS_KEY, -1.0),
+    (False, True): (INTERNAL_SELL_ORDERS_KEY, 1.0),
+}
+
+# Key prefixes of the filled/cancelled history lists (external first)
+HISTORY_PREFIXES = ("oes", "oes:internal")
+
+# Seconds between ticks of the seeded market data price walk
+SEED_TICK_INTERVAL = 0.1
+
+# Thread running the seeded price walk; started once per process
+_price_updater: Optional[threading.Thread] = None
+
+# Seconds an unfiltered-by-trader book snapshot is served from memory. Writes
+# made by this process drop the snapshots at once; the TTL bounds how stale
+# one can get when another process writes the legacy books.
+BOOK_SNAPSHOT_TTL = 1.0
+
+# Number of members the book script reads per ZRANGE while filling a side
+# with no depth limit
+BOOK_SCAN_BATCH = 100
+
+# With a depth limit the first ZRANGE reads this many times the depth, to
+# leave room for filter rejects; each further read is this much wider
+BOOK_SCAN_OVERFETCH = 4
+
+# Builds a book snapshot server-side in one round trip. Each book key (whose
+# members are order ids) is walked best price first (bid scores are negated
+# prices, so both sides sort ascending) in batches that widen by ARGV[7]
+# after each read, orders are filtered on asset_type/symbol/trader_id from
+# their hashes, and at most ARGV[1] matching orders are kept per key
+# (0 = no limit). Without filters only the kept orders' hashes are read.
+# KEYS: bid books..., ask books... (ARGV[5] bid books come first)
+# ARGV: depth, asset_type, symbol, trader_id, number of bid books, first
+# batch size, batch growth factor
+# Returns {bids, asks}, each a flat list of (HGETALL field list, score) pairs.
+GET_BOOK_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local asset_type = ARGV[2]
+local symbol = ARGV[3]
+local trader_id = ARGV[4]
+local bid_books = tonumber(ARGV[5])
+local first_batch = tonumber(ARGV[6])
+local growth = tonumber(ARGV[7])
+local filtered = asset_type ~= "" or symbol ~= "" or trader_id ~= ""
+
+local function matches(order_key)
+    if not filtered then
+        return true
+    end
+    local state = redis.call("HMGET", order_key, "asset_type", "symbol", "trader_id")
+    if asset_type ~= "" and state[1] ~= asset_type then
+        return false
+    end
+    if symbol ~= "" and state[2] ~= symbol then
+        return false
+    end
+    if trader_id ~= "" and state[3] ~= trader_id then
+        return false
+    end
+    return true
+end
+
+local function collect(book_key, out)
+    local found = 0
+    local start = 0
+    local batch = first_batch
+    if not filtered and limit > 0 then
+        -- Nothing to filter on, so the head of the book is the answer
+        batch = limit
+    end
+    while true do
+        local entries = redis.call("ZRANGE", book_key, start, start + batch - 1, "WITHSCORES")
+        for i = 1, #entries, 2 do
+            local order_key = "oes:order:" .. entries[i]
+            if matches(order_key) then
+                local fields = redis.call("HGETALL", order_key)
+                if #fields > 0 then
+                    table.insert(out, fields)
+                    table.insert(out, entries[i + 1])
+                    found = found + 1
+                    if limit > 0 and found >= limit then
+                        return
+                    end
+                end
+            end
+        end
+        if #entries < batch * 2 then
+            return
+        end
+        start = start + batch
+        batch = batch * growth
+    end
+end
+
+local bids = {}
+local asks = {}
+for index, book_key in ipairs(KEYS) do
+    if index <= bid_books then
+        collect(book_key, bids)
+    else
+        collect(book_key, asks)
+    end
+end
+return {bids, asks}
+"""
+
+# Reads filled/cancelled history lists and returns only the entries whose
+# trader_id and symbol match (an empty ARGV matches anything), so history
+# that is filtered out never leaves Redis.
+# KEYS: history lists
+# ARGV: trader_id, symbol
+# Returns the matching entries as stored (JSON).
+FILTER_HISTORY_SCRIPT = """
+local trader_id = ARGV[1]
+local symbol = ARGV[2]
+local out = {}
+for _, list_key in ipairs(KEYS) do
+    for _, entry in ipairs(redis.call("LRANGE", list_key, 0, -1)) do
+        local ok, order = pcall(cjson.decode, entry)
+        if ok and (trader_id == "" or order.trader_id == trader_id)
+                and (symbol == "" or order.symbol == symbol) then
+            table.insert(out, entry)
+        end
+    end
+end
+return out
+"""
+
+def _book_order(fields: List[str]) -> Dict[str, Any]:
+    """Rebuild an order from the flat HGETALL field list the book script returns."""
+    return decode_order(dict(zip(fields[::2], fields[1::2])))
+
 class OrderBook:
     """
     High-performance order book implementation using Redis sorted sets.
@@ -56,6 +206,14 @@ class OrderBook:
         self.account_mgr = account_manager
         self.match_engine = matching_engine
         
+        # Trades executed while storing a new order, handed to the next
+        # match_orders call so the background pass broadcasts them
+        self.pending_trades: List[Dict[str, Any]] = []
+        
+        # get_order_book results by arguments, as (expires at, book); the
+        # periodic broadcasts re-read unchanged books many times a second
+        self._book_snapshots: Dict[Tuple, Tuple[float, Dict[str, List[Dict[str, Any]]]]] = {}
+        
         # Seed historical data if needed
         try:
             seed_historical_data()
@@ -67,6 +225,11 @@ class OrderBook:
         """
         Submit an order to the order book.
         
+        The order is stored (and crossed against the resting book) in one
+        script call; the call returns without waiting for a match pass. The
+        background matcher broadcasts any resulting trades on the "trades"
+        channel.
+        
         Args:
             order_data: Dictionary with order details
             
@@ -75,7 +238,7 @@ class OrderBook:
         """
         # Generate a unique order ID if not provided
         if 'id' not in order_data and 'order_id' not in order_data:
-            order_id = f"order-{uuid.uuid4()}"
+            order_id = new_order_id()
             order_data['id'] = order_id
             order_data['order_id'] = order_id
         elif 'id' in order_data and 'order_id' not in order_data:
@@ -97,7 +260,7 @@ class OrderBook:
             
         # Set order creation time
         if 'created_at' not in order_data:
-            order_data['created_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            order_data['created_at'] = format_created_at(order_data['timestamp'])
             
         # For incoming orders from external systems or UI, let's handle using the matching engine
         # This allows us to work directly with accounts
@@ -117,27 +280,36 @@ class OrderBook:
             order_data['reject_reason'] = risk_reason
             return order_data
         
-        # Select appropriate order book (buy/sell, internal/external)
-        if order_data['type'].lower() == 'buy':
-            if internal:
-                orders_key = INTERNAL_BUY_ORDERS_KEY
-            else:
-                orders_key = BUY_ORDERS_KEY
-            
-            # For buy orders, store negative price for proper sorting
-            price_score = -float(order_data['price'])
-        else:  # sell order
-            if internal:
-                orders_key = INTERNAL_SELL_ORDERS_KEY
-            else:
-                orders_key = SELL_ORDERS_KEY
-            
-            # For sell orders, store positive price for proper sorting
-            price_score = float(order_data['price'])
-        
-        # Store the order in Redis sorted set
-        # We serialize the order data to JSON
-        self.redis.zadd(orders_key, {json.dumps(order_data): price_score})
+        # Record the book's visibility once, in the 'True'/'False' form every
+        # reader compares against, so reads never have to normalize it
+        order_data['internal_match'] = 'True' if internal else 'False'
+        
+        # Select appropriate order book (buy/sell, internal/external) and the
+        # sign of its price score
+        is_buy = order_data['type'].lower() == 'buy'
+        side = 'buy' if is_buy else 'sell'
+        orders_key, sign = _BOOK_KEYS[(is_buy, bool(internal))]
+        price_score = sign * float(order_data['price'])
+        
+        # Store the order in its hash, add its id to the sorted set and run a
+        # match pass on that book, all in the same atomic script call
+        if internal and not DARK_POOL_ENABLED:
+            # Internal matching is off; the order just rests
+            pipe = self.redis.pipeline(transaction=False)
+            store_legacy_order(pipe, orders_key, order_data, price_score)
+            pipe.execute()
+        else:
+            self.pending_trades.extend(self.redis.match_legacy_book(
+                internal=bool(internal),
+                symbol=order_data['symbol'],
+                order=order_data,
+                side=side,
+                score=price_score
+            ))
+        
+        # Let the background matcher know there is new work
+        self._book_snapshots.clear()
+        self.match_engine.notify_new_order()
         
         # Return the submitted order
         return order_data
@@ -163,64 +335,65 @@ class OrderBook:
             # Can only edit open orders
             return None
         
-        # Determine which book this order is in - check for different formats of the field values
-        internal = False
+        # Account orders live in the matching engine's books, not these
+        if 'account_id' in existing_order:
+            return await self.match_engine.edit_order(order_id, updated_data)
         
-        # First check if internal_match was provided in the update
+        # Determine which book this order is in; get_order always sets
+        # internal_match, so only a value sent with the update needs parsing
         if 'internal_match' in updated_data:
-            internal_match_value = str(updated_data['internal_match']).lower()
-            internal = internal_match_value in ['true', 'yes', 'y', '1']
-        # Otherwise check the existing order
-        elif 'internal_match' in existing_order:
-            internal_match_value = str(existing_order['internal_match']).lower()
-            internal = internal_match_value in ['true', 'yes', 'y', '1']
-        # Last resort: check the internal field
-        elif 'internal' in existing_order:
-            internal_value = str(existing_order['internal']).lower()
-            internal = internal_value in ['true', 'yes', 'y', '1']
-        
-        is_buy = existing_order['type'].lower() == 'buy'
-        
-        if is_buy:
-            old_key = INTERNAL_BUY_ORDERS_KEY if internal else BUY_ORDERS_KEY
+            internal = str(updated_data['internal_match']).lower() in ('true', 'yes', 'y', '1')
         else:
-            old_key = INTERNAL_SELL_ORDERS_KEY if internal else SELL_ORDERS_KEY
+            internal = existing_order['internal_match'] == 'True'
         
-        # Remove the old order
-        self.redis.zrem(old_key, json.dumps(existing_order))
+        old_key, sign = _BOOK_KEYS[(existing_order['type'].lower() == 'buy', internal)]
         
         # Update fields
+        changes = {}
         allowed_fields = ['price', 'quantity']
         for field in allowed_fields:
             if field in updated_data:
-                existing_order[field] = updated_data[field]
+                changes[field] = updated_data[field]
+        
+        # An amend to the same price keeps the order's place in the book
+        price_moved = 'price' in changes and float(changes['price']) != float(existing_order['price'])
         
         # Mark as edited
-        existing_order['edited'] = 'True'
-        existing_order['last_edit_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        changes['edited'] = 'True'
+        changes['last_edit_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         # Ensure internal_match is set consistently as a string
-        existing_order['internal_match'] = str(internal)
+        changes['internal_match'] = str(internal)
         if 'internal' in existing_order:
-            existing_order['internal'] = internal  # Keep internal field in sync
-        
-        # Re-insert with potentially new price
-        if is_buy:
-            # For buy orders, store negative price for proper sorting
-            price_score = -float(existing_order['price'])
+            changes['internal'] = internal  # Keep internal field in sync
+        existing_order.update(changes)
+        
+        # Only the changed fields are written; the book entry is the bare id,
+        # so it only gets a new score, in place, when the price moved (XX
+        # keeps ZADD from adding orders that are not resting in this book)
+        if price_moved:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(f"oes:order:{order_id}", mapping=encode_order(changes))
+            pipe.zadd(legacy_book_key(old_key, existing_order['symbol']), {order_id: sign * float(existing_order['price'])}, xx=True)
+            pipe.execute()
         else:
-            # For sell orders, store positive price for proper sorting
-            price_score = float(existing_order['price'])
+            self.redis.hset(f"oes:order:{order_id}", mapping=encode_order(changes))
         
-        # Store the updated order
-        self.redis.zadd(old_key, {json.dumps(existing_order): price_score})
+        # Let the background matcher know the book changed
+        self._book_snapshots.clear()
+        self.match_engine.notify_new_order()
         
         # Return the updated order
         return existing_order
     
     async def match_orders(self, include_internal=False):
         """Match orders from the order books based on price-time priority."""
-        return await self.redis.match_orders(include_internal)
+        # Trades already executed on submission come first
+        trades, self.pending_trades = self.pending_trades, []
+        trades.extend(await self.redis.match_orders(include_internal))
+        if trades:
+            self._book_snapshots.clear()
+        return trades
     
     def get_order_book(
         self, 
@@ -241,150 +414,103 @@ class OrderBook:
             trader_id: Filter by trader ID
             
         Returns:
-            Dictionary with bids and asks lists
+            Dictionary with bids and asks lists (a snapshot shared with other
+            callers, so it must not be modified)
         """
-        # Get the order book data from Redis
-        buy_orders = []
-        sell_orders = []
-        
-        # Get external orders (if not filtering for internal only)
+        # Serve an unexpired snapshot; per-trader views are not kept, so the
+        # snapshot map stays bounded by the symbols and depths in use
+        now = time.monotonic()
+        snapshot_key = None
+        if not trader_id:
+            snapshot_key = (depth, include_internal, asset_type, symbol)
+            snapshot = self._book_snapshots.get(snapshot_key)
+            if snapshot is not None and snapshot[0] > now:
+                return snapshot[1]
+        
+        # Pick the books to read (bid books first). Books are per symbol, so
+        # a symbol query reads just that symbol's books with no symbol filter
+        bid_books = []
+        ask_books = []
         if not include_internal or include_internal == "both":
-            ext_buy_orders = self.redis.zrevrange(BUY_ORDERS_KEY, 0, -1, withscores=True)
-            ext_sell_orders = self.redis.zrange(SELL_ORDERS_KEY, 0, -1, withscores=True)
-            
-            # Process buy orders
-            for order_json, price in ext_buy_orders:
-                order = json.loads(order_json)
-                
-                # Apply filters
-                if asset_type and order.get('asset_type') != asset_type:
-                    continue
-                    
-                if symbol and order.get('symbol') != symbol:
-                    continue
-                    
-                # Apply trader filter if specified
-                if trader_id and order.get('trader_id') != trader_id:
-                    continue
-                
-                # Negate price (it's stored negatively for proper sorting)
-                order['price'] = -price
-                buy_orders.append(order)
-                
-                # Respect depth limit if not filtering by trader
-                if not trader_id and len(buy_orders) >= depth:
-                    break
-            
-            # Process sell orders
-            for order_json, price in ext_sell_orders:
-                order = json.loads(order_json)
-                
-                # Apply filters
-                if asset_type and order.get('asset_type') != asset_type:
-                    continue
-                    
-                if symbol and order.get('symbol') != symbol:
-                    continue
-                    
-                # Apply trader filter if specified
-                if trader_id and order.get('trader_id') != trader_id:
-                    continue
-                
-                order['price'] = price
-                sell_orders.append(order)
-                
-                # Respect depth limit if not filtering by trader
-                if not trader_id and len(sell_orders) >= depth:
-                    break
-        
-        # Include internal orders if requested
+            bid_books.append(BUY_ORDERS_KEY)
+            ask_books.append(SELL_ORDERS_KEY)
         if include_internal or include_internal == "only":
-            # Get internal orders
-            int_buy_orders = self.redis.zrevrange(INTERNAL_BUY_ORDERS_KEY, 0, -1, withscores=True)
-            int_sell_orders = self.redis.zrange(INTERNAL_SELL_ORDERS_KEY, 0, -1, withscores=True)
-            
-            # Process internal buy orders
-            for order_json, price in int_buy_orders:
-                order = json.loads(order_json)
-                
-                # Apply filters
-                if asset_type and order.get('asset_type') != asset_type:
-                    continue
-                    
-                if symbol and order.get('symbol') != symbol:
-                    continue
-                    
-                # Apply trader filter if specified
-                if trader_id and order.get('trader_id') != trader_id:
-                    continue
-                
-                # Negate price (it's stored negatively for proper sorting)
-                order['price'] = -price
-                buy_orders.append(order)
-                
-                # Respect depth limit if not filtering by trader
-                if not trader_id and len(buy_orders) >= depth:
-                    break
-            
-            # Process internal sell orders
-            for order_json, price in int_sell_orders:
-                order = json.loads(order_json)
-                
-                # Apply filters
-                if asset_type and order.get('asset_type') != asset_type:
-                    continue
-                    
-                if symbol and order.get('symbol') != symbol:
-                    continue
-                    
-                # Apply trader filter if specified
-                if trader_id and order.get('trader_id') != trader_id:
-                    continue
-                
-                order['price'] = price
-                sell_orders.append(order)
-                
-                # Respect depth limit if not filtering by trader
-                if not trader_id and len(sell_orders) >= depth:
-                    break
-        
-        # Sort orders by price and time
-        buy_orders.sort(key=lambda x: (-float(x['price']), x['timestamp']))
-        sell_orders.sort(key=lambda x: (float(x['price']), x['timestamp']))
+            bid_books.append(INTERNAL_BUY_ORDERS_KEY)
+            ask_books.append(INTERNAL_SELL_ORDERS_KEY)
+        symbols = self._book_symbols(symbol)
+        bid_keys = [legacy_book_key(book, book_symbol) for book in bid_books for book_symbol in symbols]
+        ask_keys = [legacy_book_key(book, book_symbol) for book in ask_books for book_symbol in symbols]
+        
+        # Filter and cut every book server-side in one script call; the depth
+        # limit only applies when not filtering by trader. A limited scan
+        # starts with a few times the depth and widens only if filters
+        # rejected too much.
+        limit = 0 if trader_id else depth
+        first_batch = limit * BOOK_SCAN_OVERFETCH if limit > 0 else BOOK_SCAN_BATCH
+        keys = bid_keys + ask_keys
+        args = (
+            limit,
+            asset_type or "", "", trader_id or "",
+            len(bid_keys), first_batch, BOOK_SCAN_OVERFETCH
+        )
+        bid_entries, ask_entries = self.redis.run_script(GET_BOOK_SCRIPT, keys, args)
+        
+        # Rebuild each order from its hash fields, restore its price from the
+        # score (bids are stored negated) and build the (price, time) sort key
+        # once per order; the index breaks ties so orders are never compared
+        buy_orders = []
+        for i in range(0, len(bid_entries), 2):
+            order = _book_order(bid_entries[i])
+            score = float(bid_entries[i + 1])
+            order['price'] = -score
+            buy_orders.append((score, order.get('timestamp', 0), i, order))
         
-        return {
-            'bids': buy_orders[:depth],
-            'asks': sell_orders[:depth]
+        sell_orders = []
+        for i in range(0, len(ask_entries), 2):
+            order = _book_order(ask_entries[i])
+            order['price'] = float(ask_entries[i + 1])
+            sell_orders.append((order['price'], order.get('timestamp', 0), i, order))
+        
+        # Keep the best depth orders by price and time
+        book = {
+            'bids': [entry[3] for entry in heapq.nsmallest(depth, buy_orders)],
+            'asks': [entry[3] for entry in heapq.nsmallest(depth, sell_orders)]
         }
+        if snapshot_key is not None:
+            self._book_snapshots[snapshot_key] = (now + BOOK_SNAPSHOT_TTL, book)
+        return book
+    
+    def _book_symbols(self, symbol: Optional[str]) -> List[str]:
+        """
+        Get the symbols whose legacy books a query reads.
+        
+        Args:
+            symbol: The queried symbol, or None for every symbol with a book
+            
+        Returns:
+            Symbols in a stable order
+        """
+        if symbol:
+            return [symbol]
+        return sorted(self.redis.smembers(LEGACY_SYMBOLS_KEY))
     
     def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
         """Get an order by its ID."""
         try:
             # Try to get the order from Redis directly
-            redis_key = f"oes:order:{order_id}"
-            order_json = self.redis.get(redis_key)
+            order = self.redis.load_order(order_id)
             
-            if order_json:
-                # Parse the order from JSON
-                order = json.loads(order_json)
-                
+            if order:
                 # Ensure both id fields exist for compatibility
                 if 'order_id' not in order and 'id' in order:
                     order['order_id'] = order['id']
                 if 'id' not in order and 'order_id' in order:
                     order['id'] = order['order_id']
                 
-                # Ensure internal_match field is properly set
+                # Hash values are already strings; orders stored without
+                # internal_match get it from the decoded internal flag
                 if 'internal_match' not in order:
-                    # Check if internal field exists and use that value
-                    if 'internal' in order:
-                        order['internal_match'] = str(order['internal'])
-                    else:
-                        # Default to 'False' if neither field exists
-                        order['internal_match'] = 'False'
-                # Ensure internal_match is a string for consistency
-                else:
-                    order['internal_match'] = str(order['internal_match'])
+                    order['internal_match'] = 'True' if order.get('internal') else 'False'
                     
                 return order
             
@@ -427,15 +553,10 @@ class OrderBook:
         
         # Determine which order book it belongs to
         is_internal = order.get('internal_match') == 'True'
-        is_buy = order.get('type', '').lower() == 'buy'
-        
-        if is_buy:
-            key = INTERNAL_BUY_ORDERS_KEY if is_internal else BUY_ORDERS_KEY
-        else:
-            key = INTERNAL_SELL_ORDERS_KEY if is_internal else SELL_ORDERS_KEY
+        key, _ = _BOOK_KEYS[(order.get('type', '').lower() == 'buy', is_internal)]
         
-        # Remove from order book
-        result = self.redis.zrem(key, json.dumps(order))
+        # Remove from the symbol's order book (members are order ids)
+        result = self.redis.zrem(legacy_book_key(key, order.get('symbol', '')), order_id)
         
         if result:
             # Update order status
@@ -447,8 +568,16 @@ class OrderBook:
                 cancelled_key = f"oes:internal:orders:cancelled"
             else:
                 cancelled_key = f"oes:orders:cancelled"
-                
-            self.redis.lpush(cancelled_key, json.dumps(order))
+            
+            # Record the status on the order and in the history together
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(f"oes:order:{order_id}", mapping=encode_order({
+                'status': order['status'],
+                'cancelled_at': order['cancelled_at']
+            }))
+            pipe.lpush(cancelled_key, _dumps(order))
+            pipe.execute()
+            self._book_snapshots.clear()
         
         return bool(result)
     
@@ -464,22 +593,24 @@ class OrderBook:
             List of recent trades
         """
         # Get external trades
-        ext_trades_json = self.redis.lrange(TRADES_KEY, 0, limit - 1)
-        trades = [json.loads(trade) for trade in ext_trades_json]
-        
-        # Include internal trades if requested
-        if include_internal:
-            int_trades_json = self.redis.lrange(INTERNAL_TRADES_KEY, 0, limit - 1)
-            int_trades = [json.loads(trade) for trade in int_trades_json]
-            
-            # Combine and sort by timestamp
-            trades.extend(int_trades)
-            trades.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
-            
-            # Respect limit
-            trades = trades[:limit]
-        
-        return trades
+        if not include_internal:
+            return [_loads(trade) for trade in self.redis.lrange(TRADES_KEY, 0, limit - 1)]
+        
+        # Read both trade lists in one round trip
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lrange(TRADES_KEY, 0, limit - 1)
+        pipe.lrange(INTERNAL_TRADES_KEY, 0, limit - 1)
+        ext_trades_json, int_trades_json = pipe.execute()
+        
+        # Both lists are pushed newest first, so merge them by timestamp and
+        # stop after limit trades instead of sorting everything fetched
+        merged = heapq.merge(
+            (_loads(trade) for trade in ext_trades_json),
+            (_loads(trade) for trade in int_trades_json),
+            key=lambda x: x.get('timestamp', 0),
+            reverse=True
+        )
+        return list(itertools.islice(merged, limit))
     
     def get_orders_by_status(
         self, 
@@ -500,80 +631,30 @@ class OrderBook:
         Returns:
             List of orders matching the criteria
         """
-        result = []
-        
+        # Orders are read and filtered by trader and symbol server-side, so
+        # orders that do not match never leave Redis
         if status == "open":
-            # For open orders, check the active order books
-            if not internal_only:
-                # External books
-                ext_buy_orders = self.redis.zrevrange(BUY_ORDERS_KEY, 0, -1)
-                ext_sell_orders = self.redis.zrange(SELL_ORDERS_KEY, 0, -1)
-                
-                for order_json in ext_buy_orders + ext_sell_orders:
-                    order = json.loads(order_json)
-                    
-                    # Apply trader filter if needed
-                    if trader_id and order.get('trader_id') != trader_id:
-                        continue
-                    
-                    # Apply symbol filter if needed
-                    if symbol and order.get('symbol') != symbol:
-                        continue
-                    
-                    result.append(order)
-            
-            # Internal books
-            int_buy_orders = self.redis.zrevrange(INTERNAL_BUY_ORDERS_KEY, 0, -1)
-            int_sell_orders = self.redis.zrange(INTERNAL_SELL_ORDERS_KEY, 0, -1)
-            
-            for order_json in int_buy_orders + int_sell_orders:
-                order = json.loads(order_json)
-                
-                # Apply trader filter if needed
-                if trader_id and order.get('trader_id') != trader_id:
-                    continue
-                
-                # Apply symbol filter if needed
-                if symbol and order.get('symbol') != symbol:
-                    continue
-                
-                result.append(order)
+            # For open orders, read the symbol's (or every symbol's) active
+            # order books through the book script with no depth limit, every
+            # book counted as a bid book
+            book_keys = INTERNAL_BOOK_KEYS if internal_only else EXTERNAL_BOOK_KEYS + INTERNAL_BOOK_KEYS
+            symbols = self._book_symbols(symbol)
+            books = [legacy_book_key(book, book_symbol) for book in book_keys for book_symbol in symbols]
+            args = (0, "", "", trader_id or "", len(books), BOOK_SCAN_BATCH, BOOK_SCAN_OVERFETCH)
+            entries, _ = self.redis.run_script(GET_BOOK_SCRIPT, books, args)
+            result = [_book_order(fields) for fields in entries[::2]]
         else:
             # For filled and cancelled orders, check the history
-            if not internal_only:
-                # Check external history
-                ext_history_key = f"oes:orders:{status}"
-                ext_orders_json = self.redis.lrange(ext_history_key, 0, -1)
-                
-                for order_json in ext_orders_json:
-                    order = json.loads(order_json)
-                    
-                    # Apply trader filter if needed
-                    if trader_id and order.get('trader_id') != trader_id:
-                        continue
-                    
-                    # Apply symbol filter if needed
-                    if symbol and order.get('symbol') != symbol:
-                        continue
-                    
-                    result.append(order)
-            
-            # Check internal history
-            int_history_key = f"oes:internal:orders:{status}"
-            int_orders_json = self.redis.lrange(int_history_key, 0, -1)
-            
-            for order_json in int_orders_json:
-                order = json.loads(order_json)
-                
-                # Apply trader filter if needed
-                if trader_id and order.get('trader_id') != trader_id:
-                    continue
-                
-                # Apply symbol filter if needed
-                if symbol and order.get('symbol') != symbol:
-                    continue
-                
-                result.append(order)
+            prefixes = HISTORY_PREFIXES[1:] if internal_only else HISTORY_PREFIXES
+            keys = [f"{prefix}:orders:{status}" for prefix in prefixes]
+            if trader_id or symbol:
+                entries = self.redis.run_script(FILTER_HISTORY_SCRIPT, keys, (trader_id or "", symbol or ""))
+            else:
+                pipe = self.redis.pipeline(transaction=False)
+                for key in keys:
+                    pipe.lrange(key, 0, -1)
+                entries = [order_json for orders_json in pipe.execute() for order_json in orders_json]
+            result = [_loads(order_json) for order_json in entries]
         
         # Sort by timestamp
         result.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
@@ -590,21 +671,9 @@ class OrderBook:
         Returns:
             Dictionary with order details or None if not found
         """
-        order = self.get_order(order_id)
-        
-        if not order:
-            # Check in history for filled or cancelled orders
-            for status in ["filled", "cancelled"]:
-                for prefix in ["oes", "oes:internal"]:
-                    history_key = f"{prefix}:orders:{status}"
-                    orders_json = self.redis.lrange(history_key, 0, -1)
-                    
-                    for order_json in orders_json:
-                        order_data = json.loads(order_json)
-                        if order_data.get('id') == order_id:
-                            return order_data
-        
-        return order
+        # Filled and cancelled orders keep their oes:order:{id} hash with the
+        # final status, so the history lists never need scanning
+        return self.get_order(order_id)
 
 def seed_historical_data():
     """
@@ -615,7 +684,6 @@ def seed_historical_data():
         import time
         import random
         import math
-        import asyncio
         from datetime import datetime
 
         # Sample tickers and their price ranges with volatility settings
@@ -627,114 +695,111 @@ def seed_historical_data():
             'TSLA': {'min': 180, 'max': 190, 'volatility': 0.004, 'trend': 0}
         }
 
+        # Price multipliers of the 15 levels on each side (0.1% price steps)
+        # and the level sizes (100 to 10,000 in lots of 10), computed once
+        # rather than on every tick
+        bid_steps = tuple(1 - 0.001 * i for i in range(15))
+        ask_steps = tuple(1 + 0.001 * i for i in range(15))
+        level_sizes = range(100, 10001, 10)
+
         def generate_orders(base_price, ticker_data):
             """Generate realistic order book entries around the base price"""
             current_time = int(time.time())
-            orders = {'bids': [], 'asks': []}
+            timestamps = range(current_time, current_time - 15, -1)
             
             # Generate spread
             spread = base_price * 0.0005  # 0.05% spread
             bid_start = base_price - spread
             ask_start = base_price + spread
             
-            # Generate bids (buy orders)
-            for i in range(15):
-                price = round(bid_start * (1 - 0.001 * i), 2)  # 0.1% price steps
-                quantity = random.randint(10, 1000) * 10
-                orders['bids'].append((price, quantity, current_time-i))
-            
-            # Generate asks (sell orders)
-            for i in range(15):
-                price = round(ask_start * (1 + 0.001 * i), 2)  # 0.1% price steps
-                quantity = random.randint(10, 1000) * 10
-                orders['asks'].append((price, quantity, current_time-i))
-            
-            return orders
+            # Each side's sizes are drawn in a single random.choices call
+            return {
+                'bids': list(zip(
+                    [round(bid_start * step, 2) for step in bid_steps],
+                    random.choices(level_sizes, k=15),
+                    timestamps
+                )),
+                'asks': list(zip(
+                    [round(ask_start * step, 2) for step in ask_steps],
+                    random.choices(level_sizes, k=15),
+                    timestamps
+                ))
+            }
+
+        def write_book(pipe, ticker, orders):
+            """Queue the replacement of a ticker's seeded bids and asks"""
+            # One multi-member ZADD per side instead of one call per level
+            pipe.delete(f"order_book:{ticker}:bids", f"order_book:{ticker}:asks")
+            pipe.zadd(
+                f"order_book:{ticker}:bids",
+                {f"{price}:{quantity}:{timestamp}": price for price, quantity, timestamp in orders['bids']}
+            )
+            pipe.zadd(
+                f"order_book:{ticker}:asks",
+                {f"{price}:{quantity}:{timestamp}": price for price, quantity, timestamp in orders['asks']}
+            )
 
         # Initial seeding of order books
+        pipe = redis_client.pipeline()
         for ticker, data in tickers.items():
             # Set initial price
             mid_price = (data['min'] + data['max']) / 2
-            redis_client.set(f"price:{ticker}", str(mid_price))
+            pipe.set(f"price:{ticker}", str(mid_price))
             
             # Generate and store initial orders
-            orders = generate_orders(mid_price, data)
-            
-            # Update order books
-            redis_client.delete(f"order_book:{ticker}:bids")
-            redis_client.delete(f"order_book:{ticker}:asks")
-            
-            for price, quantity, timestamp in orders['bids']:
-                redis_client.zadd(
-                    f"order_book:{ticker}:bids",
-                    {f"{price}:{quantity}:{timestamp}": price}
-                )
-            
-            for price, quantity, timestamp in orders['asks']:
-                redis_client.zadd(
-                    f"order_book:{ticker}:asks",
-                    {f"{price}:{quantity}:{timestamp}": price}
-                )
+            write_book(pipe, ticker, generate_orders(mid_price, data))
+        pipe.execute()
 
-        async def update_prices():
+        # The price walk is the only writer of price:{ticker}, so the
+        # current prices are kept here instead of read back every tick
+        prices = {ticker: (data['min'] + data['max']) / 2 for ticker, data in tickers.items()}
+
+        def process_batch():
+            """Advance every ticker one step and write the tick in one round trip"""
+            # MULTI/EXEC so readers never see a book between its DELETE and ZADD
+            pipe = redis_client.pipeline()
+            for ticker, data in tickers.items():
+                # Update trend with mean reversion
+                data['trend'] = data['trend'] * 0.95 + random.gauss(0, data['volatility'])
+                
+                # Apply trend and random walk
+                new_price = prices[ticker] * (1 + data['trend'] + random.gauss(0, data['volatility']))
+                
+                # Apply mean reversion
+                if new_price < data['min']:
+                    new_price = data['min'] * (1 + random.random() * 0.01)
+                elif new_price > data['max']:
+                    new_price = data['max'] * (1 - random.random() * 0.01)
+                
+                # Store new price
+                prices[ticker] = new_price
+                pipe.set(f"price:{ticker}", str(new_price))
+                
+                # Generate and store new orders
+                write_book(pipe, ticker, generate_orders(new_price, data))
+            pipe.execute()
+
+        def update_prices():
             """Continuously update prices based on random walks with mean reversion"""
             while True:
-                for ticker, data in tickers.items():
-                    # Update trend with mean reversion
-                    data['trend'] = data['trend'] * 0.95 + random.gauss(0, data['volatility'])
-                    
-                    # Calculate new base price with bounds
-                    mid_price = (data['min'] + data['max']) / 2
-                    current_price = redis_client.get(f"price:{ticker}")
-                    
-                    if current_price is None:
-                        current_price = mid_price
-                    else:
-                        current_price = float(current_price)
-                    
-                    # Apply trend and random walk
-                    new_price = current_price * (1 + data['trend'] + random.gauss(0, data['volatility']))
-                    
-                    # Apply mean reversion
-                    if new_price < data['min']:
-                        new_price = data['min'] * (1 + random.random() * 0.01)
-                    elif new_price > data['max']:
-                        new_price = data['max'] * (1 - random.random() * 0.01)
-                    
-                    # Store new price
-                    redis_client.set(f"price:{ticker}", str(new_price))
-                    
-                    # Generate and store new orders
-                    orders = generate_orders(new_price, data)
-                    
-                    # Update order books
-                    redis_client.delete(f"order_book:{ticker}:bids")
-                    redis_client.delete(f"order_book:{ticker}:asks")
-                    
-                    for price, quantity, timestamp in orders['bids']:
-                        redis_client.zadd(
-                            f"order_book:{ticker}:bids",
-                            {f"{price}:{quantity}:{timestamp}": price}
-                        )
-                    
-                    for price, quantity, timestamp in orders['asks']:
-                        redis_client.zadd(
-                            f"order_book:{ticker}:asks",
-                            {f"{price}:{quantity}:{timestamp}": price}
-                        )
+                try:
+                    process_batch()
+                except Exception as e:
+                    logger.error(f"Error updating seeded prices: {e}")
                 
                 # Small delay between updates
-                await asyncio.sleep(0.1)  # Update every 100ms
-
-        # Get or create event loop
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+                time.sleep(SEED_TICK_INTERVAL)
 
-        # Start the continuous update task
-        loop.create_task(update_prices())
+        # Run the price walk on its own thread rather than as a task on the
+        # event loop, where its blocking Redis calls stalled request handling
+        global _price_updater
+        if _price_updater is None or not _price_updater.is_alive():
+            _price_updater = threading.Thread(
+                target=update_prices,
+                name="oes-seed-prices",
+                daemon=True
+            )
+            _price_updater.start()
         
         return True
     except Exception as e:
@@ -5,7 +5,6 @@ Script to populate Redis with realistic market data for AAPL (external order boo
 
 import sys
 import os
-import json
 import uuid
 import time
 import random
@@ -16,7 +15,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import app modules
-from app.redis_client import redis_client, BUY_ORDERS_KEY, SELL_ORDERS_KEY
+from app.redis_client import redis_client, store_legacy_order, BUY_ORDERS_KEY, SELL_ORDERS_KEY
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -116,15 +115,21 @@ def save_market_data_to_redis(buy_orders, sell_orders):
     # Sort sell orders by price (ascending)
     sell_orders.sort(key=lambda x: x["price"])
     
+    # Each order's body goes to its hash and its id to the book, all on one
+    # pipeline
+    pipe = redis_client.pipeline()
+    
     # For buy orders, we store with negative price for proper sorting
     for order in buy_orders:
         price_neg = -float(order["price"])
-        redis_client.zadd(BUY_ORDERS_KEY, {json.dumps(order): price_neg})
+        store_legacy_order(pipe, BUY_ORDERS_KEY, order, price_neg)
     
     # For sell orders, we store with positive price
     for order in sell_orders:
         price = float(order["price"])
-        redis_client.zadd(SELL_ORDERS_KEY, {json.dumps(order): price})
+        store_legacy_order(pipe, SELL_ORDERS_KEY, order, price)
+    
+    pipe.execute()
     
     logger.info(f"Added {len(buy_orders)} buy orders and {len(sell_orders)} sell orders to market data")
 
@@ -16,7 +16,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import app modules
-from app.redis_client import redis_client
+from app.redis_client import redis_client, SYMBOLS_KEY
 from app.accounts import account_manager
 
 # Configure logging
@@ -114,9 +114,7 @@ def save_order_to_redis(order):
     symbol = order["symbol"]
     
     # Main order key
-    order_key = f"oes:order:{order_id}"
-    order_json = json.dumps(order)
-    redis_client.set(order_key, order_json)
+    redis_client.store_order(order_id, order)
     
     # Add to the main orders collection
     redis_client.sadd("oes:orders", order_id)
@@ -128,6 +126,10 @@ def save_order_to_redis(order):
     # Add to symbol-specific order index
     symbol_orders_key = f"oes:symbol:{symbol}:orders"
     redis_client.sadd(symbol_orders_key, order_id)
+    redis_client.sadd(SYMBOLS_KEY, symbol)
+    
+    # Add to the price-ordered matching book
+    redis_client.add_to_price_book(order)
     
     # Log the operation
     logger.info(f"Added {order['type']} order: {quantity_str(order['quantity'])} {symbol} @ ${order['price']} (ID: {order_id})")
@@ -154,11 +156,16 @@ def clear_existing_orders():
     for order_id in order_ids:
         # Get the order to find its account and symbol
         order_key = f"oes:order:{order_id}"
-        order_json = redis_client.get(order_key)
         
-        if order_json:
+        try:
+            order = redis_client.load_order_fields(order_id, ("account_id", "symbol"))
+        except Exception:
+            # Orders stored before the hash layout are plain JSON strings
+            order = None
+            redis_client.delete(order_key)
+        
+        if order:
             try:
-                order = json.loads(order_json)
                 account_id = order.get("account_id")
                 symbol = order.get("symbol")
                 
@@ -171,6 +178,7 @@ def clear_existing_orders():
                 if symbol:
                     symbol_orders_key = f"oes:symbol:{symbol}:orders"
                     redis_client.srem(symbol_orders_key, order_id)
+                    redis_client.remove_from_price_book(symbol, order_id)
                 
                 # Delete the order itself
                 redis_client.delete(order_key)
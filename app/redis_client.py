@@ -2,12 +2,15 @@ import os
 import redis
 import logging
 from redis.connection import BlockingConnectionPool
-from redis.exceptions import ConnectionError
+from redis.exceptions import ConnectionError, NoScriptError
 import time
 import json
+import orjson
 import random
+import asyncio
+import functools
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
 import sys
 import uuid
 
@@ -15,26 +18,67 @@ import uuid
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("oes.redis")
 
+# Fast JSON codec for trades and notifications (orjson returns bytes, which
+# redis-py accepts as-is). Order book ZSET members keep the stdlib encoding
+# because they are matched byte-for-byte on removal.
+_dumps = orjson.dumps
+_loads = orjson.loads
+
 # Redis connection configuration
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
 
+# Unix domain socket of a co-located Redis; when set it is used instead of
+# TCP loopback, which saves the TCP stack on every round trip
+REDIS_SOCKET = os.getenv("REDIS_SOCKET", None)
+
+# Size of the shared connection pool, so offloaded calls and pub/sub
+# listeners do not queue behind one connection
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 64))
+
+# How often (seconds) an idle pooled connection is pinged before reuse
+REDIS_HEALTH_CHECK_INTERVAL = 30
+
 # Redis key constants for order books
 # External order books (public exchange data)
 BUY_ORDERS_KEY = "oes:orders:buy"
 SELL_ORDERS_KEY = "oes:orders:sell"
 TRADES_KEY = "oes:trades"
+FILLED_ORDERS_KEY = "oes:orders:filled"
 
 # Internal order books (dark pool / hedge fund internal)
 INTERNAL_BUY_ORDERS_KEY = "oes:internal:orders:buy"
 INTERNAL_SELL_ORDERS_KEY = "oes:internal:orders:sell"
 INTERNAL_TRADES_KEY = "oes:internal:trades"
+INTERNAL_FILLED_ORDERS_KEY = "oes:internal:orders:filled"
+
+# The book keys above are prefixes: each symbol has its own legacy book
+# ({book key}:{symbol}), and this registry lists the symbols that have one
+LEGACY_SYMBOLS_KEY = "oes:legacy:symbols"
+
+# Registry of every symbol that has had an order indexed under
+# oes:symbol:{symbol}:orders, so sweeps never need KEYS
+SYMBOLS_KEY = "oes:symbols"
+
+# Ids of every order that can still trade (status open or partially_filled),
+# kept in step with status writes so active-order reads skip closed orders
+ACTIVE_ORDERS_KEY = "oes:orders:active"
+ACTIVE_ORDER_STATUSES = ("open", "partially_filled")
+
+# Most trades one legacy book match call executes before returning
+LEGACY_MATCH_MAX_TRADES = 64
 
 # Feature flags
 DARK_POOL_ENABLED = True
 
+# Number of most recent notifications kept per account
+NOTIFICATION_HISTORY_SIZE = 100
+
+# How long (seconds) a cached PUBSUB NUMSUB subscriber count stays valid
+SUBSCRIBER_COUNT_TTL = 5.0
+
 # Historical date for external order book
 HISTORICAL_DATE = "2023-12-15"
 
@@ -52,55 +96,146 @@ TOP_100_NYSE_TICKERS = [
     "MO", "SO", "LRCX", "PANW", "ZTS", "BSX", "KLAC", "ADP", "SLB", "CB"
 ]
 
+# Order fields converted back from strings when reading an oes:order:{id} hash
+ORDER_NUMERIC_FIELDS = ("price", "quantity", "filled_quantity", "timestamp", "execution_price", "total")
+ORDER_BOOLEAN_FIELDS = ("internal", "edited")
+
+def encode_order(order: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Flatten an order into the field/value mapping stored in its Redis hash.
+    
+    Args:
+        order: Order data
+        
+    Returns:
+        Mapping of field name to string value (None values are skipped)
+    """
+    fields = {}
+    for field, value in order.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            fields[field] = value
+        elif isinstance(value, (dict, list)):
+            fields[field] = _dumps(value)
+        else:
+            fields[field] = str(value)
+    return fields
+
+def decode_order(fields: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Rebuild an order from the field/value mapping stored in its Redis hash.
+    
+    Args:
+        fields: Result of HGETALL on the order key
+        
+    Returns:
+        Order data, or None if the hash does not exist
+    """
+    if not fields:
+        return None
+    
+    order = dict(fields)
+    for field in ORDER_NUMERIC_FIELDS:
+        value = order.get(field)
+        if value is None:
+            continue
+        # Whole numbers go straight to int; prices and timestamps go straight
+        # to float instead of raising out of int() first
+        if value.lstrip("-").isdecimal():
+            order[field] = int(value)
+        else:
+            try:
+                order[field] = float(value)
+            except ValueError:
+                pass
+    for field in ORDER_BOOLEAN_FIELDS:
+        if field in order:
+            order[field] = order[field] == "True"
+    return order
+
+def price_book_key(symbol: str, side: str) -> str:
+    """Key of the price-ordered ZSET holding the resting orders of one book side."""
+    return f"oes:book:{symbol}:{side}"
+
+def legacy_book_key(book_key: str, symbol: str) -> str:
+    """Key of one symbol's legacy book (book_key is e.g. BUY_ORDERS_KEY)."""
+    return f"{book_key}:{symbol}"
+
+def price_book_score(order: Dict[str, Any]) -> float:
+    """
+    Score an order so that ZRANGE returns the best price first.
+    
+    Bids are stored with negated prices so both sides sort ascending.
+    Orders at the same price are ordered by timestamp when they are matched.
+    """
+    price = float(order['price'])
+    return -price if order['type'] == 'buy' else price
+
 # Add this near the top of the file, where other Redis keys are defined
 MATCH_ORDERS_SCRIPT = """
 local symbol = ARGV[1]
-local symbol_orders_key = "oes:symbol:" .. symbol .. ":orders"
+local symbol_orders_key = KEYS[1]
+local buy_book_key = KEYS[2]
+local sell_book_key = KEYS[3]
 local main_orders_key = "oes:orders"
+local active_orders_key = "oes:orders:active"
 local trades_key = "oes:trades"
 local executed_trades = {}
+local affected_accounts = {}
 
--- Get all order IDs for this symbol
-local order_ids = redis.call("SMEMBERS", symbol_orders_key)
-if #order_ids == 0 then
+-- Nothing to do unless the best bid crosses the best ask (bid scores are negated prices)
+local best_bid = redis.call("ZRANGE", buy_book_key, 0, 0, "WITHSCORES")
+local best_ask = redis.call("ZRANGE", sell_book_key, 0, 0, "WITHSCORES")
+if #best_bid == 0 or #best_ask == 0 or -tonumber(best_bid[2]) < tonumber(best_ask[2]) then
     return cjson.encode(executed_trades)
 end
 
--- Retrieve and categorize orders
-local buy_orders = {}
-local sell_orders = {}
+-- Only orders priced inside the crossing range can trade
+local buy_ids = redis.call("ZRANGEBYSCORE", buy_book_key, "-inf", -tonumber(best_ask[2]))
+local sell_ids = redis.call("ZRANGEBYSCORE", sell_book_key, "-inf", -tonumber(best_bid[2]))
 
-for i, order_id in ipairs(order_ids) do
-    local order_key = "oes:order:" .. order_id
-    local order_json = redis.call("GET", order_key)
-    
-    if order_json then
-        local order = cjson.decode(order_json)
+-- Retrieve open orders from one side of the book
+local function load_orders(book_key, order_ids)
+    local orders = {}
+    for i, order_id in ipairs(order_ids) do
+        local order_key = "oes:order:" .. order_id
+        local fields = redis.call("HGETALL", order_key)
+        local order = nil
         
-        -- Handle field name compatibility - ensure order has order_id field
-        if not order.order_id and order.id then
-            order.order_id = order.id
-        end
-        if not order.id and order.order_id then
-            order.id = order.order_id
-        end
-        
-        -- Initialize filled_quantity if not present
-        if not order.filled_quantity then
-            order.filled_quantity = "0"
+        if #fields > 0 then
+            order = {}
+            for j = 1, #fields, 2 do
+                order[fields[j]] = fields[j + 1]
+            end
+            
+            -- Handle field name compatibility - ensure order has order_id field
+            if not order.order_id and order.id then
+                order.order_id = order.id
+            end
+            if not order.id and order.order_id then
+                order.id = order.order_id
+            end
+            
+            -- Initialize filled_quantity if not present
+            if not order.filled_quantity then
+                order.filled_quantity = "0"
+            end
         end
         
-        -- Only consider open orders
-        if order.status == "open" or order.status == "partially_filled" then
-            if order.type:lower() == "buy" then
-                table.insert(buy_orders, order)
-            else
-                table.insert(sell_orders, order)
-            end
+        -- Only consider open orders; drop anything else from the book
+        if order and (order.status == "open" or order.status == "partially_filled") then
+            table.insert(orders, order)
+        else
+            redis.call("ZREM", book_key, order_id)
         end
     end
+    return orders
 end
 
+local buy_orders = load_orders(buy_book_key, buy_ids)
+local sell_orders = load_orders(sell_book_key, sell_ids)
+
 -- Helper function to sort by price and time
 local function sort_buy_orders(a, b)
     if tonumber(a.price) == tonumber(b.price) then
@@ -193,30 +328,44 @@ while buy_idx <= #buy_orders and sell_idx <= #sell_orders do
         redis.call("SADD", "oes:account:" .. buy_order.account_id .. ":trades", trade_id)
         redis.call("SADD", "oes:account:" .. sell_order.account_id .. ":trades", trade_id)
         
-        -- Create notification for the trade
+        -- Create notification for the trade, including the toast shown by the UI
+        local trade_message = "Order matched! " .. trade_quantity .. " " .. symbol .. " @ $" .. trade_price
         local notification = {
             type = "trade_executed",
-            message = "Order matched! " .. trade_quantity .. " " .. symbol .. " @ $" .. trade_price,
+            message = trade_message,
             trade_id = trade_id,
             symbol = symbol,
             price = trade_price,
             quantity = trade_quantity,
-            timestamp = tonumber(timestamp)
+            buy_account_id = buy_order.account_id,
+            sell_account_id = sell_order.account_id,
+            timestamp = tonumber(timestamp),
+            toast = {
+                title = "Order Matched",
+                message = trade_message,
+                variant = "success",
+                duration = 5000
+            }
         }
+        affected_accounts[buy_order.account_id] = true
+        affected_accounts[sell_order.account_id] = true
+        
+        -- Encode once and reuse for every list and channel below
+        local notification_json = cjson.encode(notification)
         
         -- Store in notifications list for each account
         local buyer_notif_key = "oes:notifications:" .. buy_order.account_id
         local seller_notif_key = "oes:notifications:" .. sell_order.account_id
-        redis.call("LPUSH", buyer_notif_key, cjson.encode(notification))
-        redis.call("LPUSH", seller_notif_key, cjson.encode(notification))
+        redis.call("LPUSH", buyer_notif_key, notification_json)
+        redis.call("LPUSH", seller_notif_key, notification_json)
         
         -- Publish to the notification channels - but only once to the main channel
         -- to avoid duplicate notifications
-        redis.call("PUBLISH", "oes:notifications", cjson.encode(notification))
+        redis.call("PUBLISH", "oes:notifications", notification_json)
         
         -- Account-specific notifications still needed for filtering
-        redis.call("PUBLISH", "oes:account:" .. buy_order.account_id .. ":notifications", cjson.encode(notification))
-        redis.call("PUBLISH", "oes:account:" .. sell_order.account_id .. ":notifications", cjson.encode(notification))
+        redis.call("PUBLISH", "oes:account:" .. buy_order.account_id .. ":notifications", notification_json)
+        redis.call("PUBLISH", "oes:account:" .. sell_order.account_id .. ":notifications", notification_json)
         
         -- Variables to track if orders should be removed from the order list
         local is_buy_filled = false
@@ -231,8 +380,10 @@ while buy_idx <= #buy_orders and sell_idx <= #sell_orders do
             buy_order.closed_at = tostring(timestamp)
             
             -- Remove filled buy order from all collections
+            redis.call("ZREM", buy_book_key, buy_id)
             redis.call("SREM", symbol_orders_key, buy_id)
             redis.call("SREM", main_orders_key, buy_id)
+            redis.call("SREM", active_orders_key, buy_id)
             redis.call("SREM", "oes:account:" .. buy_order.account_id .. ":orders", buy_id)
             
             is_buy_filled = true
@@ -243,7 +394,12 @@ while buy_idx <= #buy_orders and sell_idx <= #sell_orders do
             buy_order.status = "partially_filled"
             buy_order.filled_quantity = tostring(new_buy_filled)
         end
-        redis.call("SET", "oes:order:" .. buy_id, cjson.encode(buy_order))
+        redis.call("HSET", "oes:order:" .. buy_id,
+            "status", buy_order.status,
+            "filled_quantity", buy_order.filled_quantity)
+        if is_buy_filled then
+            redis.call("HSET", "oes:order:" .. buy_id, "closed_at", buy_order.closed_at)
+        end
         
         -- Update sell order filled quantity and status
         local new_sell_filled = sell_filled + trade_quantity
@@ -254,8 +410,10 @@ while buy_idx <= #buy_orders and sell_idx <= #sell_orders do
             sell_order.closed_at = tostring(timestamp)
             
             -- Remove filled sell order from all collections
+            redis.call("ZREM", sell_book_key, sell_id)
             redis.call("SREM", symbol_orders_key, sell_id)
             redis.call("SREM", main_orders_key, sell_id)
+            redis.call("SREM", active_orders_key, sell_id)
             redis.call("SREM", "oes:account:" .. sell_order.account_id .. ":orders", sell_id)
             
             is_sell_filled = true
@@ -266,34 +424,530 @@ while buy_idx <= #buy_orders and sell_idx <= #sell_orders do
             sell_order.status = "partially_filled"
             sell_order.filled_quantity = tostring(new_sell_filled)
         end
-        redis.call("SET", "oes:order:" .. sell_id, cjson.encode(sell_order))
+        redis.call("HSET", "oes:order:" .. sell_id,
+            "status", sell_order.status,
+            "filled_quantity", sell_order.filled_quantity)
+        if is_sell_filled then
+            redis.call("HSET", "oes:order:" .. sell_id, "closed_at", sell_order.closed_at)
+        end
+        
+        -- Report the resulting order states so callers need not re-read the orders
+        trade.buy_status = buy_order.status
+        trade.sell_status = sell_order.status
+        trade.buy_filled_quantity = tonumber(buy_order.filled_quantity)
+        trade.sell_filled_quantity = tonumber(sell_order.filled_quantity)
         
         -- Add trade to results
         table.insert(executed_trades, trade)
     end
 end
 
+-- Tell listeners to refresh the book and the affected accounts' order lists
+if #executed_trades > 0 then
+    local now = redis.call("TIME")
+    local now_ts = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    
+    redis.call("PUBLISH", "oes:orderbook_updates", cjson.encode({
+        symbol = symbol,
+        timestamp = now_ts,
+        type = "refresh"
+    }))
+    
+    local orders_updated = cjson.encode({type = "orders_updated", timestamp = now_ts})
+    for account_id, _ in pairs(affected_accounts) do
+        redis.call("PUBLISH", "oes:account:" .. account_id .. ":updates", orders_updated)
+    end
+    redis.call("PUBLISH", "oes:updates", orders_updated)
+end
+
 return cjson.encode(executed_trades)
 """
 
+# Sweeps filled, cancelled and missing orders out of the symbol, account and
+# main order lists (and closed orders out of the price books) server-side.
+# Returns the number of entries cleaned.
+CLEANUP_ORDERS_SCRIPT = """
+local main_orders_key = "oes:orders"
+local cleaned = 0
+
+-- Remove closed and missing orders referenced by one order set
+local function sweep(set_key)
+    local order_ids = redis.call("SMEMBERS", set_key)
+    for _, order_id in ipairs(order_ids) do
+        local state = redis.call("HMGET", "oes:order:" .. order_id, "status", "symbol", "account_id")
+        local status, symbol, account_id = state[1], state[2], state[3]
+        
+        if not status and not symbol and not account_id then
+            -- Dangling reference to a missing order
+            redis.call("SREM", set_key, order_id)
+            cleaned = cleaned + 1
+        elseif status == "filled" or status == "cancelled" then
+            redis.call("SREM", set_key, order_id)
+            redis.call("SREM", main_orders_key, order_id)
+            redis.call("SREM", "oes:orders:active", order_id)
+            if symbol then
+                redis.call("SREM", "oes:symbol:" .. symbol .. ":orders", order_id)
+                redis.call("ZREM", "oes:book:" .. symbol .. ":buy", order_id)
+                redis.call("ZREM", "oes:book:" .. symbol .. ":sell", order_id)
+            end
+            if account_id then
+                redis.call("SREM", "oes:account:" .. account_id .. ":orders", order_id)
+            end
+            cleaned = cleaned + 1
+        end
+    end
+end
+
+-- Sweep every order set whose key matches a pattern
+local function sweep_matching(pattern)
+    local cursor = "0"
+    repeat
+        local result = redis.call("SCAN", cursor, "MATCH", pattern, "COUNT", 1000)
+        cursor = result[1]
+        for _, set_key in ipairs(result[2]) do
+            sweep(set_key)
+        end
+    until cursor == "0"
+end
+
+for _, symbol in ipairs(redis.call("SMEMBERS", "oes:symbols")) do
+    sweep("oes:symbol:" .. symbol .. ":orders")
+end
+sweep_matching("oes:account:*:orders")
+sweep(main_orders_key)
+sweep("oes:orders:active")
+
+return cleaned
+"""
+
+# Fills a market order against the opposite side of its symbol's price book,
+# best price first, in one server-side call: creates the trades, updates both
+# orders and takes filled resting orders off the book.
+# KEYS: market order hash, opposite price book
+# ARGV: order id, symbol, account id, side, quantity, book batch size
+# Returns the market order's new state and the trades as JSON.
+EXECUTE_MARKET_ORDER_SCRIPT = """
+local order_key = KEYS[1]
+local book_key = KEYS[2]
+local order_id = ARGV[1]
+local symbol = ARGV[2]
+local account_id = ARGV[3]
+local is_buy = ARGV[4] == "buy"
+local quantity = tonumber(ARGV[5])
+local batch = tonumber(ARGV[6])
+
+local state = redis.call("HMGET", order_key, "filled_quantity", "execution_price")
+local filled = tonumber(state[1] or "0")
+local notional = filled * tonumber(state[2] or "0")
+local remaining = quantity - filled
+
+local now = redis.call("TIME")
+local timestamp = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local trades = {}
+local filled_ids = {}
+
+-- Walk the book a batch at a time; filled orders are removed after the walk
+-- so the offsets stay valid
+local start = 0
+while remaining > 0 do
+    local ids = redis.call("ZRANGE", book_key, start, start + batch - 1)
+    for _, match_id in ipairs(ids) do
+        if remaining <= 0 then
+            break
+        end
+        
+        local match_key = "oes:order:" .. match_id
+        local match = redis.call("HMGET", match_key, "status", "account_id", "price", "quantity", "filled_quantity")
+        local match_status = match[1]
+        
+        -- Only resting orders from other accounts can fill a market order
+        if (match_status == "open" or match_status == "partially_filled") and match[2] ~= account_id then
+            local match_price = tonumber(match[3])
+            local match_filled = tonumber(match[5] or "0")
+            local available = tonumber(match[4]) - match_filled
+            
+            if available > 0 then
+                local fill = math.min(remaining, available)
+                local trade_id = "T-" .. now[1] .. now[2] .. "-" .. order_id .. "-" .. match_id
+                local trade = {
+                    id = trade_id,
+                    buy_order_id = is_buy and order_id or match_id,
+                    sell_order_id = is_buy and match_id or order_id,
+                    buy_account_id = is_buy and account_id or match[2],
+                    sell_account_id = is_buy and match[2] or account_id,
+                    symbol = symbol,
+                    price = match_price,
+                    quantity = fill,
+                    timestamp = timestamp
+                }
+                redis.call("SET", "oes:trade:" .. trade_id, cjson.encode(trade))
+                redis.call("SADD", "oes:trades", trade_id)
+                table.insert(trades, trade)
+                
+                -- Update the resting order
+                match_filled = match_filled + fill
+                if match_filled >= tonumber(match[4]) then
+                    redis.call("HSET", match_key, "filled_quantity", match_filled, "status", "filled")
+                    redis.call("SREM", "oes:orders:active", match_id)
+                    table.insert(filled_ids, match_id)
+                else
+                    redis.call("HSET", match_key, "filled_quantity", match_filled, "status", "partially_filled")
+                end
+                
+                filled = filled + fill
+                notional = notional + match_price * fill
+                remaining = remaining - fill
+            end
+        end
+    end
+    
+    if #ids < batch then
+        break
+    end
+    start = start + batch
+end
+
+if #filled_ids > 0 then
+    redis.call("ZREM", book_key, unpack(filled_ids))
+end
+
+-- Write the market order once, with the volume-weighted execution price
+local status = "pending"
+if filled >= quantity then
+    status = "filled"
+elseif filled > 0 then
+    status = "partially_filled"
+end
+
+local result = {status = status, filled_quantity = filled, trades = trades}
+if filled > 0 then
+    result.execution_price = notional / filled
+    redis.call("HSET", order_key, "status", status, "filled_quantity", filled, "execution_price", result.execution_price)
+else
+    redis.call("HSET", order_key, "status", status)
+end
+
+if status == "partially_filled" then
+    redis.call("SADD", "oes:orders:active", order_id)
+else
+    redis.call("SREM", "oes:orders:active", order_id)
+end
+
+return cjson.encode(result)
+"""
+
+# Cancels an open order in one server-side call, so a match pass cannot fill
+# it between the ownership/status check and the write: marks it cancelled,
+# drops it from the active index and takes it off its price book.
+# KEYS: order hash
+# ARGV: order id, account id, cancelled_at
+# Returns {outcome, status}: outcome is "cancelled", "missing",
+# "unauthorized" or "closed"; status is the order's status before the call.
+CANCEL_ORDER_SCRIPT = """
+local order_key = KEYS[1]
+local order_id = ARGV[1]
+
+local state = redis.call("HMGET", order_key, "account_id", "status", "symbol")
+local account_id, status, symbol = state[1], state[2], state[3]
+
+if not account_id and not status and not symbol then
+    return {"missing", ""}
+end
+if account_id ~= ARGV[2] then
+    return {"unauthorized", status or ""}
+end
+if status ~= "open" then
+    return {"closed", status or ""}
+end
+
+redis.call("HSET", order_key, "status", "cancelled", "cancelled_at", ARGV[3])
+redis.call("SREM", "oes:orders:active", order_id)
+if symbol then
+    redis.call("ZREM", "oes:book:" .. symbol .. ":buy", order_id)
+    redis.call("ZREM", "oes:book:" .. symbol .. ":sell", order_id)
+end
+return {"cancelled", status}
+"""
+
+# Edits an open order atomically, so a match pass cannot fill it between the
+# status check and the write: writes only the edited fields and, when the
+# price moved, re-scores the order in its price book (ZADD XX, so an order
+# that has already left the book is never put back).
+# KEYS: order hash
+# ARGV: order id, new price book score ("" to leave the book alone), then
+#       field, value pairs
+# Returns {outcome, status, filled_quantity}: outcome is "edited", "missing"
+# or "closed"; status and filled_quantity are the order's at the time.
+EDIT_ORDER_SCRIPT = """
+local order_key = KEYS[1]
+local order_id = ARGV[1]
+
+local state = redis.call("HMGET", order_key, "status", "symbol", "type", "filled_quantity")
+local status, symbol, side, filled_quantity = state[1], state[2], state[3], state[4]
+
+if not status and not symbol then
+    return {"missing", "", "0"}
+end
+if status ~= "open" and status ~= "partially_filled" then
+    return {"closed", status or "", filled_quantity or "0"}
+end
+
+redis.call("HSET", order_key, unpack(ARGV, 3))
+if ARGV[2] ~= "" and symbol and side then
+    redis.call("ZADD", "oes:book:" .. symbol .. ":" .. side, "XX", ARGV[2], order_id)
+end
+return {"edited", status, filled_quantity or "0"}
+"""
+
+# Writes an order's status (and any other fields) only if the order exists,
+# keeping the active-order index in step, so a missing order is never
+# created as a partial hash.
+# KEYS: order hash, active-order index
+# ARGV: order id, "1" if the new status is active, then field, value pairs
+# Returns 1 if the order was updated, 0 if it does not exist.
+UPDATE_ORDER_STATUS_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    redis.call("SREM", KEYS[2], ARGV[1])
+    return 0
+end
+
+redis.call("HSET", KEYS[1], unpack(ARGV, 3))
+if ARGV[2] == "1" then
+    redis.call("SADD", KEYS[2], ARGV[1])
+else
+    redis.call("SREM", KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+# Adds an order to one symbol's legacy books (if ARGV[1] is set) and keeps
+# matching the best bid against the best ask of that book pair until they no
+# longer cross or ARGV[6] trades were made, in one atomic call. Book members
+# are order ids; each order's body lives in its oes:order:{id} hash, where
+# partial fills just lower the quantity and full fills mark it filled and
+# push the filled order's JSON onto the filled history list.
+# KEYS: the symbol's buy book, sell book, trades list, legacy symbol
+#       registry, filled order history list
+# ARGV: order id to add ("" for none), its book side, its score,
+#       "1" for the internal (mid-price) book, timestamp, maximum trades,
+#       symbol, then the new order's hash fields as field, value pairs
+# Returns the executed trades as JSON.
+LEGACY_MATCH_SCRIPT = """
+local buy_key = KEYS[1]
+local sell_key = KEYS[2]
+local trades_key = KEYS[3]
+local internal = ARGV[4] == "1"
+local timestamp = tonumber(ARGV[5])
+local max_trades = tonumber(ARGV[6])
+local trades = {}
+
+if ARGV[1] ~= "" then
+    if #ARGV > 7 then
+        redis.call("HSET", "oes:order:" .. ARGV[1], unpack(ARGV, 8))
+    end
+    redis.call("ZADD", ARGV[2] == "buy" and buy_key or sell_key, ARGV[3], ARGV[1])
+    redis.call("SADD", KEYS[4], ARGV[7])
+end
+
+-- Read the fields a trade needs (nil if the order's hash is gone)
+local function load(order_id)
+    local state = redis.call("HMGET", "oes:order:" .. order_id,
+        "quantity", "symbol", "asset_type", "trader_id", "trader_name")
+    if not state[1] then
+        return nil
+    end
+    return {
+        id = order_id,
+        quantity = tonumber(state[1]),
+        symbol = state[2] or nil,
+        asset_type = state[3] or nil,
+        trader_id = state[4] or nil,
+        trader_name = state[5] or nil
+    }
+end
+
+-- Fields converted back from strings in filled history entries, matching
+-- what decode_order produces for the same hash
+local numeric_fields = {price = true, quantity = true, filled_quantity = true, timestamp = true,
+    execution_price = true, total = true}
+local boolean_fields = {internal = true, edited = true}
+
+-- Record a filled order in the filled history, as the cancel path does
+local function record_filled(order_id)
+    local fields = redis.call("HGETALL", "oes:order:" .. order_id)
+    local entry = {}
+    for i = 1, #fields, 2 do
+        local field, value = fields[i], fields[i + 1]
+        if numeric_fields[field] then
+            entry[field] = tonumber(value) or value
+        elseif boolean_fields[field] then
+            entry[field] = value == "True"
+        else
+            entry[field] = value
+        end
+    end
+    redis.call("LPUSH", KEYS[5], cjson.encode(entry))
+end
+
+-- Lower an order's quantity, or take it off its book once it is filled
+local function fill(book_key, order, trade_quantity)
+    local remaining = order.quantity - trade_quantity
+    if remaining > 0 then
+        redis.call("HSET", "oes:order:" .. order.id, "quantity", remaining)
+    else
+        redis.call("ZREM", book_key, order.id)
+        redis.call("HSET", "oes:order:" .. order.id, "quantity", 0, "status", "filled")
+        record_filled(order.id)
+    end
+end
+
+while #trades < max_trades do
+    -- Bid scores are negated prices, so the best bid is the lowest score
+    local best_buy = redis.call("ZRANGE", buy_key, 0, 0, "WITHSCORES")
+    local best_sell = redis.call("ZRANGE", sell_key, 0, 0, "WITHSCORES")
+    if #best_buy == 0 or #best_sell == 0 then
+        break
+    end
+
+    local buy_price = -tonumber(best_buy[2])
+    local sell_price = tonumber(best_sell[2])
+    if buy_price < sell_price then
+        break
+    end
+
+    local buy_order = load(best_buy[1])
+    local sell_order = load(best_sell[1])
+    if not buy_order then
+        -- Dangling id without an order body
+        redis.call("ZREM", buy_key, best_buy[1])
+    elseif not sell_order then
+        redis.call("ZREM", sell_key, best_sell[1])
+    else
+        local trade_quantity = math.min(buy_order.quantity, sell_order.quantity)
+
+        -- Lit trades print at the sell price, internal ones at the mid-price
+        local trade_price = sell_price
+        local prefix = "T-"
+        if internal then
+            trade_price = (buy_price + sell_price) / 2
+            prefix = "INT-T-"
+        end
+
+        local trade = {
+            id = prefix .. math.floor(timestamp) .. "-" .. buy_order.id .. "-" .. sell_order.id,
+            buy_order_id = buy_order.id,
+            sell_order_id = sell_order.id,
+            price = trade_price,
+            quantity = trade_quantity,
+            timestamp = timestamp,
+            symbol = buy_order.symbol,
+            asset_type = buy_order.asset_type,
+            buyer_id = buy_order.trader_id,
+            seller_id = sell_order.trader_id,
+            internal_match = internal and "True" or "False"
+        }
+        if internal then
+            trade.buyer_name = buy_order.trader_name or "Unknown"
+            trade.seller_name = sell_order.trader_name or "Unknown"
+        end
+        redis.call("LPUSH", trades_key, cjson.encode(trade))
+
+        fill(buy_key, buy_order, trade_quantity)
+        fill(sell_key, sell_order, trade_quantity)
+
+        table.insert(trades, trade)
+    end
+end
+
+return cjson.encode(trades)
+"""
+
+def index_order_status(client, order_id: str, status: Optional[str]) -> None:
+    """
+    Add an order to or remove it from the active-order index for its status.
+    
+    Args:
+        client: Redis client or pipeline to queue the command on
+        order_id: Order ID
+        status: The order's new status (None leaves the index alone)
+    """
+    if status is None:
+        return
+    if status in ACTIVE_ORDER_STATUSES:
+        client.sadd(ACTIVE_ORDERS_KEY, order_id)
+    else:
+        client.srem(ACTIVE_ORDERS_KEY, order_id)
+
+def store_legacy_order(client, book_key: str, order: Dict[str, Any], score: float) -> None:
+    """
+    Write a legacy order's hash and add its id to its symbol's legacy book.
+    
+    Args:
+        client: Redis client or pipeline to queue the commands on
+        book_key: Legacy book the order rests in (e.g. BUY_ORDERS_KEY)
+        order: Order data (must carry its id and symbol)
+        score: The order's score (negated price for bids)
+    """
+    client.hset(f"oes:order:{order['id']}", mapping=encode_order(order))
+    client.zadd(legacy_book_key(book_key, order['symbol']), {order['id']: score})
+    client.sadd(LEGACY_SYMBOLS_KEY, order['symbol'])
+
+def connection_pool(decode_responses: bool) -> BlockingConnectionPool:
+    """
+    Create a connection pool for the configured Redis endpoint.
+    
+    Args:
+        decode_responses: Whether replies are decoded to str
+        
+    Returns:
+        Pool using the Unix socket if REDIS_SOCKET is set, TCP otherwise
+    """
+    if REDIS_SOCKET:
+        return BlockingConnectionPool(
+            connection_class=redis.UnixDomainSocketConnection,
+            path=REDIS_SOCKET,
+            password=REDIS_PASSWORD,
+            db=REDIS_DB,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+            decode_responses=decode_responses
+        )
+    return BlockingConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        password=REDIS_PASSWORD,
+        db=REDIS_DB,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        socket_keepalive=True,
+        decode_responses=decode_responses
+    )
+
 class RedisClient:
     def __init__(self):
         """Initialize Redis client."""
         try:
-            self.redis = redis.Redis(
-                host=REDIS_HOST,
-                port=REDIS_PORT,
-                password=REDIS_PASSWORD,
-                db=REDIS_DB,
-                decode_responses=True
-            )
+            self.redis = redis.Redis(connection_pool=connection_pool(decode_responses=True))
+            
+            # Undecoded client for scripts that return large JSON documents;
+            # orjson parses the bytes directly, skipping a UTF-8 decode
+            self.raw_redis = redis.Redis(connection_pool=connection_pool(decode_responses=False))
+            
+            # Script text -> SHA1; scripts are loaded once so the hot path
+            # only sends the SHA1
+            self._script_shas: Dict[str, str] = {}
+            for script in (MATCH_ORDERS_SCRIPT, CLEANUP_ORDERS_SCRIPT,
+                           EXECUTE_MARKET_ORDER_SCRIPT, LEGACY_MATCH_SCRIPT,
+                           CANCEL_ORDER_SCRIPT, UPDATE_ORDER_STATUS_SCRIPT,
+                           EDIT_ORDER_SCRIPT):
+                self._script_shas[script] = self.redis.script_load(script)
             
-            # Register Lua scripts
-            self.match_orders_script = self.redis.register_script(MATCH_ORDERS_SCRIPT)
+            # Channel -> (subscriber count, monotonic time it was read)
+            self._subcount_cache: Dict[str, Tuple[int, float]] = {}
             
             # Test connection
             self.redis.ping()
-            logger.info(f"Connected to Redis at {REDIS_HOST}:{REDIS_PORT}")
+            logger.info(f"Connected to Redis at {REDIS_SOCKET or f'{REDIS_HOST}:{REDIS_PORT}'}")
         except redis.ConnectionError as e:
             logger.error(f"Failed to connect to Redis: {e}")
             sys.exit(1)
@@ -324,20 +978,64 @@ class RedisClient:
             self.redis.delete(key)
         for key in self.redis.scan_iter("oes:symbol:*:orders"):
             self.redis.delete(key)
+        self.redis.delete(SYMBOLS_KEY)
+        self.redis.delete(LEGACY_SYMBOLS_KEY)
+        for key in self.redis.scan_iter("oes:book:*"):
+            self.redis.delete(key)
+        for key in self.redis.scan_iter("oes:match_events:*"):
+            self.redis.delete(key)
         
         logger.info("All orders cleared successfully")
 
+    def symbols(self) -> Set[str]:
+        """Get every symbol that has orders indexed."""
+        return self.redis.smembers(SYMBOLS_KEY)
+
+    def rebuild_symbol_registry(self) -> int:
+        """
+        Register the symbols of order sets written before the registry existed.
+        
+        Uses SCAN once at start-up; afterwards every order write keeps the
+        registry current.
+        
+        Returns:
+            Number of symbols registered
+        """
+        symbols = [key.split(":")[2] for key in self.redis.scan_iter("oes:symbol:*:orders")]
+        if not symbols:
+            return 0
+        return self.redis.sadd(SYMBOLS_KEY, *symbols)
+
     def ping(self):
         """Ping Redis to check connection."""
         return self.redis.ping()
 
+    async def offload(self, func, *args, **kwargs):
+        """
+        Run a blocking Redis call on the default executor.
+        
+        The client is synchronous; async code awaits this instead of calling
+        it directly so the event loop keeps serving while the round trips
+        are in flight, and independent calls can run concurrently on the
+        connection pool.
+        
+        Args:
+            func: Blocking callable to run
+            *args, **kwargs: Arguments passed to func
+            
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
     def zadd(self, key, mapping):
         """Add to a sorted set."""
         return self.redis.zadd(key, mapping)
 
-    def zrem(self, key, member):
+    def zrem(self, key, *members):
         """Remove from a sorted set."""
-        return self.redis.zrem(key, member)
+        return self.redis.zrem(key, *members)
 
     def zrange(self, key, start, stop, withscores=False):
         """Get range from sorted set."""
@@ -371,9 +1069,13 @@ class RedisClient:
         """Get a field from a hash."""
         return self.redis.hget(key, field)
 
-    def hset(self, key, field, value):
-        """Set a field in a hash."""
-        return self.redis.hset(key, field, value)
+    def hset(self, key, field=None, value=None, mapping=None):
+        """Set a field, or several fields via mapping, in a hash."""
+        return self.redis.hset(key, field, value, mapping=mapping)
+
+    def hmget(self, key, fields):
+        """Get several fields from a hash."""
+        return self.redis.hmget(key, fields)
 
     def hgetall(self, key):
         """Get all fields and values in a hash."""
@@ -399,142 +1101,257 @@ class RedisClient:
         """Get all members in a set."""
         return self.redis.smembers(key)
 
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """Get the string values of several keys in one round trip."""
+        return self.redis.mget(keys)
+
+    def publish(self, channel: str, message: str) -> int:
+        """Publish a message to a channel."""
+        return self.redis.publish(channel, message)
+
+    def xadd(self, key: str, fields: Dict[str, Any], maxlen: Optional[int] = None,
+             approximate: bool = True) -> str:
+        """Append an entry to a stream, optionally trimming it to (about, if approximate) maxlen entries."""
+        return self.redis.xadd(key, fields, maxlen=maxlen, approximate=approximate)
+
+    def xread(self, streams: Dict[str, str], count: Optional[int] = None,
+              block: Optional[int] = None) -> List[Any]:
+        """Read entries newer than the given ids from one or more streams, waiting up to block ms."""
+        return self.redis.xread(streams, count=count, block=block)
+
+    def last_stream_id(self, key: str) -> str:
+        """Get the id of a stream's newest entry ("0-0" if the stream is empty)."""
+        entries = self.redis.xrevrange(key, count=1)
+        return entries[0][0] if entries else "0-0"
+
+    def channels_with_subscribers(self, channels: List[str]) -> Set[str]:
+        """
+        Get the channels that currently have at least one subscriber.
+        
+        Counts come from PUBSUB NUMSUB and are cached for SUBSCRIBER_COUNT_TTL
+        seconds; all stale channels are refreshed in a single call.
+        
+        Args:
+            channels: Channels about to be published to
+            
+        Returns:
+            The subset of channels with subscribers
+        """
+        now = time.monotonic()
+        cache = self._subcount_cache
+        stale = [
+            channel for channel in channels
+            if channel not in cache or now - cache[channel][1] > SUBSCRIBER_COUNT_TTL
+        ]
+        
+        if stale:
+            for channel, count in self.redis.pubsub_numsub(*stale):
+                cache[channel] = (int(count), now)
+        
+        return {channel for channel in channels if cache.get(channel, (1, now))[0] > 0}
+
+    def script_load(self, script: str) -> str:
+        """Load a Lua script into the script cache and return its SHA1."""
+        return self.redis.script_load(script)
+
+    def run_script(self, script: str, keys=(), args=(), raw: bool = False):
+        """
+        Run a Lua script by its SHA1 with EVALSHA, loading it on first use.
+        
+        If Redis no longer has the script (e.g. after a restart or SCRIPT
+        FLUSH) it is loaded again and the call retried once, so the full
+        script text only goes over the wire when it has to.
+        
+        Args:
+            script: Lua source, also the cache key for its SHA1
+            keys: Keys the script touches
+            args: Script arguments
+            raw: Return the reply undecoded (bytes), for orjson
+            
+        Returns:
+            The script's reply
+        """
+        client = self.raw_redis if raw else self.redis
+        sha = self._script_shas.get(script)
+        if sha is None:
+            sha = self._script_shas[script] = self.redis.script_load(script)
+        try:
+            return client.evalsha(sha, len(keys), *keys, *args)
+        except NoScriptError:
+            self._script_shas[script] = self.redis.script_load(script)
+            return client.evalsha(self._script_shas[script], len(keys), *keys, *args)
+
+    def pipeline(self, transaction: bool = False):
+        """Create a pipeline that sends queued commands in one round trip."""
+        return self.redis.pipeline(transaction=transaction)
+
+    def exists(self, key: str) -> bool:
+        """Check whether a key exists."""
+        return self.redis.exists(key) > 0
+
+    def load_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Read an order from its oes:order:{id} hash."""
+        return decode_order(self.redis.hgetall(f"oes:order:{order_id}"))
+
+    def load_order_fields(self, order_id: str, fields: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """
+        Read only some fields of an order with HMGET.
+        
+        Args:
+            order_id: Order ID
+            fields: Field names to read
+            
+        Returns:
+            The fields the order has, or None if the order does not exist
+        """
+        values = self.redis.hmget(f"oes:order:{order_id}", fields)
+        return decode_order({field: value for field, value in zip(fields, values) if value is not None})
+
+    def load_orders(self, order_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Read several order hashes in one round trip (None for missing orders)."""
+        pipe = self.redis.pipeline(transaction=False)
+        for order_id in order_ids:
+            pipe.hgetall(f"oes:order:{order_id}")
+        return [decode_order(fields) for fields in pipe.execute()]
+
+    def store_order(self, order_id: str, order: Dict[str, Any], pipe=None) -> int:
+        """
+        Write an order to its oes:order:{id} hash and its active-order index entry.
+        
+        Commands are queued on pipe if given (the return value is then the
+        pipeline); otherwise they are sent in one round trip and the HSET
+        result is returned.
+        """
+        client = pipe if pipe is not None else self.redis.pipeline(transaction=False)
+        client.hset(f"oes:order:{order_id}", mapping=encode_order(order))
+        index_order_status(client, order_id, order.get('status'))
+        if pipe is not None:
+            return pipe
+        return client.execute()[0]
+
+    def update_order_fields(self, order_id: str, fields: Dict[str, Any]) -> int:
+        """Overwrite selected fields of an order hash, keeping the active-order index in step."""
+        if 'status' not in fields:
+            return self.redis.hset(f"oes:order:{order_id}", mapping=encode_order(fields))
+        
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(f"oes:order:{order_id}", mapping=encode_order(fields))
+        index_order_status(pipe, order_id, fields['status'])
+        return pipe.execute()[0]
+
+    def update_order_status_lua(self, order_id: str, fields: Dict[str, Any]) -> bool:
+        """
+        Write an order's new status and other fields only if the order exists.
+        
+        Args:
+            order_id: Order ID
+            fields: Fields to write, including 'status'
+            
+        Returns:
+            True if the order was updated, False if it does not exist
+        """
+        keys = (f"oes:order:{order_id}", ACTIVE_ORDERS_KEY)
+        args = [order_id, "1" if fields['status'] in ACTIVE_ORDER_STATUSES else "0"]
+        for field, value in encode_order(fields).items():
+            args.extend((field, value))
+        return self.run_script(UPDATE_ORDER_STATUS_SCRIPT, keys, args) == 1
+
+    def active_order_ids(self) -> Set[str]:
+        """Get the ids of all open and partially filled orders."""
+        return self.redis.smembers(ACTIVE_ORDERS_KEY)
+
+    def add_to_price_book(self, order: Dict[str, Any], pipe=None) -> None:
+        """Add (or re-price) a resting limit order in its symbol's price book (queued on pipe if given)."""
+        side = order.get('type')
+        if side not in ('buy', 'sell') or order.get('price') is None:
+            return
+        if order.get('order_type') == 'market':
+            # Market orders never rest in the book
+            return
+        order_id = order.get('order_id', order.get('id'))
+        client = pipe if pipe is not None else self.redis
+        client.zadd(price_book_key(order['symbol'], side), {order_id: price_book_score(order)})
+
+    def crossed_symbols(self, symbols: List[str]) -> List[str]:
+        """
+        Get the symbols whose best bid reaches their best ask.
+        
+        Peeks at the top of both price books of every symbol in one pipelined
+        round trip, so quiet symbols never reach the matcher script.
+        
+        Args:
+            symbols: Symbols to check
+            
+        Returns:
+            The symbols that can trade, in the given order
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for symbol in symbols:
+            pipe.zrange(price_book_key(symbol, 'buy'), 0, 0, withscores=True)
+            pipe.zrange(price_book_key(symbol, 'sell'), 0, 0, withscores=True)
+        tops = pipe.execute()
+        
+        crossed = []
+        for index, symbol in enumerate(symbols):
+            best_bid = tops[2 * index]
+            best_ask = tops[2 * index + 1]
+            # Bid scores are negated prices
+            if best_bid and best_ask and -best_bid[0][1] >= best_ask[0][1]:
+                crossed.append(symbol)
+        return crossed
+
+    def remove_from_price_book(self, symbol: str, order_id: str) -> None:
+        """Remove an order from both sides of its symbol's price book."""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrem(price_book_key(symbol, 'buy'), order_id)
+        pipe.zrem(price_book_key(symbol, 'sell'), order_id)
+        pipe.execute()
+
+    def match_legacy_book(self, internal: bool, symbol: str, order: Optional[Dict[str, Any]] = None,
+                          side: Optional[str] = None, score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Run LEGACY_MATCH_SCRIPT on one symbol's lit or internal legacy book.
+        
+        Args:
+            internal: Match the internal (dark pool) book instead of the lit one
+            symbol: Symbol whose book is matched
+            order: Order to store and add to the book first, if any
+            side: 'buy' or 'sell' book the order is added to
+            score: The order's score (negated price for bids)
+            
+        Returns:
+            Executed trades
+        """
+        if internal:
+            keys = (legacy_book_key(INTERNAL_BUY_ORDERS_KEY, symbol), legacy_book_key(INTERNAL_SELL_ORDERS_KEY, symbol), INTERNAL_TRADES_KEY, LEGACY_SYMBOLS_KEY, INTERNAL_FILLED_ORDERS_KEY)
+        else:
+            keys = (legacy_book_key(BUY_ORDERS_KEY, symbol), legacy_book_key(SELL_ORDERS_KEY, symbol), TRADES_KEY, LEGACY_SYMBOLS_KEY, FILLED_ORDERS_KEY)
+        args = [order['id'] if order else "", side or "", score, "1" if internal else "0", time.time(), LEGACY_MATCH_MAX_TRADES, symbol]
+        if order:
+            # The order's hash is written by the script, in the same call
+            for field, value in encode_order(order).items():
+                args.extend((field, value))
+        
+        result = self.run_script(LEGACY_MATCH_SCRIPT, keys, args, raw=True)
+        
+        # cjson encodes an empty Lua table as an object
+        return _loads(result) or []
+
     async def match_orders(self, include_internal=False):
         """Match orders from the order books based on price-time priority."""
         executed_trades = []
         
         try:
-            # Get the best buy and sell orders
-            best_buy = self.zrevrange(BUY_ORDERS_KEY, 0, 0, withscores=True)
-            best_sell = self.zrange(SELL_ORDERS_KEY, 0, 0, withscores=True)
-            
-            # If there are matching orders
-            if best_buy and best_sell:
-                buy_order_json, buy_price_neg = best_buy[0]
-                sell_order_json, sell_price = best_sell[0]
-                
-                # Convert price to actual price (remember buy prices are stored negatively)
-                buy_price = -buy_price_neg
-                
-                # Parse the order JSON
-                buy_order = json.loads(buy_order_json)
-                sell_order = json.loads(sell_order_json)
+            # Each symbol's book pair is matched until it no longer crosses
+            # (or the per-call cap is hit) inside one script call; symbols
+            # never trade against each other. The calls run through offload
+            # so the event loop keeps serving while the scripts run.
+            for symbol in await self.offload(self.redis.smembers, LEGACY_SYMBOLS_KEY):
+                executed_trades.extend(await self.offload(self.match_legacy_book, internal=False, symbol=symbol))
                 
-                # Check if prices cross (buy >= sell)
-                if buy_price >= sell_price:
-                    # Orders match - execute trade
-                    trade_quantity = min(float(buy_order['quantity']), float(sell_order['quantity']))
-                    trade_price = sell_price  # Using the sell price for simplicity
-                    
-                    # Create trade record
-                    trade_id = f"T-{int(time.time())}-{buy_order['id']}-{sell_order['id']}"
-                    trade = {
-                        'id': trade_id,
-                        'buy_order_id': buy_order['id'],
-                        'sell_order_id': sell_order['id'],
-                        'price': trade_price,
-                        'quantity': trade_quantity,
-                        'timestamp': time.time(),
-                        'symbol': buy_order['symbol'],
-                        'asset_type': buy_order['asset_type'],
-                        'buyer_id': buy_order['trader_id'],
-                        'seller_id': sell_order['trader_id'],
-                        'internal_match': "False"
-                    }
-                    
-                    # Add to trades list
-                    self.lpush(TRADES_KEY, json.dumps(trade))
-                    
-                    # Update order quantities
-                    remaining_buy_qty = float(buy_order['quantity']) - trade_quantity
-                    remaining_sell_qty = float(sell_order['quantity']) - trade_quantity
-                    
-                    # Remove the original orders
-                    self.zrem(BUY_ORDERS_KEY, buy_order_json)
-                    self.zrem(SELL_ORDERS_KEY, sell_order_json)
-                    
-                    # If there are remaining quantities, add updated orders
-                    if remaining_buy_qty > 0:
-                        buy_order['quantity'] = remaining_buy_qty
-                        self.zadd(BUY_ORDERS_KEY, {json.dumps(buy_order): buy_price_neg})
-                    else:
-                        buy_order['status'] = 'filled'
-                    
-                    if remaining_sell_qty > 0:
-                        sell_order['quantity'] = remaining_sell_qty
-                        self.zadd(SELL_ORDERS_KEY, {json.dumps(sell_order): sell_price})
-                    else:
-                        sell_order['status'] = 'filled'
-                    
-                    # Add the executed trade to our result list
-                    executed_trades.append(trade)
-            
-            # If internal matching is enabled, do the same for internal orders
-            if include_internal and DARK_POOL_ENABLED:
-                best_internal_buy = self.zrevrange(INTERNAL_BUY_ORDERS_KEY, 0, 0, withscores=True)
-                best_internal_sell = self.zrange(INTERNAL_SELL_ORDERS_KEY, 0, 0, withscores=True)
-                
-                if best_internal_buy and best_internal_sell:
-                    buy_order_json, buy_price_neg = best_internal_buy[0]
-                    sell_order_json, sell_price = best_internal_sell[0]
-                    
-                    # Convert price to actual price
-                    buy_price = -buy_price_neg
-                    
-                    # Parse the order JSON
-                    buy_order = json.loads(buy_order_json)
-                    sell_order = json.loads(sell_order_json)
-                    
-                    # Check if prices cross (buy >= sell)
-                    if buy_price >= sell_price:
-                        # Orders match - execute trade
-                        trade_quantity = min(float(buy_order['quantity']), float(sell_order['quantity']))
-                        trade_price = (buy_price + sell_price) / 2  # Mid-price for internal trades
-                        
-                        # Create trade record
-                        trade_id = f"INT-T-{int(time.time())}-{buy_order['id']}-{sell_order['id']}"
-                        trade = {
-                            'id': trade_id,
-                            'buy_order_id': buy_order['id'],
-                            'sell_order_id': sell_order['id'],
-                            'price': trade_price,
-                            'quantity': trade_quantity,
-                            'timestamp': time.time(),
-                            'symbol': buy_order['symbol'],
-                            'asset_type': buy_order['asset_type'],
-                            'buyer_id': buy_order['trader_id'],
-                            'buyer_name': buy_order.get('trader_name', 'Unknown'),
-                            'seller_id': sell_order['trader_id'],
-                            'seller_name': sell_order.get('trader_name', 'Unknown'),
-                            'internal_match': "True"
-                        }
-                        
-                        # Add to internal trades list
-                        self.lpush(INTERNAL_TRADES_KEY, json.dumps(trade))
-                        
-                        # Update order quantities
-                        remaining_buy_qty = float(buy_order['quantity']) - trade_quantity
-                        remaining_sell_qty = float(sell_order['quantity']) - trade_quantity
-                        
-                        # Remove the original orders
-                        self.zrem(INTERNAL_BUY_ORDERS_KEY, buy_order_json)
-                        self.zrem(INTERNAL_SELL_ORDERS_KEY, sell_order_json)
-                        
-                        # If there are remaining quantities, add updated orders
-                        if remaining_buy_qty > 0:
-                            buy_order['quantity'] = remaining_buy_qty
-                            self.zadd(INTERNAL_BUY_ORDERS_KEY, {json.dumps(buy_order): buy_price_neg})
-                        else:
-                            buy_order['status'] = 'filled'
-                        
-                        if remaining_sell_qty > 0:
-                            sell_order['quantity'] = remaining_sell_qty
-                            self.zadd(INTERNAL_SELL_ORDERS_KEY, {json.dumps(sell_order): sell_price})
-                        else:
-                            sell_order['status'] = 'filled'
-                        
-                        # Add the executed trade to our result list
-                        executed_trades.append(trade)
+                # If internal matching is enabled, do the same for internal orders
+                if include_internal and DARK_POOL_ENABLED:
+                    executed_trades.extend(await self.offload(self.match_legacy_book, internal=True, symbol=symbol))
         
         except Exception as e:
             logger.error(f"Error matching orders: {e}")
@@ -558,6 +1375,7 @@ class RedisClient:
         try:
             # For Redis library compatibility during shutdown
             self.redis.connection_pool.disconnect()
+            self.raw_redis.connection_pool.disconnect()
             logger.info("Redis connection closed")
         except Exception as e:
             logger.error(f"Error closing Redis connection: {e}")
@@ -566,18 +1384,98 @@ class RedisClient:
         """
         Execute the Lua script to match orders for a symbol.
         
+        Script errors propagate so the caller can fall back to matching in
+        Python.
+        
         Args:
             symbol: Trading symbol to match orders for
             
         Returns:
             List of executed trades
         """
+        # The symbol's own keys are declared so Redis knows what the script touches
+        keys = (
+            f"oes:symbol:{symbol}:orders",
+            price_book_key(symbol, 'buy'),
+            price_book_key(symbol, 'sell'),
+        )
+        return _loads(self.run_script(MATCH_ORDERS_SCRIPT, keys, (symbol,), raw=True))
+
+    def cleanup_orders_lua(self) -> Optional[int]:
+        """
+        Execute the Lua script that sweeps closed and missing orders out of the order lists.
+        
+        Returns:
+            Number of entries cleaned, or None if the script failed
+        """
         try:
-            result = self.match_orders_script(args=[symbol])
-            return json.loads(result)
+            return self.run_script(CLEANUP_ORDERS_SCRIPT)
         except Exception as e:
-            logger.error(f"Error executing Lua match_orders script: {e}")
-            return []
+            logger.error(f"Error executing Lua cleanup_orders script: {e}")
+            return None
+
+    def execute_market_order_lua(self, order: Dict[str, Any], batch: int) -> Dict[str, Any]:
+        """
+        Execute the Lua script that fills a market order against the book.
+        
+        Args:
+            order: The market order (order_id, symbol, account_id, type, quantity)
+            batch: Number of resting orders read per ZRANGE while walking the book
+            
+        Returns:
+            The order's new status, filled_quantity and execution_price, and
+            the trades it made
+        """
+        side = order['type']
+        keys = (
+            f"oes:order:{order['order_id']}",
+            price_book_key(order['symbol'], 'sell' if side == 'buy' else 'buy'),
+        )
+        args = (order['order_id'], order['symbol'], order['account_id'], side, order['quantity'], batch)
+        result = _loads(self.run_script(EXECUTE_MARKET_ORDER_SCRIPT, keys, args, raw=True))
+        
+        # cjson encodes an empty Lua table as an object
+        result['trades'] = result['trades'] or []
+        return result
+
+    def cancel_order_lua(self, order_id: str, account_id: Optional[str], cancelled_at: str) -> Tuple[str, str]:
+        """
+        Execute the Lua script that cancels an open order atomically.
+        
+        Args:
+            order_id: Order ID
+            account_id: Account the order must belong to
+            cancelled_at: Cancellation time to record on the order
+            
+        Returns:
+            The outcome ("cancelled", "missing", "unauthorized" or "closed")
+            and the order's status before the call
+        """
+        keys = (f"oes:order:{order_id}",)
+        args = (order_id, account_id or "", cancelled_at)
+        outcome, status = self.run_script(CANCEL_ORDER_SCRIPT, keys, args)
+        return outcome, status
+
+    def edit_order_lua(self, order_id: str, fields: Dict[str, Any],
+                       score: Optional[float] = None) -> Tuple[str, str, float]:
+        """
+        Execute the Lua script that edits an open order atomically.
+        
+        Args:
+            order_id: Order ID
+            fields: Edited fields to write (price, quantity, edit metadata)
+            score: New price book score, or None if the price did not change
+            
+        Returns:
+            The outcome ("edited", "missing" or "closed") and the order's
+            status and filled quantity at the time of the call
+        """
+        keys = (f"oes:order:{order_id}",)
+        args = [order_id, "" if score is None else score]
+        for field, value in encode_order(fields).items():
+            args.extend((field, value))
+        outcome, status, filled_quantity = self.run_script(EDIT_ORDER_SCRIPT, keys, args)
+        return outcome, status, float(filled_quantity)
 
     async def get_all_orders_for_account(self, account_id: str) -> List[Dict[str, Any]]:
         """
@@ -606,19 +1504,22 @@ class RedisClient:
         """
         try:
             # Convert notification to JSON
-            notification_json = json.dumps(notification)
+            notification_json = _dumps(notification)
             
-            # Publish to the specified channel
-            self.redis.publish(channel, notification_json)
+            # Publish to the specified channel; the publish and the history
+            # write go out together in one round trip
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.publish(channel, notification_json)
             
             # Store in account-specific notifications if an account_id is present
             account_id = notification.get('account_id')
             if account_id:
                 notifications_key = f"oes:notifications:{account_id}"
-                self.redis.lpush(notifications_key, notification_json)
-                self.redis.ltrim(notifications_key, 0, 99)  # Keep only the 100 most recent notifications
+                pipe.lpush(notifications_key, notification_json)
+                pipe.ltrim(notifications_key, 0, NOTIFICATION_HISTORY_SIZE - 1)
+            pipe.execute()
                 
-            logger.debug(f"Published notification to {channel}: {notification.get('type')}")
+            logger.debug("Published notification to %s: %s", channel, notification.get('type'))
             return True
             
         except Exception as e:
@@ -628,14 +1529,11 @@ class RedisClient:
     async def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
         """Get an order by its ID."""
         try:
-            order_key = f"oes:order:{order_id}"
-            order_json = self.redis.get(order_key)
+            order = self.load_order(order_id)
             
-            if not order_json:
+            if not order:
                 logger.error(f"Order {order_id} not found")
                 return None
-                
-            order = json.loads(order_json)
             
             # Ensure both id fields exist for compatibility
             if 'order_id' not in order and 'id' in order:
@@ -673,21 +1571,17 @@ class RedisClient:
             True if the update was successful, False otherwise
         """
         try:
-            order_key = f"oes:order:{order_id}"
-            order_json = self.redis.get(order_key)
-            
-            if not order_json:
+            if not self.exists(f"oes:order:{order_id}"):
                 logger.error(f"Order {order_id} not found")
                 return False
                 
-            order = json.loads(order_json)
-            order[field] = value
+            fields = {field: value}
             
             # If the status is changing to 'filled', add a closed_at timestamp
             if field == 'status' and value in ['filled', 'cancelled']:
-                order['closed_at'] = datetime.now().isoformat()
+                fields['closed_at'] = datetime.now().isoformat()
                 
-            self.redis.set(order_key, json.dumps(order))
+            self.update_order_fields(order_id, fields)
             logger.info(f"Updated order {order_id} field {field} to {value}")
             return True
             
@@ -702,12 +1596,10 @@ class RedisClient:
             logger.info(f"Updating order {order_id} with new values: price={updated_order.get('price')}, quantity={updated_order.get('quantity')}")
             
             # First get the current order to compare
-            current_order_json = self.redis.get(f"oes:order:{order_id}")
-            if not current_order_json:
+            current_order = self.load_order(order_id)
+            if not current_order:
                 logger.error(f"Order {order_id} not found during update")
                 return False
-                
-            current_order = json.loads(current_order_json)
             
             # Check if we need to update the order book
             price_changed = ('price' in updated_order and 
@@ -726,12 +1618,9 @@ class RedisClient:
             current_order['edited'] = True
             current_order['last_edited_at'] = datetime.now().isoformat()
             
-            # Convert the order to JSON
-            order_json = json.dumps(current_order)
-            
             # Update the order in Redis
             logger.info(f"Saving updated order to Redis key: oes:order:{order_id}")
-            await self.redis.set(f"oes:order:{order_id}", order_json)
+            self.store_order(order_id, current_order)
             
             # Update the order in order indices if needed
             account_id = current_order.get("account_id")
@@ -744,15 +1633,16 @@ class RedisClient:
                 symbol = current_order.get("symbol")
                 if symbol:
                     await self.redis.sadd(f"oes:symbol:{symbol}:orders", order_id)
+                    await self.redis.sadd(SYMBOLS_KEY, symbol)
             
             # If price changed, add back to the order book at the new price
             if price_changed:
                 logger.info(f"Adding updated order {order_id} back to the order book")
                 await self.add_order_to_book(current_order)
+                self.add_to_price_book(current_order)
             
             # Verify the order was updated correctly
-            updated_json = self.redis.get(f"oes:order:{order_id}")
-            if updated_json:
+            if self.exists(f"oes:order:{order_id}"):
                 logger.info(f"Order {order_id} was successfully updated in Redis")
             else:
                 logger.error(f"Order {order_id} update verification failed - order not found after update")
@@ -778,7 +1668,7 @@ class RedisClient:
             trade_key = f"oes:trade:{trade_id}"
             
             # Store the trade in Redis
-            self.redis.set(trade_key, json.dumps(trade))
+            self.redis.set(trade_key, _dumps(trade))
             
             # Add to the trades collection
             self.redis.sadd(TRADES_KEY, trade_id)
@@ -827,7 +1717,7 @@ class RedisClient:
             
             for member in all_members:
                 try:
-                    member_data = json.loads(member)
+                    member_data = _loads(member)
                     if member_data.get("id") == order_id or member_data.get("order_id") == order_id:
                         # We found the matching order, remove it
                         logger.info(f"Found matching order in book, removing: {member_data.get('id')}")
@@ -922,9 +1812,9 @@ def seed_historical_data():
                         "internal_match": "False"
                     }
                     
-                    # Add to Redis sorted set
+                    # Store the order and add its id to the sorted set
                     # For buy orders, we use negative price for descending sort
-                    client.redis.zadd(BUY_ORDERS_KEY, {json.dumps(order_data): -price})
+                    store_legacy_order(client.redis, BUY_ORDERS_KEY, order_data, -price)
             
             # Create sell orders (asks)
             # Higher prices, lower volume at the top of the book
@@ -952,9 +1842,9 @@ def seed_historical_data():
                         "internal_match": "False"
                     }
                     
-                    # Add to Redis sorted set
+                    # Store the order and add its id to the sorted set
                     # For sell orders, we use positive price for ascending sort
-                    client.redis.zadd(SELL_ORDERS_KEY, {json.dumps(order_data): price})
+                    store_legacy_order(client.redis, SELL_ORDERS_KEY, order_data, price)
         
         # Create some historical trades
         for ticker in TOP_100_NYSE_TICKERS[:20]:  # Only seed trades for top 20 tickers
@@ -1050,9 +1940,9 @@ def seed_internal_book():
                         "edited": "False"
                     }
                     
-                    # Add to Redis sorted set
+                    # Store the order and add its id to the sorted set
                     # For buy orders, we use negative price for descending sort
-                    client.redis.zadd(INTERNAL_BUY_ORDERS_KEY, {json.dumps(order_data): -price})
+                    store_legacy_order(client.redis, INTERNAL_BUY_ORDERS_KEY, order_data, -price)
             
             # Create sell orders (asks)
             for i in range(1, num_sell_levels + 1):
@@ -1082,9 +1972,9 @@ def seed_internal_book():
                         "edited": "False"
                     }
                     
-                    # Add to Redis sorted set
+                    # Store the order and add its id to the sorted set
                     # For sell orders, we use positive price for ascending sort
-                    client.redis.zadd(INTERNAL_SELL_ORDERS_KEY, {json.dumps(order_data): price})
+                    store_legacy_order(client.redis, INTERNAL_SELL_ORDERS_KEY, order_data, price)
         
         # Create some internal trades
         for ticker in TOP_100_NYSE_TICKERS[:15]:  # Only seed trades for top 15 tickers for internal
@@ -19,6 +19,7 @@ logger = logging.getLogger("oes.run")
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.main import app, shutdown_event
+from app.matching_engine import MATCH_SHARDS
 
 # Define server port
 SERVER_PORT = 8002
@@ -26,6 +27,19 @@ SERVER_PORT = 8002
 # Set global flag for preventing data clearing
 NO_CLEAR_DATA = False
 
+# Optional comma-separated list of CPU cores to pin the server process to,
+# e.g. OES_CPU_AFFINITY=2,3 to keep the event loop on isolated cores
+CPU_AFFINITY = os.environ.get("OES_CPU_AFFINITY", "")
+
+# Negotiate permessage-deflate on WebSocket connections. Compression is
+# applied to every frame of a connection, so it only pays off when order book
+# snapshots dominate the traffic; set OES_WS_DEFLATE=0 when clients mostly
+# receive small trade updates
+WS_PER_MESSAGE_DEFLATE = os.environ.get("OES_WS_DEFLATE", "1") != "0"
+
+# Match worker processes started for OES_MATCH_SHARDS
+MATCH_WORKERS = []
+
 def check_port_in_use(port):
     """Check if the specified port is already in use"""
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -129,8 +143,37 @@ def populate_data():
     except Exception as e:
         logger.error(f"Error populating data: {e}")
 
+def pin_to_cores(cores_spec):
+    """Pin the current process to the given comma-separated CPU cores"""
+    if not cores_spec:
+        return
+    
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("CPU pinning is not supported on this platform, ignoring OES_CPU_AFFINITY")
+        return
+    
+    try:
+        cores = {int(core) for core in cores_spec.split(",") if core.strip()}
+        os.sched_setaffinity(0, cores)
+        logger.info(f"Pinned server process to CPU cores {sorted(cores)}")
+    except (ValueError, OSError) as e:
+        logger.error(f"Failed to pin process to cores '{cores_spec}': {e}")
+
+def start_match_workers():
+    """Start one match worker process per shard when matching is sharded"""
+    for shard in range(MATCH_SHARDS):
+        process = subprocess.Popen([sys.executable, "-m", "app.match_worker", "--shard", str(shard)])
+        MATCH_WORKERS.append(process)
+        logger.info(f"Started match worker {shard} (pid {process.pid})")
+
+def stop_match_workers():
+    """Terminate the match worker processes"""
+    for process in MATCH_WORKERS:
+        process.terminate()
+
 def signal_handler(sig, frame):
     print('\nShutting down gracefully...')
+    stop_match_workers()
     # Force exit immediately
     os._exit(0)
 
@@ -159,14 +202,27 @@ if __name__ == "__main__":
     if NO_CLEAR_DATA:
         os.environ["OES_NO_CLEAR_DATA"] = "1"
     
+    # Start the sharded match workers (no-op unless OES_MATCH_SHARDS is set)
+    # before pinning, since child processes inherit the affinity mask and
+    # would otherwise all share the event loop's cores
+    start_match_workers()
+    
+    # Pin the event loop to dedicated cores if requested
+    pin_to_cores(CPU_AFFINITY)
+    
     # Configure uvicorn
+    # "auto" selects uvloop and httptools when they are installed and falls
+    # back to asyncio and h11 otherwise (e.g. uvloop is unavailable on Windows)
     config = uvicorn.Config(
         "app.main:app",
         host="0.0.0.0",
         port=SERVER_PORT,
         reload=False,
         log_level="info",
-        workers=1
+        workers=1,
+        loop="auto",
+        http="auto",
+        ws_per_message_deflate=WS_PER_MESSAGE_DEFLATE
     )
     
     # Run the server
@@ -175,4 +231,5 @@ if __name__ == "__main__":
         server.run()
     except KeyboardInterrupt:
         print("Received exit signal")
+        stop_match_workers()
         os._exit(0) 
\ No newline at end of file
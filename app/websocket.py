@@ -1,8 +1,17 @@
-import json
+import orjson
 import asyncio
-from typing import Dict, List, Any, Optional, Set
+from collections import deque
+from typing import Dict, List, Any, Optional, Set, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 
+# Broadcast encoder. orjson writes the same compact, non-ASCII-escaped JSON
+# as WebSocket.send_json; non-str keys are allowed like json.dumps does.
+_dumps = orjson.dumps
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# Maximum number of messages waiting for the broadcast drainer
+OUTBOUND_QUEUE_SIZE = 65536
+
 class ConnectionManager:
     """
     WebSocket connection manager for real-time updates.
@@ -19,6 +28,21 @@ class ConnectionManager:
         # Channel subscribers (channel -> Set of WebSockets)
         self.channels: Dict[str, Set[WebSocket]] = {}
         
+        # Outbound (channel, message) items waiting for the broadcast drainer.
+        # Producers append without awaiting; a single drainer task sends them.
+        self.outbound: deque = deque()
+        
+        # Set when outbound has items; created on first use so it binds to
+        # the server's running loop rather than the one current at import
+        self._outbound_ready: Optional[asyncio.Event] = None
+        
+    @property
+    def outbound_ready(self) -> asyncio.Event:
+        """Get the outbound-ready event, creating it inside the running loop on first use."""
+        if self._outbound_ready is None:
+            self._outbound_ready = asyncio.Event()
+        return self._outbound_ready
+    
     async def connect(self, websocket: WebSocket):
         """Accept a new WebSocket connection."""
         await websocket.accept()
@@ -79,37 +103,134 @@ class ConnectionManager:
             "status": "unsubscribed"
         })
     
+    def publish(self, message: Any, channel: Optional[str] = None):
+        """
+        Queue a message for broadcast without waiting for it to be sent.
+        
+        The message is delivered in order by run_broadcast_drainer. If the
+        queue is full the oldest order book snapshot is dropped, since the
+        next snapshot supersedes it.
+        
+        Args:
+            message: The message to send (will be converted to JSON)
+            channel: Optional channel name to limit broadcast
+        """
+        if len(self.outbound) >= OUTBOUND_QUEUE_SIZE:
+            self._drop_oldest_outbound()
+        self.outbound.append((channel, message))
+        self.outbound_ready.set()
+    
+    def _drop_oldest_outbound(self):
+        """Make room in the outbound queue, preferring to drop a snapshot."""
+        for index, (_, message) in enumerate(self.outbound):
+            if isinstance(message, dict) and message.get("type") == "orderbook":
+                del self.outbound[index]
+                return
+        self.outbound.popleft()
+    
+    async def run_broadcast_drainer(self):
+        """Single writer that sends every queued message to its subscribers."""
+        while True:
+            try:
+                await self.outbound_ready.wait()
+                self.outbound_ready.clear()
+                
+                # Take everything queued so far in one go
+                batch = list(self.outbound)
+                self.outbound.clear()
+                
+                await self.broadcast_batch(batch)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error in broadcast drainer: {e}")
+    
+    async def broadcast_batch(self, batch: List[Tuple[Optional[str], Any]]):
+        """
+        Broadcast a batch of (channel, message) items.
+        
+        Each subscriber gets its own outbound view of the batch: order book
+        snapshots are squashable, so only the newest one per symbol is kept,
+        while every other message (trades, toasts, ...) is delivered in FIFO
+        order. Each message is serialized once and the same payload is sent to
+        every subscriber. Subscribers are flushed concurrently so a slow
+        consumer does not delay the others.
+        
+        Args:
+            batch: List of (channel, message) tuples
+        """
+        try:
+            # Per-subscriber pending snapshots (symbol -> payload) and FIFO queue
+            pending_snapshots: Dict[WebSocket, Dict[str, str]] = {}
+            pending_messages: Dict[WebSocket, deque] = {}
+            
+            for channel, message in batch:
+                targets = self._targets(channel)
+                if not targets:
+                    continue
+                
+                payload = self._serialize(message)
+                if payload is None:
+                    continue
+                
+                # Order book snapshots for the same symbol supersede each other
+                snapshot_key = None
+                if isinstance(message, dict) and message.get("type") == "orderbook":
+                    snapshot_key = message.get("symbol")
+                
+                for connection in targets:
+                    if snapshot_key is not None:
+                        pending_snapshots.setdefault(connection, {})[snapshot_key] = payload
+                    else:
+                        pending_messages.setdefault(connection, deque()).append(payload)
+            
+            connections = list(pending_messages.keys() | pending_snapshots.keys())
+            if not connections:
+                return
+            
+            results = await asyncio.gather(*[
+                self._flush(
+                    connection,
+                    list(pending_messages.get(connection, ())) +
+                    list(pending_snapshots.get(connection, {}).values())
+                )
+                for connection in connections
+            ])
+            
+            # Clean up any disconnected clients
+            for connection, delivered in zip(connections, results):
+                if not delivered:
+                    self.disconnect(connection)
+        except Exception as e:
+            # Log any unexpected errors
+            print(f"Error in broadcast_batch method: {e}")
+    
     async def broadcast(self, message: Any, channel: Optional[str] = None):
         """
         Broadcast a message to all connections or to a specific channel.
         
         Args:
-            message: The message to send (will be converted to JSON)
+            message: The message to send (will be converted to JSON once),
+                or an already serialized JSON payload as bytes
             channel: Optional channel name to limit broadcast
         """
         try:
             # Select target connections
-            if channel is not None and channel in self.channels:
-                targets = list(self.channels[channel])
-            else:
-                targets = self.active_connections
+            targets = self._targets(channel)
                 
             # Skip if no targets
             if not targets:
                 return
                 
-            # Ensure message is JSON-serializable
-            if not isinstance(message, (dict, list, str, int, float, bool, type(None))):
-                message = str(message)
+            # Serialize once for all targets
+            payload = self._serialize(message)
+            if payload is None:
+                return
                 
             # Send to all targets
             disconnected = []
             for connection in targets:
-                try:
-                    await connection.send_json(message)
-                except (WebSocketDisconnect, RuntimeError) as e:
-                    # Log the error
-                    print(f"WebSocket error during broadcast: {e}")
+                if not await self._flush(connection, [payload]):
                     # Mark for removal
                     disconnected.append(connection)
                     
@@ -119,6 +240,46 @@ class ConnectionManager:
         except Exception as e:
             # Log any unexpected errors
             print(f"Error in broadcast method: {e}")
+    
+    def _targets(self, channel: Optional[str] = None) -> List[WebSocket]:
+        """Get the connections a channel broadcast should reach."""
+        if channel is not None and channel in self.channels:
+            return list(self.channels[channel])
+        return list(self.active_connections)
+    
+    @staticmethod
+    def _serialize(message: Any) -> Optional[str]:
+        """
+        Serialize a message to the JSON text sent to clients.
+        
+        Bytes are treated as an already serialized payload. Returns None if
+        the message cannot be serialized.
+        """
+        if isinstance(message, bytes):
+            return message.decode("utf-8")
+        
+        # Ensure message is JSON-serializable
+        if not isinstance(message, (dict, list, str, int, float, bool, type(None))):
+            message = str(message)
+        
+        try:
+            # Same encoding as WebSocket.send_json
+            return _dumps(message, option=DUMPS_OPTIONS).decode("utf-8")
+        except (TypeError, ValueError) as e:
+            print(f"Error serializing broadcast message: {e}")
+            return None
+    
+    async def _flush(self, connection: WebSocket, payloads: List[str]) -> bool:
+        """Send serialized payloads to one connection, returning False if it went away."""
+        try:
+            for payload in payloads:
+                # Clients JSON.parse text frames, so keep sending text
+                await connection.send_text(payload)
+            return True
+        except (WebSocketDisconnect, RuntimeError) as e:
+            # Log the error
+            print(f"WebSocket error during broadcast: {e}")
+            return False
 
 # Create a singleton instance
 connection_manager = ConnectionManager() 
\ No newline at end of file
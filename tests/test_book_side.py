@@ -0,0 +1,32 @@
+from app.book_side import BookSide, price_to_ticks
+
+def _order(order_id, price, timestamp):
+    return {'id': order_id, 'price': price, 'timestamp': timestamp}
+
+def test_same_price_orders_keep_time_priority():
+    side = BookSide(is_buy=True)
+    side.add(_order('late', 100.0, 3.0))
+    side.add(_order('early', 100.0, 1.0))
+    side.add(_order('middle', 100.0, 2.0))
+    
+    assert [o['id'] for o in side] == ['early', 'middle', 'late']
+
+def test_equal_timestamps_keep_arrival_order():
+    side = BookSide(is_buy=False)
+    side.add(_order('first', 50.0, 1.0))
+    side.add(_order('second', 50.0, 1.0))
+    
+    assert [o['id'] for o in side] == ['first', 'second']
+
+def test_best_price_first_on_each_side():
+    bids = BookSide(is_buy=True)
+    asks = BookSide(is_buy=False)
+    for side in (bids, asks):
+        side.add(_order('low', 99.5, 1.0))
+        side.add(_order('high', 100.5, 2.0))
+    
+    assert bids.best_price() == price_to_ticks(100.5)
+    assert asks.best_price() == price_to_ticks(99.5)
+    assert [o['id'] for o in bids] == ['high', 'low']
+    assert [o['id'] for o in asks] == ['low', 'high']
+    assert len(bids) == 2
@@ -0,0 +1,70 @@
+from app.matching_kernel import _match_loop, plan_matches
+
+def _order(account_id, price, quantity, timestamp, filled_quantity=0):
+    return {
+        'account_id': account_id,
+        'price': price,
+        'quantity': quantity,
+        'filled_quantity': filled_quantity,
+        'timestamp': timestamp,
+    }
+
+def test_self_trade_is_skipped():
+    buys = [_order('acct-a', 101.0, 5, 1.0)]
+    sells = [_order('acct-a', 99.0, 5, 2.0), _order('acct-b', 100.0, 5, 3.0)]
+    
+    # The cheaper sell belongs to the buyer, so only the second sell trades
+    assert plan_matches(buys, sells) == [(0, 1, 5.0, 101.0)]
+
+def test_partial_fills_across_several_sells():
+    buys = [_order('buyer', 100.0, 10, 1.0)]
+    sells = [
+        _order('seller-1', 98.0, 3, 2.0),
+        _order('seller-2', 99.0, 4, 3.0),
+        _order('seller-3', 100.0, 5, 4.0),
+    ]
+    
+    # The buy rested first, so every trade prints at the buy price
+    assert plan_matches(buys, sells) == [
+        (0, 0, 3.0, 100.0),
+        (0, 1, 4.0, 100.0),
+        (0, 2, 3.0, 100.0),
+    ]
+
+def test_trade_price_comes_from_the_earlier_order():
+    buys = [_order('buyer', 101.0, 1, 5.0)]
+    sells = [_order('seller', 99.0, 1, 2.0)]
+    
+    assert plan_matches(buys, sells) == [(0, 0, 1.0, 99.0)]
+
+def test_filled_quantity_is_not_traded_again():
+    buys = [_order('buyer', 100.0, 10, 1.0, filled_quantity=8)]
+    sells = [_order('seller', 100.0, 10, 2.0)]
+    
+    assert plan_matches(buys, sells) == [(0, 0, 2.0, 100.0)]
+
+def test_matches_fit_in_out_arrays_sized_to_both_sides():
+    # Interleaved quantities make every match fill one side or the other,
+    # which is the most matches the kernel can produce
+    buys = [_order(f'buyer-{i}', 100.0, 2 if i % 2 else 3, float(i)) for i in range(6)]
+    sells = [_order(f'seller-{j}', 100.0, 3 if j % 2 else 2, 10.0 + j) for j in range(6)]
+    size = len(buys) + len(sells)
+    
+    # Plain lists raise IndexError if the kernel writes past the bound
+    out_buy, out_sell = [0] * size, [0] * size
+    out_qty, out_price = [0.0] * size, [0.0] * size
+    
+    def columns(orders):
+        return (
+            [o['price'] for o in orders],
+            [float(o['quantity']) for o in orders],
+            [0.0 for _ in orders],
+            [o['timestamp'] for o in orders],
+            [hash(o['account_id']) for o in orders],
+        )
+    
+    n = _match_loop(*columns(buys), *columns(sells), out_buy, out_sell, out_qty, out_price)
+    
+    assert 0 < n <= size
+    assert sum(out_qty[:n]) == sum(o['quantity'] for o in buys)
+    assert len(plan_matches(buys, sells)) == n
@@ -0,0 +1,70 @@
+import asyncio
+
+import orjson
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.websocket import ConnectionManager
+
+class RecordingConnection:
+    """Stands in for a WebSocket and records the text frames sent to it."""
+    
+    def __init__(self):
+        self.sent = []
+    
+    async def send_text(self, payload):
+        self.sent.append(orjson.loads(payload))
+
+def _manager(*channels):
+    manager = ConnectionManager()
+    connection = RecordingConnection()
+    manager.active_connections.append(connection)
+    manager.subscriptions[connection] = set(channels)
+    for channel in channels:
+        manager.channels.setdefault(channel, set()).add(connection)
+    return manager, connection
+
+def _book(symbol, version):
+    return {'type': 'orderbook', 'symbol': symbol, 'version': version}
+
+def test_only_latest_snapshot_is_sent_per_symbol():
+    manager, connection = _manager('orderbook:AAPL')
+    batch = [('orderbook:AAPL', _book('AAPL', version)) for version in range(3)]
+    
+    asyncio.run(manager.broadcast_batch(batch))
+    
+    assert connection.sent == [_book('AAPL', 2)]
+
+def test_snapshots_for_other_channels_are_kept():
+    manager, connection = _manager('orderbook:AAPL', 'orderbook:MSFT')
+    batch = [
+        ('orderbook:AAPL', _book('AAPL', 1)),
+        ('orderbook:MSFT', _book('MSFT', 1)),
+        ('orderbook:AAPL', _book('AAPL', 2)),
+    ]
+    
+    asyncio.run(manager.broadcast_batch(batch))
+    
+    assert sorted(connection.sent, key=lambda m: m['symbol']) == [_book('AAPL', 2), _book('MSFT', 1)]
+
+def test_other_messages_are_not_squashed():
+    manager, connection = _manager('trades:AAPL')
+    trades = [{'type': 'trade', 'symbol': 'AAPL', 'id': i} for i in range(3)]
+    
+    asyncio.run(manager.broadcast_batch([('trades:AAPL', trade) for trade in trades]))
+    
+    assert connection.sent == trades
+
+def test_each_connection_gets_its_own_latest_snapshot():
+    manager, first = _manager('orderbook:AAPL')
+    second = RecordingConnection()
+    manager.active_connections.append(second)
+    manager.subscriptions[second] = {'orderbook:AAPL'}
+    manager.channels['orderbook:AAPL'].add(second)
+    batch = [('orderbook:AAPL', _book('AAPL', version)) for version in range(2)]
+    
+    asyncio.run(manager.broadcast_batch(batch))
+    
+    assert first.sent == [_book('AAPL', 1)]
+    assert second.sent == [_book('AAPL', 1)]